@@ -16,6 +16,8 @@ Setup:
 
 import time
 from scripts.base_script import BaseScript
+from scripts.regions import Region
+from scripts.transition import TransitionDetector
 
 
 class VCGen2RandomEncounter(BaseScript):
@@ -42,6 +44,8 @@ class VCGen2RandomEncounter(BaseScript):
             return
         x, y, w, h = region
         log(f"Detection region: x={x} y={y} w={w} h={h}")
+        # Encounter blackout: the text box region goes mostly dark.
+        transition = TransitionDetector('dark', 60, 0.7, region=Region.from_pixels(x, y, w, h))
 
         steps = 5          # tiles to walk per direction
         step_count = 0
@@ -63,8 +67,9 @@ class VCGen2RandomEncounter(BaseScript):
                     return
 
                 # Check for encounter (screen goes dark)
-                frame = frame_grabber.get_latest_frame() if frame_grabber else None
-                if frame is not None and self._screen_dark(frame, x, y, w, h):
+                if frame_grabber is not None and transition.check(frame_grabber):
+                    # Handled from here on: the next encounter must go dark again.
+                    transition.reset()
                     step_count = 0
                     encounter_time_ms = self._handle_encounter(
                         controller, frame_grabber, stop_event, log,
@@ -102,8 +107,8 @@ class VCGen2RandomEncounter(BaseScript):
                 if not self.wait(0.05, stop_event):
                     return
 
-                frame = frame_grabber.get_latest_frame() if frame_grabber else None
-                if frame is not None and self._screen_dark(frame, x, y, w, h):
+                if frame_grabber is not None and transition.check(frame_grabber):
+                    transition.reset()
                     encounter_time_ms = self._handle_encounter(
                         controller, frame_grabber, stop_event, log,
                         x, y, w, h, encounter_count, normal_time_ms
@@ -153,12 +158,6 @@ class VCGen2RandomEncounter(BaseScript):
         log("Timed out waiting for encounter text.")
         return None
 
-    def _screen_dark(self, frame, x, y, w, h) -> bool:
-        """True if the region is mostly dark (encounter blackout)."""
-        region = frame[y:y + h, x:x + w]
-        dark = (region[:, :, 0] < 60) & (region[:, :, 1] < 60) & (region[:, :, 2] < 60)
-        return dark.mean() > 0.7
-
     def _text_visible(self, frame, x, y, w, h) -> bool:
         """True when dark text pixels appear in the text box region."""
         region = frame[y:y + h, x:x + w]
@@ -4,8 +4,10 @@ Game: Pokemon Diamond / Pearl (DS via 3DS)
 
 Uses the GamePRo light sensor (LDR) to detect the shiny animation.
 The bottom DS screen brightness changes when the shiny sparkle plays —
-the script reads the LDR 10 times and compares the first half against
-the second half. A significant step change means a shiny was seen.
+the script streams LDR readings until the sparkle window learned from
+earlier resets has passed, then compares the first half of them against
+the second: a significant step means a shiny was seen, otherwise it
+resets (ldr_window.py).
 
 Setup:
   - Save in the player's room, in front of the TV / briefcase (before
@@ -15,6 +17,7 @@ Setup:
 """
 
 from scripts.base_script import BaseScript
+from scripts.ldr_window import SparkleWindow
 
 
 class DPShinyStarter(BaseScript):
@@ -36,13 +39,17 @@ class DPShinyStarter(BaseScript):
     BATTLE_DELAY    = 5.0    # wait for battle screen to load
 
     # ── LDR detection ───────────────────────────────────────────────────────
-    LDR_SAMPLES   = 10       # readings per cycle
+    LDR_SAMPLES   = 10       # most readings per cycle (until the window is learned)
+    LDR_INTERVAL  = 0.1      # seconds between readings
+    LDR_MARGIN    = 0.5      # seconds kept after the latest learned intro activity
     STEP_LIMIT    = 30       # minimum brightness step to flag as shiny
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log(f"Diamond/Pearl Shiny Starter started. Starter: {self.STARTER}")
         log("The LDR must be positioned over the bottom DS screen.")
 
+        window = SparkleWindow(self.STEP_LIMIT, self.LDR_SAMPLES * self.LDR_INTERVAL,
+                               interval=self.LDR_INTERVAL, margin=self.LDR_MARGIN)
         sr_count = 0
 
         while not stop_event.is_set():
@@ -90,7 +97,7 @@ class DPShinyStarter(BaseScript):
             if not self.wait(self.BATTLE_DELAY, stop_event): break
 
             # ── LDR detection loop ──────────────────────────────────────────
-            shiny = self._check_ldr(controller, stop_event, log)
+            shiny = self._check_ldr(window, controller, stop_event, log)
             if stop_event.is_set():
                 break
 
@@ -103,24 +110,9 @@ class DPShinyStarter(BaseScript):
 
         log("Diamond/Pearl Shiny Starter stopped.")
 
-    def _check_ldr(self, controller, stop_event, log) -> bool:
+    def _check_ldr(self, window, controller, stop_event, log) -> bool:
         """
-        Take LDR_SAMPLES readings, compare first half vs second half average.
-        Returns True if step change > STEP_LIMIT (shiny sparkle detected).
+        Stream LDR readings until the sparkle window closes; True on a step
+        over STEP_LIMIT between its halves (shiny sparkle detected).
         """
-        readings = []
-        for i in range(self.LDR_SAMPLES):
-            if stop_event.is_set():
-                return False
-            val = controller.read_light_value()
-            readings.append(val)
-            self.wait(0.1, stop_event)
-
-        n = len(readings)
-        half = n // 2
-        avg_first  = sum(readings[:half]) / half
-        avg_second = sum(readings[half:]) / (n - half)
-        step = abs(avg_second - avg_first)
-
-        log(f"LDR: first_avg={avg_first:.1f}  second_avg={avg_second:.1f}  step={step:.1f}")
-        return step > self.STEP_LIMIT
+        return window.check(controller, stop_event, log)
@@ -33,8 +33,8 @@ Notes:
 import json
 import os
 import sys
-import time
 from scripts.base_script import BaseScript
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -197,22 +197,11 @@ class HGSSHeadbuttEncounter(BaseScript):
 
     def _wait_for_blackout(self, frame_grabber, stop_event, timeout: float) -> bool:
         """Poll for encounter blackout; return True if detected."""
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame() if frame_grabber else None
-            if frame is not None:
-                sample = frame[50:430, 50:590]
-                dark = (
-                    (sample[:, :, 0] < 40) &
-                    (sample[:, :, 1] < 40) &
-                    (sample[:, :, 2] < 40)
-                )
-                if dark.mean() > self.BLACKOUT_THRESHOLD:
-                    return True
-            time.sleep(0.05)
-        return False
+        if frame_grabber is None:
+            self.wait(timeout, stop_event)
+            return False
+        return blackout(40, self.BLACKOUT_THRESHOLD).wait_for_start(
+            frame_grabber, stop_event, timeout, poll=0.05)
 
     # ── Persistence ───────────────────────────────────────────────────────────
 
@@ -32,6 +32,7 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -78,6 +79,7 @@ class HGSSRandomEncounter(BaseScript):
             log(f"Calibration loaded from {_cal_path()}")
 
         encounter_count = 0
+        transition = blackout(40, self.BLACKOUT_THRESHOLD)
 
         # Direction pair for movement
         if self.MOVE_DIR == 'ud':
@@ -107,9 +109,10 @@ class HGSSRandomEncounter(BaseScript):
                         return
 
                     # Check for encounter (screen blackout)
-                    frame = frame_grabber.get_latest_frame() if frame_grabber else None
-                    if frame is not None and self._is_blackout(frame):
+                    if frame_grabber is not None and transition.check(frame_grabber):
                         controller.release_all()
+                        # Handled from here on: the next encounter must go dark again.
+                        transition.reset()
 
                         log(f"Encounter #{encounter_count + 1} detected!")
                         if not self.wait(self.ENCOUNTER_WAIT, stop_event):
@@ -202,16 +205,6 @@ class HGSSRandomEncounter(BaseScript):
         controller.press_b()
         self.wait(1.5, stop_event)
 
-    def _is_blackout(self, frame) -> bool:
-        """True if the screen has gone mostly dark (encounter flash)."""
-        sample = frame[50:430, 50:590]
-        dark = (
-            (sample[:, :, 0] < 40) &
-            (sample[:, :, 1] < 40) &
-            (sample[:, :, 2] < 40)
-        )
-        return dark.mean() > self.BLACKOUT_THRESHOLD
-
     # ── Persistence ───────────────────────────────────────────────────────────
 
     def _load_calibration(self):
@@ -24,6 +24,7 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -140,22 +141,8 @@ class BWRandomEncounter(BaseScript):
         log("BW - Random Encounter stopped.")
 
     def _wait_for_blackout(self, frame_grabber, stop_event, timeout: float) -> bool:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                sample = frame[50:430, 50:590]
-                dark = (
-                    (sample[:, :, 0] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 1] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 2] < self.DARK_THRESHOLD)
-                )
-                if dark.mean() > self.DARK_FRACTION:
-                    return True
-            time.sleep(0.03)
-        return False
+        return blackout(self.DARK_THRESHOLD, self.DARK_FRACTION).wait_for_start(
+            frame_grabber, stop_event, timeout)
 
     def _calibrate(self, controller, frame_grabber, stop_event,
                    log, request_calibration):
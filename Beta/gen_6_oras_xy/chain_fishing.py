@@ -4,8 +4,12 @@ Game: Pokemon X/Y and ORAS
 
 Casts the fishing rod repeatedly without moving to build a chain.
 Detects the fishing exclamation mark via pixel colour (white/red pixels
-above the trainer), then uses the LDR sensor to detect the shiny sparkle
-during the battle.
+above the trainer) on every new frame and hooks on the same frame
+(reaction.py), then uses the LDR sensor to detect the shiny sparkle
+during the battle. The sensor is only watched until the learned sparkle
+window has passed (ldr_window.py), then the script flees. Reaction times
+(frame → decision → A sent) are logged as percentiles; a p90 over
+REACTION_BUDGET_MS is flagged.
 
 Setup:
   - Stand on a fishing tile facing water, rod in bag
@@ -13,8 +17,11 @@ Setup:
   - Calibrate the exclamation mark detection region
 """
 
-import time
 from scripts.base_script import BaseScript
+from scripts.colour_classes import ColourClasses
+from scripts.ldr_window import SparkleWindow
+from scripts.reaction import Reactor
+from scripts.regions import Region
 
 
 class ChainFishing(BaseScript):
@@ -26,7 +33,10 @@ class ChainFishing(BaseScript):
     HOOK_WINDOW     = 15.0   # max wait for exclamation mark
     AFTER_HOOK      = 1.0    # delay after hooking (A press)
     BATTLE_WAIT     = 2.0    # wait for battle to load after hooking
-    LDR_MONITOR    = 25.0    # time window to monitor LDR for shiny sparkle
+    LDR_MONITOR    = 25.0    # longest LDR watch, until the sparkle window is learned
+    LDR_INTERVAL    = 0.1    # seconds between LDR readings
+    LDR_MARGIN      = 2.0    # seconds kept after the latest learned intro activity
+    LDR_LEARN       = 5      # encounters watched in full before exiting early
     POST_BATTLE     = 6.0    # delay after fleeing before next cast
     MOVE_L          = 1.5    # briefly press left to "reset" rod position
     MOVE_R          = 1.5    # briefly press right to return
@@ -36,6 +46,12 @@ class ChainFishing(BaseScript):
     RED_MIN_R       = 180    # R above for red dot
     RED_MAX_G       = 100    # G below for red dot
     LDR_STEP_LIMIT  = 40     # brightness step to flag as shiny
+    WHITE_COUNT_MIN = 20     # white pixels that mean a bite
+    RED_COUNT_MIN   = 10     # red pixels that mean a bite
+
+    # ── Reaction monitoring ──────────────────────────────────────────────────
+    REACTION_BUDGET_MS = 100.0   # p90 frame-to-press time before warning
+    REACTION_REPORT    = 10      # log percentiles every N hooks
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("Chain Fishing started.")
@@ -48,6 +64,14 @@ class ChainFishing(BaseScript):
         log(f"Detection region set: x={x} y={y} w={w} h={h}")
         log("LDR must be over the bottom 3DS screen.")
 
+        frame = frame_grabber.get_latest_frame()
+        shape = frame.shape if frame is not None else None
+        reactor = self._bite_reactor(Region.from_pixels(x, y, w, h, frame_shape=shape),
+                                     controller)
+        window = SparkleWindow(self.LDR_STEP_LIMIT, self.LDR_MONITOR,
+                               interval=self.LDR_INTERVAL, margin=self.LDR_MARGIN,
+                               learn=self.LDR_LEARN)
+
         chain = 0
         sr_count = 0
 
@@ -57,9 +81,8 @@ class ChainFishing(BaseScript):
             if not self.wait(self.CAST_WAIT, stop_event):
                 break
 
-            # ── Wait for exclamation mark ───────────────────────────────────
-            hooked = self._wait_for_exclamation(frame_grabber, stop_event,
-                                                 x, y, w, h)
+            # ── Wait for exclamation mark and hook on the same frame ────────
+            hooked = self._wait_for_exclamation(reactor, frame_grabber, stop_event)
             if stop_event.is_set():
                 break
 
@@ -72,15 +95,15 @@ class ChainFishing(BaseScript):
                 self.wait(0.4, stop_event)
                 continue
 
-            # ── Hook the Pokemon ────────────────────────────────────────────
-            controller.press_a()
+            # ── Hooked: the reactor pressed A on the bite frame ─────────────
+            self._report_reaction(reactor, log)
             if not self.wait(self.AFTER_HOOK, stop_event):
                 break
             if not self.wait(self.BATTLE_WAIT, stop_event):
                 break
 
             # ── Monitor LDR for shiny sparkle ───────────────────────────────
-            shiny = self._monitor_ldr_for_shiny(controller, stop_event, log)
+            shiny = self._monitor_ldr_for_shiny(window, controller, stop_event, log)
             if stop_event.is_set():
                 break
 
@@ -103,36 +126,39 @@ class ChainFishing(BaseScript):
 
         log("Chain Fishing stopped.")
 
-    def _wait_for_exclamation(self, frame_grabber, stop_event, x, y, w, h) -> bool:
-        """Returns True when white/red exclamation mark pixels appear."""
-        deadline = time.time() + self.HOOK_WINDOW
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame() if frame_grabber else None
-            if frame is not None:
-                region = frame[y:y + h, x:x + w]
-                white = ((region[:, :, 0] > self.WHITE_MIN) &
-                         (region[:, :, 1] > self.WHITE_MIN) &
-                         (region[:, :, 2] > self.WHITE_MIN))
-                red   = ((region[:, :, 2] > self.RED_MIN_R) &
-                         (region[:, :, 1] < self.RED_MAX_G))
-                if white.sum() > 20 or red.sum() > 10:
-                    return True
-            time.sleep(0.02)
-        return False
-
-    def _monitor_ldr_for_shiny(self, controller, stop_event, log) -> bool:
-        """Take 10 LDR readings split into two halves; return True on step change."""
-        readings = []
-        for _ in range(10):
-            if stop_event.is_set():
-                return False
-            readings.append(controller.read_light_value())
-            self.wait(self.LDR_MONITOR / 10, stop_event)
-
-        avg_first  = sum(readings[:5]) / 5
-        avg_second = sum(readings[5:]) / 5
-        step = abs(avg_second - avg_first)
-        log(f"LDR step: {step:.1f} (limit {self.LDR_STEP_LIMIT})")
-        return step > self.LDR_STEP_LIMIT
+    def _bite_reactor(self, region, controller) -> Reactor:
+        """Exclamation-mark detector on `region`, hooking with A."""
+        classes = (ColourClasses()
+                   .white('white', self.WHITE_MIN)
+                   .red('red', self.RED_MIN_R, self.RED_MAX_G)
+                   .compile())
+
+        def bite(roi) -> bool:
+            counts = classes.count(roi)
+            return counts['white'] > self.WHITE_COUNT_MIN or counts['red'] > self.RED_COUNT_MIN
+
+        return Reactor(region, bite, controller.press_a)
+
+    def _wait_for_exclamation(self, reactor, frame_grabber, stop_event):
+        """
+        Hook (A) on the first frame with white/red exclamation mark pixels.
+        Returns the ReactionEvent, or None if the window passed without one.
+        """
+        return reactor.wait_and_fire(frame_grabber, stop_event, self.HOOK_WINDOW)
+
+    def _report_reaction(self, reactor, log):
+        """Every REACTION_REPORT hooks, log the percentiles and check the budget."""
+        stats = reactor.stats
+        if stats.count % self.REACTION_REPORT:
+            return
+        log(f"Hook {stats}")
+        if stats.over_budget(self.REACTION_BUDGET_MS):
+            log(f"Hook reaction p90 over {self.REACTION_BUDGET_MS:.0f} ms — "
+                "the chain may break; check the capture and host load.")
+
+    def _monitor_ldr_for_shiny(self, window, controller, stop_event, log) -> bool:
+        """
+        Stream LDR readings until the learned sparkle window closes; True on
+        a step over LDR_STEP_LIMIT between its halves (shiny).
+        """
+        return window.check(controller, stop_event, log)
@@ -4,7 +4,11 @@ Game: Pokemon X/Y
 
 Walks back and forth in the Friend Safari to trigger encounters.
 Uses the LDR sensor to detect the shiny sparkle (brightness change
-on the bottom 3DS screen during the encounter animation).
+on the bottom 3DS screen during the encounter animation), fused with the
+camera's sparkle detector over the wild Pokemon (fusion.py): either one
+can call a shiny, and a full sparkle burst overrides an LDR window that
+closed without a step (ldr_window.py). An encounter the two cannot settle
+pauses like a shiny, for a look at the screen.
 
 Setup:
   - Enter your chosen Friend Safari and stand in the grass
@@ -13,6 +17,11 @@ Setup:
 """
 
 from scripts.base_script import BaseScript
+from scripts.fusion import LdrSensor, SensorFusion, SparkleSensor
+from scripts.ldr_window import SparkleWindow
+from scripts.regions import px
+from scripts.sparkle import SparkleDetector
+from scripts.transition import TransitionDetector
 
 
 class FriendSafari(BaseScript):
@@ -22,15 +31,22 @@ class FriendSafari(BaseScript):
     STEP_RANGE      = 5       # tiles to walk per direction
     STEP_MS         = 80      # ms per tile step (0.08 s)
     ENCOUNTER_WAIT  = 8.0     # wait after triggering encounter before LDR check
-    LDR_SAMPLES     = 10
+    LDR_SAMPLES     = 10      # most LDR readings, until the window is learned
+    LDR_INTERVAL    = 0.1
     LDR_STEP_LIMIT  = 40
+    SPARKLE_REGION  = px(340, 40, 260, 220)   # wild Pokemon on the top screen
+    SPARKLE_FLOOR   = 0.2     # sparkle score up to this is frame noise
+    SPARKLE_WEIGHT  = 1.0     # a full burst outweighs the closed LDR window
     POST_BATTLE     = 6.0     # wait after pressing B to flee
+    DARK_REGION     = px(200, 200, 240, 80)   # goes dark when a battle starts
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("Friend Safari started.")
         log(f"Walking {self.STEP_RANGE} tiles per direction. LDR must face bottom screen.")
 
         enc_count = 0
+        transition = TransitionDetector('dark', 60, 0.6, region=self.DARK_REGION)
+        fusion = self._fusion()
 
         while not stop_event.is_set():
             for direction, hold_cmd, release_cmd in [
@@ -48,14 +64,13 @@ class FriendSafari(BaseScript):
                         return
 
                     # Brief pause — check for battle (screen dark)
-                    frame = frame_grabber.get_latest_frame() if frame_grabber else None
-                    if frame is not None and self._screen_dark(frame):
+                    if frame_grabber is not None and transition.check(frame_grabber):
+                        # Handled from here on: the next encounter must go dark again.
+                        transition.reset()
                         enc_count += 1
                         log(f"Encounter {enc_count}: waiting for LDR window...")
-                        if not self.wait(self.ENCOUNTER_WAIT, stop_event):
-                            return
-
-                        shiny = self._check_ldr(controller, stop_event, log)
+                        shiny = self._check_shiny(fusion, controller, frame_grabber,
+                                                  stop_event, log)
                         if stop_event.is_set():
                             return
 
@@ -64,6 +79,12 @@ class FriendSafari(BaseScript):
                             stop_event.wait()
                             return
 
+                        if shiny is None:
+                            log(f"Encounter {enc_count}: undecided (LDR and sparkle "
+                                f"disagree) — paused, check the screen")
+                            stop_event.wait()
+                            return
+
                         log(f"Encounter {enc_count}: not shiny — fleeing")
                         # Flee
                         for _ in range(10):
@@ -74,19 +95,28 @@ class FriendSafari(BaseScript):
 
         log("Friend Safari stopped.")
 
-    def _screen_dark(self, frame) -> bool:
-        sample = frame[200:280, 200:440]
-        dark = (sample[:, :, 0] < 60) & (sample[:, :, 1] < 60) & (sample[:, :, 2] < 60)
-        return dark.mean() > 0.6
-
-    def _check_ldr(self, controller, stop_event, log) -> bool:
-        readings = []
-        for _ in range(self.LDR_SAMPLES):
-            if stop_event.is_set():
-                return False
-            readings.append(controller.read_light_value())
-            self.wait(0.1, stop_event)
-        half = self.LDR_SAMPLES // 2
-        step = abs(sum(readings[half:]) / half - sum(readings[:half]) / half)
-        log(f"LDR step: {step:.1f}")
-        return step > self.LDR_STEP_LIMIT
+    def _fusion(self) -> SensorFusion:
+        """
+        LDR from ENCOUNTER_WAIT on, sparkle from the start of the battle.
+        At SPARKLE_WEIGHT a full sparkle burst reaches `accept` even after
+        the LDR window closed without a step. The sparkle cannot argue "not
+        shiny", so the LDR window closing ends the wait unless the sparkle
+        is above SPARKLE_FLOOR: the sparkle keeps its highest score, and one
+        noisy frame must not hold every encounter to the timeout.
+        """
+        window = SparkleWindow(self.LDR_STEP_LIMIT, self.LDR_SAMPLES * self.LDR_INTERVAL,
+                               interval=self.LDR_INTERVAL)
+        ldr = LdrSensor(window, delay=self.ENCOUNTER_WAIT)
+        sparkle = SparkleSensor(SparkleDetector(self.SPARKLE_REGION),
+                                weight=self.SPARKLE_WEIGHT)
+        return SensorFusion(ldr, sparkle,
+                            reject=-ldr.weight + sparkle.weight * self.SPARKLE_FLOOR)
+
+    def _check_shiny(self, fusion, controller, frame_grabber, stop_event, log):
+        """True if shiny, False if not, None if undecided at the timeout (or stopped)."""
+        timeout = self.ENCOUNTER_WAIT + self.LDR_SAMPLES * self.LDR_INTERVAL
+        verdict = fusion.decide(controller, frame_grabber, stop_event, timeout + 1.0)
+        if verdict is None:
+            return None
+        log(f"LDR step: {fusion.ldr.window.last_step:.1f}  {verdict}")
+        return verdict.shiny
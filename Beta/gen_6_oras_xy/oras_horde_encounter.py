@@ -3,7 +3,8 @@ ORAS Horde Encounter — Shiny Hunter
 Game: Pokemon Omega Ruby / Alpha Sapphire (3DS)
 
 Uses Sweet Scent to trigger horde encounters for shiny hunting.
-Detection: avg_rgb comparison on a calibrated region.
+Detection: all five sprites of the horde at once, each against its own
+calibrated baseline colour (horde.py).
 
 Based on Horde_Encounters_3.0.cpp (same core logic as XY horde).
 
@@ -11,8 +12,10 @@ How it works:
   1. Opens the Pokemon menu and uses Sweet Scent
      (X → A → Right → A → Down → A → A).
   2. Waits for the screen blackout to detect the horde encounter.
-  3. After battle loads, compares avg_rgb on the calibrated region to the
-     baseline. A shiny has noticeably different colours.
+  3. As soon as the battle screen has settled (slot colours steady and
+     most slots on their baseline), compares every slot's colour to its
+     baseline. A shiny has noticeably different colours; the log names
+     the slot.
   4. If not shiny, flees with Up → A (Run).
 
 Setup:
@@ -21,15 +24,18 @@ Setup:
     Right once in the party list to reach it).
     Adjust SWEET_SCENT_SLOT if your Sweet Scent user is elsewhere.
   - On first run, trigger a horde manually, let it load, then draw a
-    region over one of the wild Pokemon sprites.
+    region over each of the five wild Pokemon sprites.
+  - A calibration from before (one sprite region) cannot tell the black
+    fade from a shiny; the script asks for the five regions again.
   - Delete calibration/oras_horde_encounter.json to recalibrate.
 """
 
 import json
 import os
 import sys
-import time
 from scripts.base_script import BaseScript
+from scripts.horde import HordeDetector, calibrate_horde_slots
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -55,10 +61,9 @@ class ORASHordeEncounter(BaseScript):
     NAV_R_DELAY         = 0.6    # after Right to reach Sweet Scent user
     # A presses to use Sweet Scent: select Pokemon, Use, select move, confirm
     SWEET_SCENT_DELAYS  = (0.6, 0.6, 0.6, 4.0)
-    BATTLE_WAIT         = 8.0    # after encounter detected, wait for battle
+    BATTLE_TIMEOUT      = 15.0   # max wait for the battle screen to settle
     FLEE_UP_DELAY       = 1.3    # after Up in battle to reach Run
     FLEE_A_DELAY        = 2.0    # after A to confirm Run
-    SHINY_RECHECK       = 3.0    # wait before re-checking a suspected shiny
 
     # ── Blackout detection ────────────────────────────────────────────────────
     DARK_THRESHOLD  = 40
@@ -71,10 +76,14 @@ class ORASHordeEncounter(BaseScript):
         log("ORAS Horde Encounter started.")
 
         cal = self._load_calibration()
+        if cal is not None and HordeDetector.from_calibration(cal) is None:
+            log("Calibration covers a single sprite — the five sprite regions "
+                "are needed now.")
+            cal = None
         if cal is None:
             log("No calibration — starting first-run setup.")
             log("Use Sweet Scent to trigger a horde, let it load, then draw "
-                "a region over one of the wild Pokemon sprites.")
+                "a region over each of the wild Pokemon sprites.")
             cal = self._calibrate(
                 controller, frame_grabber, stop_event, log, request_calibration
             )
@@ -85,11 +94,14 @@ class ORASHordeEncounter(BaseScript):
         else:
             log(f"Calibration loaded from {_cal_path()}")
 
-        x, y, w, h = cal['region']
-        br, bg, bb = cal['baseline']
-        tolerance  = cal.get('tolerance', self.COLOUR_TOLERANCE)
+        detector = HordeDetector.from_calibration(cal)
+        if detector is None:
+            log(f"Calibration has no sprite regions — delete {_cal_path()} "
+                "and recalibrate.")
+            return
 
-        log(f"Wild Pokemon region: x={x} y={y} w={w} h={h} | tolerance ±{tolerance}")
+        log(f"Checking {len(detector.slots)} sprite slot(s) | "
+            f"tolerance ±{detector.tolerance}")
         log("Horde encounter loop running. Press ■ Stop at any time.")
 
         encounter_count = 0
@@ -125,34 +137,21 @@ class ORASHordeEncounter(BaseScript):
             encounter_count += 1
             log(f"Horde #{encounter_count}: encounter detected")
 
-            if not self.wait(self.BATTLE_WAIT, stop_event): break
-
-            # ── Shiny check ───────────────────────────────────────────────────
-            frame = frame_grabber.get_latest_frame()
-            shiny_found = False
-
-            if frame is not None:
-                r, g, b = self.avg_rgb(frame, x, y, w, h)
-                if (abs(r - br) > tolerance or
-                        abs(g - bg) > tolerance or
-                        abs(b - bb) > tolerance):
-                    if not self.wait(self.SHINY_RECHECK, stop_event): break
-                    frame = frame_grabber.get_latest_frame()
-                    if frame is not None:
-                        r2, g2, b2 = self.avg_rgb(frame, x, y, w, h)
-                        if (abs(r2 - br) > tolerance or
-                                abs(g2 - bg) > tolerance or
-                                abs(b2 - bb) > tolerance):
-                            log(
-                                f"*** SHINY HORDE POKEMON! Encounter #{encounter_count} "
-                                f"R:{r2:.0f} G:{g2:.0f} B:{b2:.0f}  "
-                                f"(baseline R:{br:.0f} G:{bg:.0f} B:{bb:.0f}) ***"
-                            )
-                            shiny_found = True
-
+            # ── Shiny check on the first settled battle frame ─────────────────
+            shiny_slots = detector.wait_for_verdict(
+                frame_grabber, stop_event, self.BATTLE_TIMEOUT
+            )
             if stop_event.is_set(): break
-
-            if shiny_found:
+            if shiny_slots is None:
+                log("Battle screen did not settle — checking the latest frame.")
+                frame = frame_grabber.get_latest_frame()
+                shiny_slots = detector.deviating_slots(frame) if frame is not None else []
+
+            if shiny_slots:
+                log(
+                    f"*** SHINY HORDE POKEMON! Encounter #{encounter_count} "
+                    f"{detector.describe(shiny_slots)} ***"
+                )
                 log("Script paused — catch your shiny! Press ■ Stop when done.")
                 stop_event.wait()
                 break
@@ -167,38 +166,16 @@ class ORASHordeEncounter(BaseScript):
         log("ORAS Horde Encounter stopped.")
 
     def _wait_for_blackout(self, frame_grabber, stop_event, timeout: float) -> bool:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                sample = frame[50:430, 50:590]
-                dark = (
-                    (sample[:, :, 0] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 1] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 2] < self.DARK_THRESHOLD)
-                )
-                if dark.mean() > self.DARK_FRACTION:
-                    return True
-            time.sleep(0.03)
-        return False
+        return blackout(self.DARK_THRESHOLD, self.DARK_FRACTION).wait_for_start(
+            frame_grabber, stop_event, timeout)
 
     def _calibrate(self, controller, frame_grabber, stop_event,
                    log, request_calibration):
-        log("Draw a region over one of the wild Pokemon sprites in the horde.")
-        region = request_calibration("Draw region over a wild Pokemon sprite")
-        if stop_event.is_set():
-            return None
-        x, y, w, h = region
-        time.sleep(0.1)
-        frame = frame_grabber.get_latest_frame()
-        if frame is None:
-            log("No frame — ensure webcam is connected.")
+        cal = calibrate_horde_slots(frame_grabber, stop_event, log, request_calibration)
+        if stop_event.is_set() or not cal:
             return None
-        r, g, b = self.avg_rgb(frame, x, y, w, h)
-        log(f"Baseline — R:{r:.1f}  G:{g:.1f}  B:{b:.1f}")
-        return {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal['tolerance'] = self.COLOUR_TOLERANCE
+        return cal
 
     def _load_calibration(self):
         path = _cal_path()
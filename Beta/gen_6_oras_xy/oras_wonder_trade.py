@@ -12,24 +12,56 @@ How it works:
   1. Taps Wonder Trade on the bottom screen (W command).
   2. Presses A to proceed.
   3. Taps Wonder Trade again to open the Pokemon selection.
-  4. Navigates to the correct Pokemon in the box (row/column from count).
+  4. Finds the box cursor on screen and moves it to the next occupied
+     slot after the last one traded (box_cursor.py), checking every
+     press. Empty slots are skipped; at the end of a box it moves on to
+     the next one through the box header.
   5. Presses A × 3 to confirm trade and wait for partner.
-  6. Waits for the LDR step-change that indicates the trade completed.
+  6. Watches the screen (trade_watch.py): a partner is found when it
+     moves away from the searching screen, and the trade is done once
+     the animation has settled. A search that finds no partner within
+     SEARCH_TIMEOUT is backed out of with B and retried with the same
+     Pokemon. If the screen changed only briefly (a "no partner" message,
+     or a trade that was not seen through), the Pokemon may have been
+     traded: it is backed out of with B and the next slot is offered, so
+     a received Pokemon is never traded away.
   7. Repeats for TRADE_COUNT trades.
 
 Setup:
   - Set TRADE_COUNT to the number of trades you want to make (0 = unlimited).
   - Stand in front of a Wonder Trade terminal or have it accessible.
-  - Have the Pokemon you want to trade lined up in Box 1, Row 1.
+  - Have the Pokemon you want to trade in the boxes from the one the
+    selection opens on; empty slots and boxes are skipped.
+  - On the first trade, with the selection box open and the cursor on the
+    top-left slot, draw a region over the grid of slots, one over the
+    cursor highlight and one over the box name (a tiny box skips it). If
+    the cursor cannot be found from those, the script falls back to blind
+    navigation from the trade count. Delete
+    calibration/oras_wonder_trade.json to recalibrate.
 
 Note:
   The C++ version uses the LDR sensor to detect trade completion. This
-  Python port uses a fixed wait time (TRADE_WAIT) instead, which is
-  reliable for typical connection speeds.
+  Python port watches the capture instead, so each trade moves on as soon
+  as it has finished rather than after a fixed TRADE_WAIT.
 """
 
+import json
+import os
+import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.box_cursor import BoxGrid, BoxNavigator, calibrate_box_grid
+from scripts.trade_watch import FAILED, UNCLEAR, TradeWatcher
+
+
+def _cal_path() -> str:
+    if getattr(sys, 'frozen', False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cal_dir = os.path.join(base, 'calibration')
+    os.makedirs(cal_dir, exist_ok=True)
+    return os.path.join(cal_dir, 'oras_wonder_trade.json')
 
 
 class ORASWonderTrade(BaseScript):
@@ -39,15 +71,21 @@ class ORASWonderTrade(BaseScript):
     # ── Configuration ─────────────────────────────────────────────────────────
     # Number of trades to perform (0 = run until stopped)
     TRADE_COUNT = 0
+    # Boxes to look through for the next Pokemon before giving up
+    MAX_BOXES = 31
 
     # ── Timing (seconds) — from ORAS_Wonder_Trade_3.0.cpp ───────────────────
     WT_TAP_DELAY    = 2.0   # after W tap (Wonder Trade touch)
     WT_A_DELAY      = 4.0   # after A to proceed
     WT_TAP2_DELAY   = 3.0   # after second W tap (open Pokemon selection)
-    NAV_DELAY       = 1.5   # after each D-pad navigation press
+    NAV_DELAY       = 1.5   # after each D-pad press (blind navigation)
+    BOX_PRESS_DELAY = 0.3   # after each D-pad press (checked navigation)
     CONFIRM_A_DELAY = 1.5   # after each confirm A press
     PARTNER_WAIT    = 5.0   # wait for connection / searching
-    TRADE_WAIT      = 60.0  # max wait for trade to complete
+    SEARCH_TIMEOUT  = 90.0  # give up on a partner search after this
+    TRADE_WAIT      = 60.0  # max wait for the trade animation to settle
+    RETRY_B_PRESSES = 3     # B presses to back out of a failed trade
+    RETRY_B_DELAY   = 1.5   # between those B presses
     POST_TRADE_WAIT = 2.0   # after trade before next iteration
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
@@ -58,6 +96,16 @@ class ORASWonderTrade(BaseScript):
             log("Trading until stopped.")
 
         trade_num = 0
+        failures  = 0
+        unclear   = 0
+        started   = time.time()
+        watcher   = TradeWatcher()
+
+        cal = self._load_calibration()
+        navigator = self._navigator(cal, controller) if cal is not None else None
+        next_slot = 0
+        if navigator is not None:
+            log(f"Box calibration loaded from {_cal_path()}")
 
         while not stop_event.is_set():
             if self.TRADE_COUNT > 0 and trade_num >= self.TRADE_COUNT:
@@ -76,33 +124,45 @@ class ORASWonderTrade(BaseScript):
             controller.wonder_trade()
             if not self.wait(self.WT_TAP2_DELAY, stop_event): break
 
-            # ── Navigate to correct Pokemon in box ────────────────────────
-            # Every 30 trades: move to next row
-            # Every 6 slots: move right to next column; within a row, move right
-            # Positions cycle: 0-5 col 0-5, 6-11 col 0-5 row 2, etc.
-            if trade_num > 0:
-                if (trade_num % 30) == 0:
-                    # Move to top-right, then start row 1 of next page
-                    controller.press_up()
-                    if not self.wait(self.NAV_DELAY, stop_event): break
-                    controller.press_right()
-                    if not self.wait(self.NAV_DELAY, stop_event): break
-                    controller.press_down()
-                    if not self.wait(self.NAV_DELAY, stop_event): break
-
-                # Move down for each 6-slot row
-                for _ in range((trade_num % 30) // 6):
-                    if stop_event.is_set(): break
-                    controller.press_down()
-                    if not self.wait(self.NAV_DELAY, stop_event): break
+            # ── Put the cursor on the next Pokemon in the box ─────────────
+            if cal is None:
+                cal = self._calibrate(frame_grabber, stop_event, log, request_calibration)
                 if stop_event.is_set(): break
+                navigator = self._navigator(cal, controller)
 
-                # Move right for position within the row
-                for _ in range(trade_num % 6):
-                    if stop_event.is_set(): break
-                    controller.press_right()
-                    if not self.wait(self.NAV_DELAY, stop_event): break
+            if navigator is not None:
+                slot = navigator.next_occupied(frame_grabber, stop_event,
+                                               next_slot, self.MAX_BOXES)
                 if stop_event.is_set(): break
+                if slot is None:
+                    log("No Pokemon left to trade (or the box cursor was lost) — stopping.")
+                    break
+                log(f"Trading box slot {slot + 1}.")
+            else:
+                # Uncalibrated: walk the slots blind from the trade count.
+                # Every 30 trades: move to next box; within a box, move
+                # down a row per 6 slots and right within the row.
+                if trade_num > 0:
+                    if (trade_num % 30) == 0:
+                        # Move to top-right, then start row 1 of next page
+                        controller.press_up()
+                        if not self.wait(self.NAV_DELAY, stop_event): break
+                        controller.press_right()
+                        if not self.wait(self.NAV_DELAY, stop_event): break
+                        controller.press_down()
+                        if not self.wait(self.NAV_DELAY, stop_event): break
+
+                    for _ in range((trade_num % 30) // 6):
+                        if stop_event.is_set(): break
+                        controller.press_down()
+                        if not self.wait(self.NAV_DELAY, stop_event): break
+                    if stop_event.is_set(): break
+
+                    for _ in range(trade_num % 6):
+                        if stop_event.is_set(): break
+                        controller.press_right()
+                        if not self.wait(self.NAV_DELAY, stop_event): break
+                    if stop_event.is_set(): break
 
             # ── Confirm trade ─────────────────────────────────────────────
             for _ in range(3):
@@ -111,13 +171,76 @@ class ORASWonderTrade(BaseScript):
                 if not self.wait(self.CONFIRM_A_DELAY, stop_event): break
             if stop_event.is_set(): break
 
-            # ── Wait for trade to complete ────────────────────────────────
+            # ── Watch the trade from the searching screen ────────────────
             if not self.wait(self.PARTNER_WAIT, stop_event): break
-            if not self.wait(self.TRADE_WAIT - self.PARTNER_WAIT, stop_event): break
+            watcher.arm(frame_grabber)
+            outcome = watcher.wait(frame_grabber, stop_event,
+                                   self.SEARCH_TIMEOUT, self.TRADE_WAIT)
+            if outcome is None: break
+            if outcome == FAILED:
+                failures += 1
+                log(f"Trade #{trade_num + 1} found no partner — "
+                    f"retrying the same Pokemon.")
+                for _ in range(self.RETRY_B_PRESSES):
+                    if stop_event.is_set(): break
+                    controller.press_b()
+                    if not self.wait(self.RETRY_B_DELAY, stop_event): break
+                continue
 
             trade_num += 1
-            log(f"Trade #{trade_num} complete.")
+            if navigator is not None:
+                next_slot = slot + 1
+            if outcome == UNCLEAR:
+                # The slot may now hold a received Pokemon: never offer it again.
+                unclear += 1
+                log(f"Trade #{trade_num} unclear (the screen changed only briefly) — "
+                    f"backing out and moving on to the next slot.")
+                for _ in range(self.RETRY_B_PRESSES):
+                    if stop_event.is_set(): break
+                    controller.press_b()
+                    if not self.wait(self.RETRY_B_DELAY, stop_event): break
+                continue
+            hours = (time.time() - started) / 3600.0
+            log(f"Trade #{trade_num} complete: partner after "
+                f"{watcher.found_time - watcher.armed_time:.0f} s, done after "
+                f"{watcher.done_time - watcher.armed_time:.0f} s "
+                f"({trade_num / hours:.0f} trades/hour, {failures} retried, "
+                f"{unclear} unclear).")
 
             if not self.wait(self.POST_TRADE_WAIT, stop_event): break
 
         log(f"ORAS - Wonder Trade stopped. Total trades: {trade_num}")
+
+    # ── Box navigation ────────────────────────────────────────────────────────
+
+    def _navigator(self, cal, controller):
+        grid = BoxGrid.from_calibration(cal)
+        if grid is None:
+            return None
+        return BoxNavigator(grid, controller, self.wait, press_delay=self.BOX_PRESS_DELAY)
+
+    def _calibrate(self, frame_grabber, stop_event, log, request_calibration):
+        """First box opening: calibrate the grid, or record that it is skipped."""
+        log("Box calibration — the Pokemon selection box is open.")
+        cal = calibrate_box_grid(frame_grabber, stop_event, log, request_calibration)
+        if stop_event.is_set():
+            return {}
+        if not cal:
+            log("Falling back to blind box navigation. Delete "
+                f"{_cal_path()} to calibrate again.")
+        self._save_calibration(cal)
+        return cal
+
+    def _load_calibration(self):
+        path = _cal_path()
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _save_calibration(self, cal):
+        with open(_cal_path(), 'w') as f:
+            json.dump(cal, f, indent=2)
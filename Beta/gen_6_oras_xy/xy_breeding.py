@@ -3,20 +3,35 @@ XY - Egg Breeding
 Game: Pokemon X / Y (3DS)
 
 Automates egg collection from the Day Care couple on Route 7 and hatches
-eggs while checking each hatchling for shininess via avg_rgb on the Pokemon
-summary screen.
+eggs in batches of up to five, checking every hatchling for shininess via
+avg_rgb on the Pokemon summary screen.
 
 Ported from XY_Breeding_2.0.cpp.
 
 How it works:
-  1. Walks to the Day Care man and collects an egg (A × 4 through dialogue).
-  2. Rides the Bike left/right to hatch the egg, detecting the hatch
-     notification via white-pixel count in the lower screen area.
-  3. After hatching, opens the summary screen and checks avg_rgb.
-  4. If not shiny, continues the breeding loop.
+  Eggs are pipelined: up to EGGS_PER_BATCH (5) eggs are carried at once
+  and the party is modelled slot by slot (party.py), so one soft reset
+  and one summary pass serve the whole batch.
+
+  1. Collects an egg from the Day Care man (A × 5 through dialogue) and
+     mounts the Bike.
+  2. Bikes COLLECT_LAP_PASSES left/right passes and collects the next
+     egg, until 5 eggs are carried. Eggs that hatch meanwhile (hatch
+     notification via white-pixel count in the lower screen area) are
+     seen through and marked in the party model.
+  3. Bikes until every carried egg has hatched. An egg that has not
+     hatched after EGG_HATCH_PASSES was never handed over and is dropped.
+  4. Opens the summary once and steps through every hatchling with
+     Down, sampling avg_rgb; a hatchling that differs from the baseline
+     and from the rest of the batch is rechecked on screen.
+  5. If none is shiny, soft-resets to empty the party and repeats.
+
+  Set EGGS_PER_BATCH = 1 for the old one-egg-per-reset cycle.
+  `python -m scripts.breeding_sim` compares the two in eggs per hour.
 
 Setup:
-  - Save on Route 7 standing in front of the Day Care man.
+  - Save on Route 7 standing in front of the Day Care man, with an
+    egg waiting and party slots 2-6 empty.
   - Ensure the Bike is registered to Y button.
   - On first run, hatch an egg and open the hatchling's summary screen,
     then draw a region over its sprite.
@@ -28,6 +43,7 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.party import PartyState
 
 
 def _cal_path() -> str:
@@ -55,6 +71,15 @@ class XYBreeding(BaseScript):
     HATCH_A_DELAY       = 1.5
     CHECK_DELAY         = 1.3   # delay between summary navigation presses
     SHINY_RECHECK_WAIT  = 3.0
+    SUMMARY_NEXT_DELAY  = 1.0   # Down/Up to the next party member's summary
+    SOFT_RESET_WAIT     = 13.0  # 3DS reload after a checked batch
+    MENU_A_1_DELAY      = 4.0   # title
+    MENU_A_2_DELAY      = 6.0   # continue + world load
+
+    # ── Pipelining ────────────────────────────────────────────────────────────
+    EGGS_PER_BATCH      = 5     # eggs carried at once (party slots 2-6); 1 = one per reset
+    COLLECT_LAP_PASSES  = 8     # left/right passes between Day Care visits
+    EGG_HATCH_PASSES    = 60    # passes after which an unhatched egg was never collected
 
     # ── Hatch detection ───────────────────────────────────────────────────────
     WHITE_PIXEL_COUNT   = 200   # minimum white pixels to flag hatch text
@@ -84,120 +109,198 @@ class XYBreeding(BaseScript):
         tolerance  = cal.get('tolerance', self.COLOUR_TOLERANCE)
 
         log(f"Hatchling region: x={x} y={y} w={w} h={h} | tolerance ±{tolerance}")
-        log("Breeding loop running. Press Stop at any time.")
+        log(f"Breeding loop running, {self.EGGS_PER_BATCH} egg(s) per batch. "
+            "Press Stop at any time.")
 
+        party = PartyState()
         hatch_count = 0
+        batch_count = 0
+        self._passes = 0
 
         while not stop_event.is_set():
-
-            # ── Collect egg ───────────────────────────────────────────────
-            log(f"Egg #{hatch_count + 1}: collecting egg from Day Care man...")
-            for _ in range(self.EGG_COLLECT_A_COUNT):
+            batch_count += 1
+
+            # ── Collect eggs, biking a lap between visits ─────────────────
+            for n in range(self.EGGS_PER_BATCH):
+                if n:
+                    hatched = self._bike(controller, frame_grabber, stop_event, log,
+                                         party, self.COLLECT_LAP_PASSES)
+                    if hatched is None: break
+                    hatch_count += hatched
+                    if party.free == 0: break
+                log(f"Batch #{batch_count}: collecting egg from Day Care man...")
+                for _ in range(self.EGG_COLLECT_A_COUNT):
+                    if stop_event.is_set(): break
+                    controller.press_a()
+                    if not self.wait(self.EGG_COLLECT_A_DELAY, stop_event): break
                 if stop_event.is_set(): break
-                controller.press_a()
-                if not self.wait(self.EGG_COLLECT_A_DELAY, stop_event): break
-            if stop_event.is_set(): break
-
-            # ── Mount bike ────────────────────────────────────────────────
-            controller.press_y()
-            if not self.wait(self.BIKE_Y_DELAY, stop_event): break
+                party.add_egg(since=self._passes)
 
-            # ── Bike left/right to hatch ──────────────────────────────────
-            log(f"Egg #{hatch_count + 1}: biking to hatch egg...")
-            hatched = False
+                if n == 0:
+                    # ── Mount bike ────────────────────────────────────────
+                    controller.press_y()
+                    if not self.wait(self.BIKE_Y_DELAY, stop_event): break
+            if stop_event.is_set(): break
 
+            # ── Bike until every egg in the party has hatched ─────────────
+            log(f"Batch #{batch_count}: biking to hatch {party.eggs} egg(s)...")
             for _ in range(self.MAX_WALK_PASSES):
+                if party.eggs == 0 or stop_event.is_set(): break
+                hatched = self._bike(controller, frame_grabber, stop_event, log, party, 1)
+                if hatched is None: break
+                hatch_count += hatched
+            if stop_event.is_set(): break
+
+            if party.hatched == 0:
+                log(f"Batch #{batch_count}: nothing hatched — resetting.")
+            else:
+                # ── Check every hatchling in one summary pass ─────────────
+                shiny = self._check_hatchlings(
+                    controller, frame_grabber, stop_event, party,
+                    (x, y, w, h), (br, bg, bb), tolerance)
                 if stop_event.is_set(): break
 
-                controller.hold_left()
-                if not self.wait(self.WALK_DURATION, stop_event):
-                    controller.release_all()
-                    break
-                controller.hold_right()
-                if not self.wait(self.WALK_DURATION, stop_event):
-                    controller.release_all()
+                if shiny is not None:
+                    slot, (r2, g2, b2) = shiny
+                    log(
+                        f"*** SHINY HATCHLING! Party slot {slot + 1}, "
+                        f"batch #{batch_count} ({hatch_count} eggs hatched) "
+                        f"R:{r2:.0f} G:{g2:.0f} B:{b2:.0f}  "
+                        f"(baseline R:{br:.0f} G:{bg:.0f} B:{bb:.0f}) ***"
+                    )
+                    log("Script paused — enjoy your shiny! Press Stop when done.")
+                    stop_event.wait()
                     break
 
-                frame = frame_grabber.get_latest_frame()
-                if frame is not None:
-                    n_white = self.count_matching_pixels(
-                        frame, 50, 50, 540, 50,
-                        255, 255, 255, 40
-                    )
-                    if n_white > self.WHITE_PIXEL_COUNT:
-                        controller.release_all()
-                        hatched = True
-                        break
+                log(f"Batch #{batch_count}: {party.hatched} hatchling(s), none shiny "
+                    f"({hatch_count} eggs hatched).")
 
-            controller.release_all()
-            if stop_event.is_set(): break
+            # ── Soft reset to empty the party again ───────────────────────
+            if not self._soft_reset(controller, stop_event): break
+            party.clear()
+
+        log("XY - Egg Breeding stopped.")
 
-            if not hatched:
-                log(f"Egg #{hatch_count + 1}: egg did not hatch — retrying.")
+    def _bike(self, controller, frame_grabber, stop_event, log, party, passes: int):
+        """
+        Bike `passes` left/right passes, seeing each hatch through. Returns
+        the number of eggs that hatched, or None if stopped.
+        """
+        hatched = 0
+        for _ in range(passes):
+            if stop_event.is_set(): return None
+
+            controller.hold_left()
+            if not self.wait(self.WALK_DURATION, stop_event):
+                controller.release_all()
+                return None
+            controller.hold_right()
+            if not self.wait(self.WALK_DURATION, stop_event):
+                controller.release_all()
+                return None
+            self._passes += 1
+
+            # Check for hatch notification (white text pixels)
+            frame = frame_grabber.get_latest_frame()
+            if frame is None:
+                continue
+            n_white = self.count_target_pixels(
+                frame, 50, 50, 540, 50,
+                255, 255, 255, 40
+            )
+            if n_white <= self.WHITE_PIXEL_COUNT:
                 continue
+            controller.release_all()
 
             # ── Hatch dialogue ────────────────────────────────────────────
-            if not self.wait(self.HATCH_TEXT_WAIT, stop_event): break
+            if not self.wait(self.HATCH_TEXT_WAIT, stop_event): return None
             for _ in range(self.HATCH_A_COUNT):
-                if stop_event.is_set(): break
+                if stop_event.is_set(): return None
                 controller.press_a()
-                if not self.wait(self.HATCH_A_DELAY, stop_event): break
-            if stop_event.is_set(): break
-
-            hatch_count += 1
+                if not self.wait(self.HATCH_A_DELAY, stop_event): return None
+            slot = party.hatch()
+            hatched += 1
+            log(f"Egg hatched (party slot {slot + 1 if slot is not None else '?'}) {party}")
+
+        controller.release_all()
+        dropped = party.expire(self._passes, self.EGG_HATCH_PASSES)
+        if dropped:
+            log(f"{dropped} egg(s) never hatched — the Day Care had none to give.")
+        return hatched
+
+    def _check_hatchlings(self, controller, frame_grabber, stop_event, party,
+                          region, baseline, tolerance):
+        """
+        Step through the party summaries once, sampling every hatchling, then
+        judge them together: a hatchling is shiny if it differs from the
+        baseline and, with three or more in the batch, from the batch median
+        too (same species, so a lighting drift moves them all). Returns
+        (slot, (r, g, b)) of a confirmed shiny, left on screen, or None.
+        """
+        x, y, w, h = region
 
-            # ── Open summary ──────────────────────────────────────────────
-            controller.press_x()
-            if not self.wait(self.CHECK_DELAY, stop_event): break
-            controller.press_down()
-            if not self.wait(self.CHECK_DELAY, stop_event): break
+        # ── Open summary of party slot 2 ──────────────────────────────────
+        controller.press_x()
+        if not self.wait(self.CHECK_DELAY, stop_event): return None
+        controller.press_down()
+        if not self.wait(self.CHECK_DELAY, stop_event): return None
+        controller.press_a()
+        if not self.wait(self.CHECK_DELAY, stop_event): return None
+        controller.press_right()
+        if not self.wait(self.CHECK_DELAY, stop_event): return None
+        for _ in range(2):
+            if stop_event.is_set(): return None
             controller.press_a()
-            if not self.wait(self.CHECK_DELAY, stop_event): break
-            controller.press_right()
-            if not self.wait(self.CHECK_DELAY, stop_event): break
-            for _ in range(2):
-                if stop_event.is_set(): break
-                controller.press_a()
-                if not self.wait(self.CHECK_DELAY, stop_event): break
-            if stop_event.is_set(): break
-
-            # ── Shiny check ───────────────────────────────────────────────
+            if not self.wait(self.CHECK_DELAY, stop_event): return None
+
+        samples = {}
+        slots = party.hatched_slots()
+        current = party.reserved
+        for slot in slots:
+            while current < slot:
+                controller.press_down()
+                if not self.wait(self.SUMMARY_NEXT_DELAY, stop_event): return None
+                current += 1
             frame = frame_grabber.get_latest_frame()
-            shiny_found = False
-
             if frame is not None:
-                r, g, b = self.avg_rgb(frame, x, y, w, h)
-                if (abs(r - br) > tolerance or
-                        abs(g - bg) > tolerance or
-                        abs(b - bb) > tolerance):
-                    if not self.wait(self.SHINY_RECHECK_WAIT, stop_event): break
-                    frame = frame_grabber.get_latest_frame()
-                    if frame is not None:
-                        r2, g2, b2 = self.avg_rgb(frame, x, y, w, h)
-                        if (abs(r2 - br) > tolerance or
-                                abs(g2 - bg) > tolerance or
-                                abs(b2 - bb) > tolerance):
-                            log(
-                                f"*** SHINY HATCHLING! Egg #{hatch_count} "
-                                f"R:{r2:.0f} G:{g2:.0f} B:{b2:.0f}  "
-                                f"(baseline R:{br:.0f} G:{bg:.0f} B:{bb:.0f}) ***"
-                            )
-                            shiny_found = True
-
-            if stop_event.is_set(): break
-
-            if shiny_found:
-                log("Script paused — enjoy your shiny! Press Stop when done.")
-                stop_event.wait()
-                break
-
-            log(f"Egg #{hatch_count}: not shiny — continuing.")
-            for _ in range(3):
-                if stop_event.is_set(): break
-                controller.press_b()
-                if not self.wait(0.8, stop_event): break
-
-        log("XY - Egg Breeding stopped.")
+                samples[slot] = self.avg_rgb(frame, x, y, w, h)
+
+        middle = None
+        if len(samples) >= 3:
+            middle = tuple(sorted(c[i] for c in samples.values())[len(samples) // 2]
+                           for i in range(3))
+        candidates = [slot for slot, rgb in samples.items()
+                      if _differs(rgb, baseline, tolerance)
+                      and (middle is None or _differs(rgb, middle, tolerance))]
+
+        # ── Recheck candidates on screen ──────────────────────────────────
+        # The sampling pass left the summary on the last hatchling; walk the
+        # candidates back from there, moving whichever way reaches the slot.
+        for slot in reversed(candidates):
+            while current != slot:
+                if current > slot:
+                    controller.press_up()
+                    current -= 1
+                else:
+                    controller.press_down()
+                    current += 1
+                if not self.wait(self.SUMMARY_NEXT_DELAY, stop_event): return None
+            if not self.wait(self.SHINY_RECHECK_WAIT, stop_event): return None
+            frame = frame_grabber.get_latest_frame()
+            if frame is None:
+                continue
+            rgb = self.avg_rgb(frame, x, y, w, h)
+            if _differs(rgb, baseline, tolerance):
+                return slot, rgb
+        return None
+
+    def _soft_reset(self, controller, stop_event) -> bool:
+        controller.soft_reset()
+        if not self.wait(self.SOFT_RESET_WAIT, stop_event): return False
+        controller.press_a()
+        if not self.wait(self.MENU_A_1_DELAY, stop_event): return False
+        controller.press_a()
+        return self.wait(self.MENU_A_2_DELAY, stop_event)
 
     def _calibrate(self, controller, frame_grabber, stop_event,
                    log, request_calibration):
@@ -228,3 +331,7 @@ class XYBreeding(BaseScript):
     def _save_calibration(self, cal):
         with open(_cal_path(), 'w') as f:
             json.dump(cal, f, indent=2)
+
+
+def _differs(rgb, reference, tolerance) -> bool:
+    return any(abs(a - b) > tolerance for a, b in zip(rgb, reference))
@@ -15,8 +15,11 @@ How it works:
   duration to a shiny baseline (shinies take longer due to the
   sparkle animation).
 
-  The Python port replaces LDR timing with avg_rgb comparison on a
-  calibrated region of the Crabrawler battle sprite.
+  The Python port times the same thing from the capture: blackout to
+  the battle text box, using frame timestamps (encounter_timing.py).
+  After a few encounters to learn the usual delay it decides as soon
+  as the text appears; until then, or without a calibrated text box,
+  it falls back to avg_rgb on the Crabrawler battle sprite.
 
   1. A 3.5 s → A 6 s → A 2.5 s → A 8 s (title/continue/walk to pile).
   2. Loop:
@@ -27,7 +30,7 @@ How it works:
 Setup:
   - Save directly in front of a berry pile that contains Crabrawler.
   - On first run let a Crabrawler encounter load, then draw a region
-    over its battle sprite.
+    over its battle sprite and one over the battle text box.
   - Delete calibration/shiny_crabrawler.json to recalibrate.
 """
 
@@ -36,6 +39,8 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.encounter_timing import EncounterTimer, calibrate_text_region
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -71,6 +76,9 @@ class ShinyCrabrawler(BaseScript):
 
     COLOUR_TOLERANCE = 15
 
+    # ── Encounter timing ──────────────────────────────────────────────────────
+    SHINY_DELAY_MARGIN = 0.8    # s over the usual blackout-to-text delay
+
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("Sun / Moon - Shiny Crabrawler started.")
 
@@ -94,6 +102,10 @@ class ShinyCrabrawler(BaseScript):
         tolerance  = cal.get('tolerance', self.COLOUR_TOLERANCE)
 
         log(f"Crabrawler region: x={x} y={y} w={w} h={h} | tolerance ±{tolerance}")
+        timer = EncounterTimer.from_calibration(cal, margin=self.SHINY_DELAY_MARGIN)
+        if timer is None:
+            log(f"No text box calibrated — sprite check only. Delete {_cal_path()} "
+                "to add one and enable encounter timing.")
         log("Encounter loop running. Press Stop at any time.")
 
         encounter_count = 0
@@ -117,11 +129,19 @@ class ShinyCrabrawler(BaseScript):
             encounter_count += 1
             log(f"Encounter #{encounter_count}: Crabrawler appeared")
 
-            if not self.wait(self.BATTLE_WAIT, stop_event): break
+            # ── Encounter timing ──────────────────────────────────────────
+            verdict = None
+            if timer is not None:
+                verdict = timer.check(frame_grabber, stop_event,
+                                      self._blackout.start_time, self.BATTLE_WAIT, log)
+            if stop_event.is_set(): break
+            if verdict is None:
+                left = self._blackout.start_time + self.BATTLE_WAIT - time.time()
+                if not self.wait(left, stop_event): break
 
-            # ── Shiny check ───────────────────────────────────────────────
-            frame = frame_grabber.get_latest_frame()
-            shiny_found = False
+            # ── Shiny check (sprite colour, unless timing decided) ────────
+            frame = frame_grabber.get_latest_frame() if verdict is None else None
+            shiny_found = bool(verdict)
 
             if frame is not None:
                 r, g, b = self.avg_rgb(frame, x, y, w, h)
@@ -159,22 +179,8 @@ class ShinyCrabrawler(BaseScript):
         log("Sun / Moon - Shiny Crabrawler stopped.")
 
     def _wait_for_blackout(self, frame_grabber, stop_event, timeout: float) -> bool:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                sample = frame[50:430, 50:590]
-                dark = (
-                    (sample[:, :, 0] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 1] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 2] < self.DARK_THRESHOLD)
-                )
-                if dark.mean() > self.DARK_FRACTION:
-                    return True
-            time.sleep(0.03)
-        return False
+        self._blackout = blackout(self.DARK_THRESHOLD, self.DARK_FRACTION)
+        return self._blackout.wait_for_start(frame_grabber, stop_event, timeout)
 
     def _calibrate(self, controller, frame_grabber, stop_event,
                    log, request_calibration):
@@ -190,7 +196,9 @@ class ShinyCrabrawler(BaseScript):
             return None
         r, g, b = self.avg_rgb(frame, x, y, w, h)
         log(f"Baseline — R:{r:.1f}  G:{g:.1f}  B:{b:.1f}")
-        return {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal = {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal.update(calibrate_text_region(frame_grabber, stop_event, log, request_calibration))
+        return cal
 
     def _load_calibration(self):
         path = _cal_path()
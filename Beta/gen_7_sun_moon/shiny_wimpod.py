@@ -12,8 +12,10 @@ Ported from Shiny_Wimpod_Static_3.0.cpp.
 
 How it works:
   The C++ program uses LDR timing with the same step-change
-  detection pattern used for Crabrawler. The Python port uses
-  avg_rgb comparison on a calibrated battle-sprite region.
+  detection pattern used for Crabrawler. The Python port times the
+  blackout-to-text-box delay from capture frame timestamps and resets
+  as soon as it is judged normal; avg_rgb on a calibrated battle-sprite
+  region covers the first encounters and a missing text box.
 
   1. Soft-resets (S command) and waits 12 s.
   2. A 3.5 s → A 10 s (title / continue).
@@ -26,7 +28,7 @@ How it works:
 Setup:
   - Save directly in front of Wimpod on Route 8 (or Poni Wilds).
   - On first run let the Wimpod battle load, then draw a region over
-    its sprite.
+    its sprite, then one over the battle text box.
   - Delete calibration/shiny_wimpod.json to recalibrate.
 """
 
@@ -35,6 +37,8 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.encounter_timing import EncounterTimer, calibrate_text_region
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -66,6 +70,9 @@ class ShinyWimpod(BaseScript):
 
     COLOUR_TOLERANCE = 15
 
+    # ── Encounter timing ──────────────────────────────────────────────────────
+    SHINY_DELAY_MARGIN = 0.8    # s over the usual blackout-to-text delay
+
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("Sun / Moon - Shiny Wimpod started.")
 
@@ -88,6 +95,10 @@ class ShinyWimpod(BaseScript):
         tolerance  = cal.get('tolerance', self.COLOUR_TOLERANCE)
 
         log(f"Wimpod region: x={x} y={y} w={w} h={h} | tolerance ±{tolerance}")
+        timer = EncounterTimer.from_calibration(cal, margin=self.SHINY_DELAY_MARGIN)
+        if timer is None:
+            log(f"No text box calibrated — sprite check only. Delete {_cal_path()} "
+                "to add one and enable encounter timing.")
         log("Soft reset loop running. Press Stop at any time.")
 
         sr_count = 0
@@ -123,11 +134,19 @@ class ShinyWimpod(BaseScript):
                 if not self.wait(self.SOFT_RESET_WAIT, stop_event): break
                 continue
 
-            if not self.wait(self.BATTLE_WAIT, stop_event): break
+            # ── Encounter timing ──────────────────────────────────────────
+            verdict = None
+            if timer is not None:
+                verdict = timer.check(frame_grabber, stop_event,
+                                      self._blackout.start_time, self.BATTLE_WAIT, log)
+            if stop_event.is_set(): break
+            if verdict is None:
+                left = self._blackout.start_time + self.BATTLE_WAIT - time.time()
+                if not self.wait(left, stop_event): break
 
-            # ── Shiny check ───────────────────────────────────────────────
-            frame = frame_grabber.get_latest_frame()
-            shiny_found = False
+            # ── Shiny check (sprite colour, unless timing decided) ────────
+            frame = frame_grabber.get_latest_frame() if verdict is None else None
+            shiny_found = bool(verdict)
 
             if frame is not None:
                 r, g, b = self.avg_rgb(frame, x, y, w, h)
@@ -163,22 +182,8 @@ class ShinyWimpod(BaseScript):
         log("Sun / Moon - Shiny Wimpod stopped.")
 
     def _wait_for_blackout(self, frame_grabber, stop_event, timeout: float) -> bool:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                sample = frame[50:430, 50:590]
-                dark = (
-                    (sample[:, :, 0] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 1] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 2] < self.DARK_THRESHOLD)
-                )
-                if dark.mean() > self.DARK_FRACTION:
-                    return True
-            time.sleep(0.03)
-        return False
+        self._blackout = blackout(self.DARK_THRESHOLD, self.DARK_FRACTION)
+        return self._blackout.wait_for_start(frame_grabber, stop_event, timeout)
 
     def _calibrate(self, controller, frame_grabber, stop_event,
                    log, request_calibration):
@@ -194,7 +199,9 @@ class ShinyWimpod(BaseScript):
             return None
         r, g, b = self.avg_rgb(frame, x, y, w, h)
         log(f"Baseline — R:{r:.1f}  G:{g:.1f}  B:{b:.1f}")
-        return {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal = {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal.update(calibrate_text_region(frame_grabber, stop_event, log, request_calibration))
+        return cal
 
     def _load_calibration(self):
         path = _cal_path()
@@ -11,8 +11,10 @@ Ported from SuMo_Honey_Encounter_2.0.cpp.
 How it works:
   The C++ version uses LDR timing to detect the battle blackout and
   measures the encounter animation duration (shinies take longer).
-  The Python port replaces LDR timing with avg_rgb comparison on a
-  calibrated wild-Pokemon sprite region.
+  The Python port measures blackout-to-text-box time from capture
+  frame timestamps (encounter_timing.py) and flees as soon as the text
+  appears on a normal encounter. avg_rgb on a calibrated wild-Pokemon
+  sprite region is the fallback while the usual delay is learned.
 
   Every 50 encounters the script soft-resets to restore items/PP.
 
@@ -28,7 +30,7 @@ Setup:
   - Save in a location where Honey triggers wild encounters.
   - Have Honey (or Sweet Scent user) accessible in the bag.
   - On first run let a wild Pokemon encounter load, then draw a
-    region over its sprite.
+    region over its sprite, then one over the battle text box.
   - Delete calibration/sumo_honey_encounter.json to recalibrate.
 """
 
@@ -37,6 +39,8 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.encounter_timing import EncounterTimer, calibrate_text_region
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -76,6 +80,9 @@ class SUMOHoneyEncounter(BaseScript):
 
     COLOUR_TOLERANCE  = 15
 
+    # ── Encounter timing ──────────────────────────────────────────────────────
+    SHINY_DELAY_MARGIN = 0.8    # s over the usual blackout-to-text delay
+
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("Sun / Moon - Honey Encounter started.")
 
@@ -99,6 +106,10 @@ class SUMOHoneyEncounter(BaseScript):
         tolerance  = cal.get('tolerance', self.COLOUR_TOLERANCE)
 
         log(f"Wild Pokemon region: x={x} y={y} w={w} h={h} | tolerance ±{tolerance}")
+        timer = EncounterTimer.from_calibration(cal, margin=self.SHINY_DELAY_MARGIN)
+        if timer is None:
+            log(f"No text box calibrated — sprite check only. Delete {_cal_path()} "
+                "to add one and enable encounter timing.")
         log("Encounter loop running. Press Stop at any time.")
 
         encounter_count = 0
@@ -140,11 +151,19 @@ class SUMOHoneyEncounter(BaseScript):
             encounter_count += 1
             log(f"Encounter #{encounter_count}")
 
-            if not self.wait(self.BATTLE_WAIT, stop_event): break
+            # ── Encounter timing ──────────────────────────────────────────
+            verdict = None
+            if timer is not None:
+                verdict = timer.check(frame_grabber, stop_event,
+                                      self._blackout.start_time, self.BATTLE_WAIT, log)
+            if stop_event.is_set(): break
+            if verdict is None:
+                left = self._blackout.start_time + self.BATTLE_WAIT - time.time()
+                if not self.wait(left, stop_event): break
 
-            # ── Shiny check ───────────────────────────────────────────────
-            frame = frame_grabber.get_latest_frame()
-            shiny_found = False
+            # ── Shiny check (sprite colour, unless timing decided) ────────
+            frame = frame_grabber.get_latest_frame() if verdict is None else None
+            shiny_found = bool(verdict)
 
             if frame is not None:
                 r, g, b = self.avg_rgb(frame, x, y, w, h)
@@ -191,22 +210,8 @@ class SUMOHoneyEncounter(BaseScript):
         log("Sun / Moon - Honey Encounter stopped.")
 
     def _wait_for_blackout(self, frame_grabber, stop_event, timeout: float) -> bool:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                sample = frame[50:430, 50:590]
-                dark = (
-                    (sample[:, :, 0] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 1] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 2] < self.DARK_THRESHOLD)
-                )
-                if dark.mean() > self.DARK_FRACTION:
-                    return True
-            time.sleep(0.03)
-        return False
+        self._blackout = blackout(self.DARK_THRESHOLD, self.DARK_FRACTION)
+        return self._blackout.wait_for_start(frame_grabber, stop_event, timeout)
 
     def _calibrate(self, controller, frame_grabber, stop_event,
                    log, request_calibration):
@@ -222,7 +227,9 @@ class SUMOHoneyEncounter(BaseScript):
             return None
         r, g, b = self.avg_rgb(frame, x, y, w, h)
         log(f"Baseline — R:{r:.1f}  G:{g:.1f}  B:{b:.1f}")
-        return {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal = {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal.update(calibrate_text_region(frame_grabber, stop_event, log, request_calibration))
+        return cal
 
     def _load_calibration(self):
         path = _cal_path()
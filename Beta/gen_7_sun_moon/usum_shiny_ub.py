@@ -10,8 +10,9 @@ Ported from USUM_Shiny_Static_UB_3.0.cpp.
 How it works:
   The original C++ version uses LDR timing to measure the encounter
   animation duration and detects a shiny when it runs long. The
-  Python port uses avg_rgb comparison on a calibrated battle-sprite
-  region instead.
+  Python port measures the same delay (blackout to battle text box)
+  from capture frame timestamps, and falls back to avg_rgb on a
+  calibrated battle-sprite region while it learns the usual delay.
 
   1. Soft-resets (S command) and waits SOFT_RESET_WAIT s.
   2. A MENU_A_1_DELAY → A MENU_A_2_DELAY (title + continue).
@@ -22,7 +23,7 @@ How it works:
 Setup:
   - Save in front of the Ultra Beast spot / wormhole entrance.
   - On first run let the battle load and draw a region over the
-    Ultra Beast's sprite.
+    Ultra Beast's sprite, then one over the battle text box.
   - Delete calibration/usum_shiny_ub.json to recalibrate.
 """
 
@@ -31,6 +32,8 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.encounter_timing import EncounterTimer, calibrate_text_region
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -62,6 +65,9 @@ class USUMShinyUB(BaseScript):
 
     COLOUR_TOLERANCE = 15
 
+    # ── Encounter timing ──────────────────────────────────────────────────────
+    SHINY_DELAY_MARGIN = 0.8    # s over the usual blackout-to-text delay
+
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("USUM - Shiny Ultra Beast started.")
 
@@ -84,6 +90,10 @@ class USUMShinyUB(BaseScript):
         tolerance  = cal.get('tolerance', self.COLOUR_TOLERANCE)
 
         log(f"Ultra Beast region: x={x} y={y} w={w} h={h} | tolerance ±{tolerance}")
+        timer = EncounterTimer.from_calibration(cal, margin=self.SHINY_DELAY_MARGIN)
+        if timer is None:
+            log(f"No text box calibrated — sprite check only. Delete {_cal_path()} "
+                "to add one and enable encounter timing.")
         log("Soft reset loop running. Press Stop at any time.")
 
         sr_count = 0
@@ -119,11 +129,19 @@ class USUMShinyUB(BaseScript):
                 if not self.wait(self.SOFT_RESET_WAIT, stop_event): break
                 continue
 
-            if not self.wait(self.BATTLE_LOAD_WAIT, stop_event): break
+            # ── Encounter timing ──────────────────────────────────────────
+            verdict = None
+            if timer is not None:
+                verdict = timer.check(frame_grabber, stop_event,
+                                      self._blackout.start_time, self.BATTLE_LOAD_WAIT, log)
+            if stop_event.is_set(): break
+            if verdict is None:
+                left = self._blackout.start_time + self.BATTLE_LOAD_WAIT - time.time()
+                if not self.wait(left, stop_event): break
 
-            # ── Shiny check ───────────────────────────────────────────────
-            frame = frame_grabber.get_latest_frame()
-            shiny_found = False
+            # ── Shiny check (sprite colour, unless timing decided) ────────
+            frame = frame_grabber.get_latest_frame() if verdict is None else None
+            shiny_found = bool(verdict)
 
             if frame is not None:
                 r, g, b = self.avg_rgb(frame, x, y, w, h)
@@ -160,22 +178,8 @@ class USUMShinyUB(BaseScript):
         log("USUM - Shiny Ultra Beast stopped.")
 
     def _wait_for_blackout(self, frame_grabber, stop_event, timeout: float) -> bool:
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                sample = frame[50:430, 50:590]
-                dark = (
-                    (sample[:, :, 0] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 1] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 2] < self.DARK_THRESHOLD)
-                )
-                if dark.mean() > self.DARK_FRACTION:
-                    return True
-            time.sleep(0.03)
-        return False
+        self._blackout = blackout(self.DARK_THRESHOLD, self.DARK_FRACTION)
+        return self._blackout.wait_for_start(frame_grabber, stop_event, timeout)
 
     def _calibrate(self, controller, frame_grabber, stop_event,
                    log, request_calibration):
@@ -191,7 +195,9 @@ class USUMShinyUB(BaseScript):
             return None
         r, g, b = self.avg_rgb(frame, x, y, w, h)
         log(f"Baseline — R:{r:.1f}  G:{g:.1f}  B:{b:.1f}")
-        return {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal = {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal.update(calibrate_text_region(frame_grabber, stop_event, log, request_calibration))
+        return cal
 
     def _load_calibration(self):
         path = _cal_path()
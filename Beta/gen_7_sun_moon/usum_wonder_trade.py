@@ -13,7 +13,11 @@ How it works:
   2. Presses A to proceed through menus.
   3. A × 2 to select Pokemon and confirm.
   4. A to say Yes.
-  5. Waits a fixed time for the trade to complete.
+  5. Watches the screen until the trade animation has played out
+     (trade_watch.py) and moves straight on. A search that finds no
+     partner within SEARCH_TIMEOUT is backed out of with B and retried.
+     A screen that changed only briefly may still have been a trade: it
+     is backed out of with B and counted as one, not retried.
   6. Repeats for TRADE_COUNT trades (0 = unlimited).
 
 Setup:
@@ -24,6 +28,7 @@ Setup:
 
 import time
 from scripts.base_script import BaseScript
+from scripts.trade_watch import FAILED, UNCLEAR, TradeWatcher
 
 
 class USUMWonderTrade(BaseScript):
@@ -41,7 +46,10 @@ class USUMWonderTrade(BaseScript):
     WT_A_2_DELAY    = 1.5   # after A to select Pokemon
     WT_A_3_DELAY    = 1.5   # after A to select trade
     WT_YES_DELAY    = 5.0   # after A to say Yes (searching for partner)
-    TRADE_WAIT      = 60.0  # max wait for trade to complete
+    SEARCH_TIMEOUT  = 90.0  # give up on a partner search after this
+    TRADE_WAIT      = 60.0  # max wait for the trade animation to settle
+    RETRY_B_PRESSES = 3     # B presses to back out of a failed trade
+    RETRY_B_DELAY   = 1.5   # between those B presses
     POST_TRADE_WAIT = 2.0   # brief pause after trade before next iteration
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
@@ -52,6 +60,10 @@ class USUMWonderTrade(BaseScript):
             log("Trading until stopped.")
 
         trade_num = 0
+        failures  = 0
+        unclear   = 0
+        started   = time.time()
+        watcher   = TradeWatcher()
 
         while not stop_event.is_set():
             if self.TRADE_COUNT > 0 and trade_num >= self.TRADE_COUNT:
@@ -81,11 +93,37 @@ class USUMWonderTrade(BaseScript):
             controller.press_a()
             if not self.wait(self.WT_YES_DELAY, stop_event): break
 
-            # ── Wait for trade to complete ────────────────────────────────
-            if not self.wait(self.TRADE_WAIT - self.WT_YES_DELAY, stop_event): break
+            # ── Watch the trade from the searching screen ────────────────
+            watcher.arm(frame_grabber)
+            outcome = watcher.wait(frame_grabber, stop_event,
+                                   self.SEARCH_TIMEOUT, self.TRADE_WAIT)
+            if outcome is None: break
+            if outcome == FAILED:
+                failures += 1
+                log(f"Trade #{trade_num + 1} found no partner — "
+                    f"retrying the same Pokemon.")
+                for _ in range(self.RETRY_B_PRESSES):
+                    if stop_event.is_set(): break
+                    controller.press_b()
+                    if not self.wait(self.RETRY_B_DELAY, stop_event): break
+                continue
 
             trade_num += 1
-            log(f"Trade #{trade_num} complete.")
+            if outcome == UNCLEAR:
+                unclear += 1
+                log(f"Trade #{trade_num} unclear (the screen changed only briefly) — "
+                    f"backing out and counting it as traded.")
+                for _ in range(self.RETRY_B_PRESSES):
+                    if stop_event.is_set(): break
+                    controller.press_b()
+                    if not self.wait(self.RETRY_B_DELAY, stop_event): break
+                continue
+            hours = (time.time() - started) / 3600.0
+            log(f"Trade #{trade_num} complete: partner after "
+                f"{watcher.found_time - watcher.armed_time:.0f} s, done after "
+                f"{watcher.done_time - watcher.armed_time:.0f} s "
+                f"({trade_num / hours:.0f} trades/hour, {failures} retried, "
+                f"{unclear} unclear).")
 
             if not self.wait(self.POST_TRADE_WAIT, stop_event): break
 
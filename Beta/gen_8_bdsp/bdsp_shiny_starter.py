@@ -18,6 +18,8 @@ Setup:
 
 import time
 from scripts.base_script import BaseScript
+from scripts.regions import px
+from scripts.transition import blackout
 
 
 class BDSPShinyStarter(BaseScript):
@@ -47,6 +49,7 @@ class BDSPShinyStarter(BaseScript):
 
     # ── Pixel colour limits ───────────────────────────────────────────────────
     BLACK_MAX  = 50    # R, G, B all below this for dark pixel
+    BLACKOUT_REGION = px(100, 100, 440, 300)
     WHITE_MIN  = 200   # R, G, B all above this for white pixel
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
@@ -157,22 +160,12 @@ class BDSPShinyStarter(BaseScript):
 
     def _wait_for_blackout(self, frame_grabber, stop_event) -> bool:
         """Returns True when the majority of the screen is very dark (battle fade)."""
-        deadline = time.time() + self.CUTSCENE_WAIT + 5.0
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame() if frame_grabber else None
-            if frame is not None:
-                sample = frame[100:400, 100:540]
-                dark = (
-                    (sample[:, :, 0] < self.BLACK_MAX) &
-                    (sample[:, :, 1] < self.BLACK_MAX) &
-                    (sample[:, :, 2] < self.BLACK_MAX)
-                )
-                if dark.mean() > self.BLACK_PIXEL_THRESHOLD:
-                    return True
-            time.sleep(0.03)
-        return False
+        timeout = self.CUTSCENE_WAIT + 5.0
+        if frame_grabber is None:
+            self.wait(timeout, stop_event)
+            return False
+        return blackout(self.BLACK_MAX, self.BLACK_PIXEL_THRESHOLD, self.BLACKOUT_REGION
+                        ).wait_for_start(frame_grabber, stop_event, timeout)
 
     def _wait_for_white_pixels(self, frame_grabber, stop_event,
                                 x, y, w, h, timeout=8.0) -> bool:
@@ -13,20 +13,24 @@ How it works:
   The C++ version detects the wild Pokemon text appearing in the
   dialogue box (white-pixel count in a fixed strip) and then times
   how long the "Your Pokemon" text takes to appear. Shinies have a
-  longer animation (~3.5 s delay threshold). The Python port uses
-  avg_rgb comparison on a calibrated battle-sprite region instead.
+  longer animation (~3.5 s delay threshold). The Python port times
+  blackout to battle text box from capture frame timestamps
+  (encounter_timing.py), learning the usual delay over the first
+  encounters; until then, or without a calibrated text box, it uses
+  the sparkle detector and avg_rgb on a calibrated battle-sprite region.
 
   Loop:
     1. Walk left/right to trigger a random encounter.
     2. Detect battle blackout (dark frame).
-    3. Wait BATTLE_WAIT s for the sprite to load.
-    4. avg_rgb check vs. calibrated baseline ± tolerance.
+    3. Time the text box; flee at once if the delay is normal.
+    4. Otherwise wait out BATTLE_WAIT for the sprite to load and
+       check it against the calibrated baseline ± tolerance.
     5. If not shiny: Up + A to flee, then continue walking.
 
 Setup:
   - Save in a location with wild Pokemon encounters.
   - On first run let an encounter load, then draw a region over the
-    wild Pokemon's battle sprite.
+    wild Pokemon's battle sprite, then one over the battle text box.
   - Delete calibration/bdsp_wild_shiny.json to recalibrate.
 """
 
@@ -35,6 +39,12 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.encounter_timing import EncounterTimer, calibrate_text_region
+from scripts.history import get_history, region_means
+from scripts.pyramid import reduced_decode
+from scripts.regions import px
+from scripts.sparkle import SparkleDetector
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -58,14 +68,25 @@ class BDSPWildShiny(BaseScript):
     BATTLE_WAIT       = 8.0    # wait after blackout for sprite to load
     FLEE_UP_DELAY     = 0.6    # after Up to reach Run
     FLEE_A_DELAY      = 7.0    # after A to confirm flee + return
-    SHINY_RECHECK     = 3.0
+    SHINY_RECHECK     = 3.0    # recheck delay when there is no frame history
+    SHINY_CONFIRM_WINDOW   = 1.0    # seconds of history checked instead
+    SHINY_CONFIRM_FRACTION = 0.8    # of those frames that must also differ
 
     # ── Blackout detection ────────────────────────────────────────────────────
     DARK_THRESHOLD    = 40
     DARK_FRACTION     = 0.65
 
+    # ── Sparkle detection (needs a frame history) ─────────────────────────────
+    SPARKLE_WINDOW     = 1.5    # seconds of frames scored at a time
+    SPARKLE_POLL       = 0.5
+    SPARKLE_MARGIN     = 40     # px around the calibrated sprite region
+    SPARKLE_CONFIDENCE = 0.6
+
     COLOUR_TOLERANCE  = 15
 
+    # ── Encounter timing ──────────────────────────────────────────────────────
+    SHINY_DELAY_MARGIN = 0.8    # s over the usual blackout-to-text delay
+
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("BDSP - Wild Shiny started.")
 
@@ -89,6 +110,10 @@ class BDSPWildShiny(BaseScript):
         tolerance  = cal.get('tolerance', self.COLOUR_TOLERANCE)
 
         log(f"Wild Pokemon region: x={x} y={y} w={w} h={h} | tolerance ±{tolerance}")
+        timer = EncounterTimer.from_calibration(cal, margin=self.SHINY_DELAY_MARGIN)
+        if timer is None:
+            log(f"No text box calibrated — sprite check only. Delete {_cal_path()} "
+                "to add one and enable encounter timing.")
         log("Encounter loop running. Press Stop at any time.")
 
         encounter_count = 0
@@ -129,30 +154,39 @@ class BDSPWildShiny(BaseScript):
             encounter_count += 1
             log(f"Encounter #{encounter_count}: battle detected")
 
-            if not self.wait(self.BATTLE_WAIT, stop_event): break
+            # ── Encounter timing ──────────────────────────────────────────
+            verdict = sparkle = None
+            if timer is not None:
+                verdict = timer.check(frame_grabber, stop_event,
+                                      self._blackout.start_time, self.BATTLE_WAIT, log)
+            if stop_event.is_set(): break
+            if verdict is None:
+                sparkle = self._watch_for_sparkle(frame_grabber, stop_event, (x, y, w, h))
+            if stop_event.is_set(): break
 
-            # ── Shiny check ───────────────────────────────────────────────
-            frame = frame_grabber.get_latest_frame()
-            shiny_found = False
+            # ── Shiny check (sprite, unless timing decided) ───────────────
+            frame = frame_grabber.get_latest_frame() if verdict is None else None
+            shiny_found = bool(verdict)
 
-            if frame is not None:
+            if sparkle is not None:
+                log(f"*** SHINY SPARKLE! Encounter #{encounter_count} "
+                    f"(confidence {sparkle:.2f}) ***")
+                shiny_found = True
+            elif frame is not None:
                 r, g, b = self.avg_rgb(frame, x, y, w, h)
                 if (abs(r - br) > tolerance or
                         abs(g - bg) > tolerance or
                         abs(b - bb) > tolerance):
-                    if not self.wait(self.SHINY_RECHECK, stop_event): break
-                    frame = frame_grabber.get_latest_frame()
-                    if frame is not None:
-                        r2, g2, b2 = self.avg_rgb(frame, x, y, w, h)
-                        if (abs(r2 - br) > tolerance or
-                                abs(g2 - bg) > tolerance or
-                                abs(b2 - bb) > tolerance):
-                            log(
-                                f"*** SHINY WILD POKEMON! Encounter #{encounter_count} "
-                                f"R:{r2:.0f} G:{g2:.0f} B:{b2:.0f}  "
-                                f"(baseline R:{br:.0f} G:{bg:.0f} B:{bb:.0f}) ***"
-                            )
-                            shiny_found = True
+                    confirmed = self._confirm_shiny(
+                        frame_grabber, stop_event, (x, y, w, h), (br, bg, bb), tolerance)
+                    if confirmed is not None:
+                        r2, g2, b2 = confirmed
+                        log(
+                            f"*** SHINY WILD POKEMON! Encounter #{encounter_count} "
+                            f"R:{r2:.0f} G:{g2:.0f} B:{b2:.0f}  "
+                            f"(baseline R:{br:.0f} G:{bg:.0f} B:{bb:.0f}) ***"
+                        )
+                        shiny_found = True
 
             if stop_event.is_set(): break
 
@@ -173,22 +207,66 @@ class BDSPWildShiny(BaseScript):
     def _wait_for_blackout_while_walking(self, frame_grabber, stop_event,
                                           duration: float) -> bool:
         """Walk for `duration` seconds, return True if blackout detected."""
-        deadline = time.time() + duration
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                sample = frame[50:430, 50:590]
-                dark = (
-                    (sample[:, :, 0] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 1] < self.DARK_THRESHOLD) &
-                    (sample[:, :, 2] < self.DARK_THRESHOLD)
-                )
-                if dark.mean() > self.DARK_FRACTION:
-                    return True
-            time.sleep(0.03)
-        return False
+        self._blackout = blackout(self.DARK_THRESHOLD, self.DARK_FRACTION)
+        with reduced_decode(frame_grabber):
+            return self._blackout.wait_for_start(frame_grabber, stop_event, duration)
+
+    def _watch_for_sparkle(self, frame_grabber, stop_event, region):
+        """
+        Wait out the rest of BATTLE_WAIT (counted from the blackout) while
+        scoring the entry animation for the shiny sparkle. Returns the
+        confidence as soon as it reaches SPARKLE_CONFIDENCE, or None once
+        the wait is over (at once without a frame history, which plain
+        waiting needs anyway).
+        """
+        end = self._blackout.start_time + self.BATTLE_WAIT
+        history = get_history(frame_grabber)
+        if history is None:
+            self.wait(end - time.time(), stop_event)
+            return None
+        x, y, w, h = region
+        m = self.SPARKLE_MARGIN
+        detector = SparkleDetector(px(x - m, y - m, w + 2 * m, h + 2 * m))
+        while time.time() < end:
+            if not self.wait(self.SPARKLE_POLL, stop_event):
+                return None
+            now = time.time()
+            confidence = detector.score_history(history, now - self.SPARKLE_WINDOW, now)
+            if confidence >= self.SPARKLE_CONFIDENCE:
+                return confidence
+        return None
+
+    def _confirm_shiny(self, frame_grabber, stop_event, region, baseline, tolerance):
+        """
+        Confirm a suspected shiny; return the confirming (R, G, B) or None.
+
+        With a frame history the frames of the last SHINY_CONFIRM_WINDOW
+        seconds are checked at once, so a passing animation is rejected (or
+        a real shiny confirmed) without waiting. Otherwise waits
+        SHINY_RECHECK and samples one more frame.
+        """
+        history = get_history(frame_grabber)
+        if history is not None:
+            frames, _ = history.between(time.time() - self.SHINY_CONFIRM_WINDOW,
+                                        region=px(*region))
+            if len(frames):
+                means = region_means(frames)
+                differs = (abs(means - baseline) > tolerance).any(axis=1)
+                if differs.mean() < self.SHINY_CONFIRM_FRACTION:
+                    return None
+                r, g, b = means[differs].mean(axis=0)
+                return float(r), float(g), float(b)
+
+        if not self.wait(self.SHINY_RECHECK, stop_event):
+            return None
+        frame = frame_grabber.get_latest_frame()
+        if frame is None:
+            return None
+        r, g, b = self.avg_rgb(frame, *region)
+        br, bg, bb = baseline
+        if abs(r - br) > tolerance or abs(g - bg) > tolerance or abs(b - bb) > tolerance:
+            return r, g, b
+        return None
 
     def _calibrate(self, controller, frame_grabber, stop_event,
                    log, request_calibration):
@@ -204,7 +282,9 @@ class BDSPWildShiny(BaseScript):
             return None
         r, g, b = self.avg_rgb(frame, x, y, w, h)
         log(f"Baseline — R:{r:.1f}  G:{g:.1f}  B:{b:.1f}")
-        return {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal = {'region': [x, y, w, h], 'baseline': [r, g, b], 'tolerance': 15}
+        cal.update(calibrate_text_region(frame_grabber, stop_event, log, request_calibration))
+        return cal
 
     def _load_calibration(self):
         path = _cal_path()
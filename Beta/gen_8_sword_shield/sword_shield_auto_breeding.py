@@ -6,28 +6,39 @@ Automates egg collection and hatching on Route 5 (the Nursery near
 Motostoke). The player must have a breeding pair deposited with the
 Nursery lady on Route 5. Eggs are collected by talking to the Nursery
 aide, then hatched by biking back and forth on the bridge east of the
-Nursery. Once a batch of 5 eggs has hatched, the script checks each
-hatchling's sprite via avg_rgb and alerts on a potential shiny.
+Nursery. Each hatchling's sprite is checked via avg_rgb as it hatches,
+and the script alerts on a potential shiny.
 
 Ported from SwordShield_Automatic_Breeding_2.0.cpp.
 
+The party is modelled slot by slot (party.py): eggs are added when the
+party screen confirms a collection and marked hatched on the hatch text,
+so the script knows when the party is full and when its last egg has
+hatched instead of assuming batches of exactly 5.
+
 How it works:
-  Egg collection phase (repeat until 5 eggs in party):
+  Egg collection phase (repeat until the party is full):
     1. Hold left (1.8 s) toward the west end of Route 5 while watching
        for egg-hatch text (dark pixel strip at bottom of screen).
     2. Hold NE right (4 s) back toward the Nursery aide.
-    3. Every NURSERY_CHECK_EVERY passes, press A to talk to the
-       Nursery aide; check for the egg-ready icon via white-pixel
-       count; if ready: press A×2 to receive egg, add to party.
-    4. Repeat until 5 eggs collected.
-
-  Hatching phase (repeat until all 5 hatched):
+    3. If the aide's egg-ready icon shows above her on arrival, press A
+       to talk; if the egg is offered (white + dark mix in the dialogue),
+       press A×2 to receive it and confirm on the party screen. Without
+       the icon the aide is asked every NURSERY_FALLBACK_EVERY passes (3,
+       as before) until the overworld icon has been seen ahead of an
+       offered egg; from then on every NURSERY_PROVEN_FALLBACK_EVERY.
+    4. Repeat until every free party slot holds an egg.
+
+  Hatching phase (repeat until no egg is left in the party):
     1. Bike right (6.5 s) then left (6 s), checking for hatch text
        on each pass.
     2. On hatch detection: press A (16 s for animation) → B (skip
        nickname 7 s) → confirm via avg_rgb on calibrated region
        (shiny hatch has different colours).
-    3. After all 5 hatched, fly back to Nursery via X menu.
+    3. Eggs not hatched after EGG_HATCH_PASSES bike passes are dropped
+       from the model (a hatch text was missed), so a desync cannot keep
+       the script biking. Walking passes while collecting do not count.
+    4. Once the last egg has hatched, fly back to Nursery via X menu.
 
   Fly to Nursery (flyNursery):
     X(1.5s) → Down(1.5s) → A(3s) → NE_TAP(1s) → A(1.5s) → A(3s)
@@ -46,6 +57,10 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.colour_classes import ColourClasses
+from scripts.detection_backend import get_backend
+from scripts.party import PartyState
+from scripts.regions import area_scale, px
 
 
 def _cal_path() -> str:
@@ -83,25 +98,37 @@ class SwordShieldAutoBreeding(BaseScript):
     FLY_A3_WAIT           = 3.0    # after A to fly (landing wait)
 
     # ── Nursery interaction cadence ───────────────────────────────────────────
-    NURSERY_CHECK_EVERY   = 3      # talk to Nursery aide every N walk passes
+    NURSERY_FALLBACK_EVERY = 3     # talk anyway after N passes without the icon
+    NURSERY_PROVEN_FALLBACK_EVERY = 10   # ... once the overworld icon has proven itself
     SAFETY_RESET_EVERY    = 50     # flee + fly back every N passes as safety
+    EGG_HATCH_PASSES      = 40     # bike passes an egg must have hatched by
 
     # ── Egg hatch text detection (dark horizontal strip) ──────────────────────
     HATCH_DARK_THRESHOLD  = 120    # pixels below this count as dark
+    HATCH_TEXT_REGION     = px(145, 310, 250, 10)   # thin strip over the dialogue bar
     HATCH_DARK_MIN        = 800    # minimum dark pixels to detect hatch text
     HATCH_CONSEC_MIN      = 600    # minimum consecutive dark pixels
 
     # ── Nursery egg-ready icon detection (PNI — white + dark mix) ────────────
+    EGG_ICON_REGION       = px(450, 255, 55, 3)     # egg icon in the aide's dialogue
     EGG_WHITE_THRESHOLD   = 180    # R,G,B all > this = white
     EGG_WHITE_MIN         = 70     # white pixels in nursery icon region
     EGG_DARK_MIN          = 70     # dark pixels in nursery icon region
 
+    # ── Overworld egg icon above the aide, on arrival ────────────────────────
+    AIDE_ICON_REGION      = px(420, 150, 40, 40)    # speech bubble over the aide's head
+    AIDE_ICON_WHITE_MIN   = 400    # white bubble pixels
+    AIDE_ICON_DARK_MIN    = 40     # dark outline / egg pixels
+
     # ── Post-hatch PCI confirmation (red hatch screen) ───────────────────────
+    HATCH_SCREEN_REGION   = px(400, 100, 50, 30)    # summary / party background
     HATCH_B_AVE_MAX       = 140    # blue channel average must be below this
     HATCH_R_AVE_MIN       = 180    # red channel average must be above this
 
     COLOUR_TOLERANCE      = 15
 
+    _egg_icon_classes = None    # compiled on first use (see _icon_counts)
+
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("SwSh - Auto Breeding started.")
 
@@ -127,18 +154,20 @@ class SwordShieldAutoBreeding(BaseScript):
         log(f"Hatchling region: x={x} y={y} w={w} h={h} | tolerance ±{tolerance}")
         log("Breeding loop running. Press Stop at any time.")
 
+        party = PartyState()
+        icon_proven = False         # overworld icon seen ahead of an offered egg
         total_hatched = 0
+        self._passes = 0
+        self._bike_passes = 0       # egg age is measured in these
 
         while not stop_event.is_set():
 
-            # ── Phase 1: collect 5 eggs ────────────────────────────────────
-            party_eggs    = 0
-            party_hatched = 0
-            walk_pass     = 0
+            # ── Phase 1: collect eggs until the party is full ──────────────
+            since_talk = 0
 
-            log("Collecting eggs...")
+            log(f"Collecting eggs... {party}")
 
-            while party_eggs < 5 and not stop_event.is_set():
+            while party.free > 0 and not stop_event.is_set():
 
                 # Walk left (checking for incidental hatch)
                 controller.hold_left()
@@ -150,9 +179,8 @@ class SwordShieldAutoBreeding(BaseScript):
                 controller.release_all()
                 if stop_event.is_set(): break
                 if hatched:
-                    party_hatched += 1
                     total_hatched += 1
-                    log(f"Egg hatched while walking! Total hatched: {total_hatched}")
+                    self._record_hatch(party, log, total_hatched)
 
                 # Walk NE back toward Nursery aide (checking for hatch)
                 # '9' = hold NE on the Switch joystick servo
@@ -165,14 +193,22 @@ class SwordShieldAutoBreeding(BaseScript):
                 controller.release_all()
                 if stop_event.is_set(): break
                 if hatched:
-                    party_hatched += 1
                     total_hatched += 1
-                    log(f"Egg hatched while walking! Total hatched: {total_hatched}")
-
-                walk_pass += 1
-
-                # Every NURSERY_CHECK_EVERY passes, talk to the Nursery aide
-                if walk_pass % self.NURSERY_CHECK_EVERY == 0:
+                    self._record_hatch(party, log, total_hatched)
+
+                self._passes += 1
+                since_talk += 1
+
+                # Talk to the Nursery aide when her egg icon shows on
+                # arrival, or as a fallback every few passes without it.
+                # The fallback stays at the old cadence until the icon has
+                # been seen ahead of an offered egg at least once.
+                frame = frame_grabber.get_latest_frame()
+                icon_seen = frame is not None and self._check_aide_icon(frame)
+                fallback = (self.NURSERY_PROVEN_FALLBACK_EVERY if icon_proven
+                            else self.NURSERY_FALLBACK_EVERY)
+                if icon_seen or since_talk >= fallback:
+                    since_talk = 0
                     controller.press_a()
                     if not self.wait(self.NURSERY_TALK_DELAY, stop_event): break
 
@@ -184,18 +220,23 @@ class SwordShieldAutoBreeding(BaseScript):
 
                     if egg_ready:
                         log("Egg ready — collecting.")
+                        if icon_seen and not icon_proven:
+                            icon_proven = True
+                            log("Egg icon seen on arrival — asking the aide "
+                                f"without it every {self.NURSERY_PROVEN_FALLBACK_EVERY} "
+                                "passes from now on.")
                         controller.press_a()
                         if not self.wait(self.EGG_RECEIVE_DELAY, stop_event): break
                         controller.press_a()
                         if not self.wait(self.EGG_RECEIVE_DELAY, stop_event): break
 
-                        # Confirm collection via PCI (red screen)
+                        # Confirm collection on the party screen (PCI, red)
                         frame = frame_grabber.get_latest_frame()
                         if frame is not None and self._check_hatch_screen(frame):
-                            log(f"Egg collected! Party eggs: {party_eggs + 1}")
                             controller.press_a()
                             if not self.wait(self.EGG_CONFIRM_DELAY, stop_event): break
-                            party_eggs += 1
+                            party.add_egg(since=self._bike_passes)
+                            log(f"Egg collected! {party}")
 
                         for _ in range(2):
                             controller.press_b()
@@ -206,7 +247,7 @@ class SwordShieldAutoBreeding(BaseScript):
                             if not self.wait(self.DISMISS_B_DELAY, stop_event): break
 
                 # Safety: flee any accidental encounter and fly back
-                if walk_pass >= self.SAFETY_RESET_EVERY:
+                if self._passes % self.SAFETY_RESET_EVERY == 0:
                     log("Safety reset — flying back to Nursery.")
                     for _ in range(2):
                         controller.press_b()
@@ -216,11 +257,10 @@ class SwordShieldAutoBreeding(BaseScript):
                     controller.press_a()
                     if not self.wait(4.0, stop_event): break
                     self._fly_to_nursery(controller, stop_event, total_hatched)
-                    walk_pass = 0
 
             if stop_event.is_set(): break
 
-            log(f"5 eggs collected. Moving to bridge to hatch...")
+            log(f"Party full — moving to bridge to hatch {party.eggs} egg(s)...")
 
             # ── Transition: move down then right to the bridge ────────────
             controller.hold_down()
@@ -235,8 +275,8 @@ class SwordShieldAutoBreeding(BaseScript):
             controller.release_all()
             if stop_event.is_set(): break
             if hatched:
-                party_hatched += 1
                 total_hatched += 1
+                self._record_hatch(party, log, total_hatched)
 
             controller.hold_up()
             if not self.wait(self.BIKE_TURN_WAIT, stop_event): break
@@ -250,12 +290,11 @@ class SwordShieldAutoBreeding(BaseScript):
             controller.release_all()
             if stop_event.is_set(): break
             if hatched:
-                party_hatched += 1
                 total_hatched += 1
+                self._record_hatch(party, log, total_hatched)
 
-            # ── Phase 2: bike back and forth until all 5 hatched ──────────
-            lr_safety = 0
-            while party_hatched < 5 and not stop_event.is_set():
+            # ── Phase 2: bike back and forth until no egg is left ─────────
+            while party.eggs > 0 and not stop_event.is_set():
 
                 # Bike left
                 controller.hold_left()
@@ -267,11 +306,10 @@ class SwordShieldAutoBreeding(BaseScript):
                 controller.release_all()
                 if stop_event.is_set(): break
                 if hatched:
-                    party_hatched += 1
                     total_hatched += 1
-                    log(f"Egg hatched! Total hatched: {total_hatched}")
+                    self._record_hatch(party, log, total_hatched)
 
-                if party_hatched >= 5:
+                if party.eggs == 0:
                     break
 
                 # Brief up transition
@@ -289,13 +327,13 @@ class SwordShieldAutoBreeding(BaseScript):
                 controller.release_all()
                 if stop_event.is_set(): break
                 if hatched:
-                    party_hatched += 1
                     total_hatched += 1
-                    log(f"Egg hatched! Total hatched: {total_hatched}")
+                    self._record_hatch(party, log, total_hatched)
 
-                lr_safety += 1
-                if lr_safety > 25:
-                    log("Bike safety limit reached — resetting hatching pass.")
+                self._passes += 1
+                self._bike_passes += 1
+                self._expire(party, log)
+                if party.eggs == 0:
                     break
 
                 # Brief up transition
@@ -305,11 +343,38 @@ class SwordShieldAutoBreeding(BaseScript):
 
             if stop_event.is_set(): break
 
-            log(f"Batch complete. Flying back to Nursery for next batch.")
+            # Every hatchling was checked as it hatched; the next batch's
+            # eggs take their party slots as they are collected.
+            log(f"Batch complete ({total_hatched} hatched). "
+                f"Flying back to Nursery for next batch.")
+            party.clear()
             self._fly_to_nursery(controller, stop_event, total_hatched)
 
         log("SwSh - Auto Breeding stopped.")
 
+    # ── Party bookkeeping ─────────────────────────────────────────────────────
+
+    def _record_hatch(self, party, log, total_hatched: int):
+        """Mark the oldest egg hatched in the party model."""
+        slot = party.hatch()
+        if slot is None and party.add_egg(since=self._bike_passes) is not None:
+            # An egg the model had dropped as overdue hatched after all
+            slot = party.hatch()
+        where = slot + 1 if slot is not None else '?'
+        log(f"Egg hatched (party slot {where}). Total hatched: {total_hatched} {party}")
+
+    def _expire(self, party, log):
+        """
+        Drop eggs still unhatched EGG_HATCH_PASSES bike passes after they
+        were collected. Called only while hatching, so an egg waiting in the
+        party during collection is never dropped. A missed hatch text or a
+        collection that did not happen cannot keep the script biking for
+        eggs that are not there.
+        """
+        dropped = party.expire(self._bike_passes, self.EGG_HATCH_PASSES)
+        if dropped:
+            log(f"{dropped} egg(s) overdue — assuming they hatched unseen. {party}")
+
     # ── Walk with hatch detection ─────────────────────────────────────────────
 
     def _walk_check_hatch(self, controller, frame_grabber, stop_event,
@@ -382,50 +447,48 @@ class SwordShieldAutoBreeding(BaseScript):
         box that appears when an egg is about to hatch).
         """
         # Check a thin horizontal strip near bottom of frame (y ~315)
-        strip = frame[310:320, 145:395]   # approximate dialogue bar region
-        dark = (
-            (strip[:, :, 0] < self.HATCH_DARK_THRESHOLD) &
-            (strip[:, :, 1] < self.HATCH_DARK_THRESHOLD) &
-            (strip[:, :, 2] < self.HATCH_DARK_THRESHOLD)
-        )
-        dark_count = int(dark.sum())
-        if dark_count < self.HATCH_DARK_MIN:
+        # (approximate dialogue bar region), then require a long run of
+        # consecutive dark pixels within it. The strip is read row by row,
+        # so both thresholds scale with its pixel area.
+        dark_count, max_consec = get_backend().run(
+            'hatch_text', frame, self.HATCH_TEXT_REGION.roi(frame.shape),
+            self.HATCH_DARK_THRESHOLD)
+        scale = area_scale(frame.shape)
+        if dark_count < self.HATCH_DARK_MIN * scale:
             return False
+        return max_consec > self.HATCH_CONSEC_MIN * scale
 
-        # Check for consecutive dark pixels in the strip
-        flat = dark.flatten()
-        consec = 0
-        max_consec = 0
-        for v in flat:
-            if v:
-                consec += 1
-                if consec > max_consec:
-                    max_consec = consec
-            else:
-                consec = 0
-        return max_consec > self.HATCH_CONSEC_MIN
+    def _icon_counts(self, frame, region):
+        if self._egg_icon_classes is None:
+            self._egg_icon_classes = (ColourClasses()
+                                      .white('white', self.EGG_WHITE_THRESHOLD)
+                                      .dark('dark', 120)
+                                      .compile())
+        return self._egg_icon_classes.count(region.crop(frame))
 
     def _check_egg_ready(self, frame) -> bool:
         """
-        Check whether the Nursery aide's egg-ready icon is visible.
+        Check, after talking to the aide, whether she offers an egg.
         The C++ checks a small region (~455+left_x, ~260+top_y) for
         a mix of white AND dark pixels simultaneously (the egg icon).
         In the Python port we sample a fixed region of the frame.
         """
-        # Region near Nursery aide's head / icon area (right side, mid-height)
-        region = frame[255:258, 450:505]
-        white = (
-            (region[:, :, 0] > self.EGG_WHITE_THRESHOLD) &
-            (region[:, :, 1] > self.EGG_WHITE_THRESHOLD) &
-            (region[:, :, 2] > self.EGG_WHITE_THRESHOLD)
-        )
-        dark = (
-            (region[:, :, 0] < 120) &
-            (region[:, :, 1] < 120) &
-            (region[:, :, 2] < 120)
-        )
-        return (int(white.sum()) > self.EGG_WHITE_MIN and
-                int(dark.sum()) > self.EGG_DARK_MIN)
+        counts = self._icon_counts(frame, self.EGG_ICON_REGION)
+        scale = area_scale(frame.shape)
+        return (counts['white'] > self.EGG_WHITE_MIN * scale and
+                counts['dark'] > self.EGG_DARK_MIN * scale)
+
+    def _check_aide_icon(self, frame) -> bool:
+        """
+        Check, on arrival in the overworld, for the egg speech bubble over
+        the aide's head: a white bubble with a dark outline and egg. Until
+        it has been seen ahead of an offered egg, the script does not rely
+        on it (see NURSERY_PROVEN_FALLBACK_EVERY).
+        """
+        counts = self._icon_counts(frame, self.AIDE_ICON_REGION)
+        scale = area_scale(frame.shape)
+        return (counts['white'] > self.AIDE_ICON_WHITE_MIN * scale and
+                counts['dark'] > self.AIDE_ICON_DARK_MIN * scale)
 
     def _check_hatch_screen(self, frame) -> bool:
         """
@@ -433,7 +496,7 @@ class SwordShieldAutoBreeding(BaseScript):
         background (pinkish-red). Matches C++ PCI check: Bave<140, Rave>180.
         Samples a region in the upper-right of the frame.
         """
-        region = frame[100:130, 400:450]
+        region = self.HATCH_SCREEN_REGION.crop(frame)
         b_avg = float(region[:, :, 0].mean())
         r_avg = float(region[:, :, 2].mean())
         return b_avg < self.HATCH_B_AVE_MAX and r_avg > self.HATCH_R_AVE_MIN
@@ -12,9 +12,11 @@ Ported from SwordShield_ChainFishing_2.0.cpp.
 
 How it works:
   1. Press A to cast the rod.
-  2. Wait up to 15 s for >500 white pixels in the upper frame
-     (the "!" exclamation mark from a fish bite).
-  3. Press A to hook the fish; wait 5 s for battle to load.
+  2. Watch every new frame for up to 15 s for >500 white pixels in the
+     upper frame (the "!" exclamation mark from a fish bite) and press A
+     to hook on that same frame (reaction.py). Reaction-time percentiles
+     (frame → decision → A sent) are logged every REACTION_REPORT hooks.
+  3. Wait 5 s for battle to load.
   4. avg_rgb check on calibrated region vs baseline ± tolerance.
   5. If not shiny: Up + A to flee (Run), wait FLEE_WAIT s to return
      to overworld; repeat.
@@ -34,6 +36,9 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.kernels import count_white
+from scripts.reaction import Reactor
+from scripts.regions import px
 
 
 def _cal_path() -> str:
@@ -64,6 +69,11 @@ class SwordShieldChainFishing(BaseScript):
     # ── White pixel detection (exclamation mark) ──────────────────────────────
     WHITE_THRESHOLD    = 200    # R, G, B all > this to count as white
     WHITE_COUNT_MIN    = 500    # minimum white pixels to count as bite
+    BITE_REGION        = px(0, 0, 640, 240)   # upper half, above the player
+
+    # ── Reaction monitoring ──────────────────────────────────────────────────
+    REACTION_BUDGET_MS = 100.0  # p90 frame-to-press time before warning
+    REACTION_REPORT    = 10     # log percentiles every N hooks
 
     COLOUR_TOLERANCE   = 15
 
@@ -94,6 +104,7 @@ class SwordShieldChainFishing(BaseScript):
 
         encounter_count = 0
         miss_streak     = 0
+        reactor         = self._bite_reactor(controller)
 
         while not stop_event.is_set():
 
@@ -102,8 +113,8 @@ class SwordShieldChainFishing(BaseScript):
             if not self.wait(self.CAST_WAIT, stop_event):
                 break
 
-            # ── Wait for fish bite (white pixels = exclamation) ────────────
-            bite = self._wait_for_bite(frame_grabber, stop_event, self.BITE_WAIT)
+            # ── Wait for fish bite (white pixels = exclamation), hook on it ─
+            bite = self._wait_for_bite(reactor, frame_grabber, stop_event, self.BITE_WAIT)
 
             if stop_event.is_set():
                 break
@@ -126,8 +137,8 @@ class SwordShieldChainFishing(BaseScript):
 
             miss_streak = 0
 
-            # ── Hook the fish ──────────────────────────────────────────────
-            controller.press_a()
+            # ── Hooked: the reactor pressed A on the bite frame ────────────
+            self._report_reaction(reactor, log)
             if not self.wait(self.HOOK_WAIT, stop_event):
                 break
 
@@ -181,28 +192,33 @@ class SwordShieldChainFishing(BaseScript):
 
     # ── Wait for fish bite ────────────────────────────────────────────────────
 
-    def _wait_for_bite(self, frame_grabber, stop_event, timeout: float) -> bool:
+    def _bite_reactor(self, controller) -> Reactor:
+        """White exclamation-mark detector on BITE_REGION, hooking with A."""
+        # WHITE_COUNT_MIN is for 640×480; as a share it holds at any capture size
+        share = self.WHITE_COUNT_MIN / float(640 * 240)
+
+        def bite(roi) -> bool:
+            return count_white(roi, self.WHITE_THRESHOLD) > share * roi.shape[0] * roi.shape[1]
+
+        return Reactor(self.BITE_REGION, bite, controller.press_a)
+
+    def _wait_for_bite(self, reactor, frame_grabber, stop_event, timeout: float):
         """
-        Poll the frame for the white exclamation mark above the player.
-        Returns True if >WHITE_COUNT_MIN bright pixels found within timeout.
+        Hook (A) on the first frame with more than WHITE_COUNT_MIN white
+        pixels above the player. Returns the ReactionEvent, or None if no
+        bite came within `timeout`.
         """
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                # Sample the full frame — exclamation can appear anywhere above player
-                sample = frame[0:240, 0:640]
-                white = (
-                    (sample[:, :, 0] > self.WHITE_THRESHOLD) &
-                    (sample[:, :, 1] > self.WHITE_THRESHOLD) &
-                    (sample[:, :, 2] > self.WHITE_THRESHOLD)
-                )
-                if int(white.sum()) > self.WHITE_COUNT_MIN:
-                    return True
-            time.sleep(0.03)
-        return False
+        return reactor.wait_and_fire(frame_grabber, stop_event, timeout)
+
+    def _report_reaction(self, reactor, log):
+        """Every REACTION_REPORT hooks, log the percentiles and check the budget."""
+        stats = reactor.stats
+        if stats.count % self.REACTION_REPORT:
+            return
+        log(f"Hook {stats}")
+        if stats.over_budget(self.REACTION_BUDGET_MS):
+            log(f"Hook reaction p90 over {self.REACTION_BUDGET_MS:.0f} ms — "
+                "the chain may break; check the capture and host load.")
 
     # ── Calibration helpers ───────────────────────────────────────────────────
 
@@ -14,7 +14,7 @@ How it works:
      → select user → wait for world to load.
   2. Press A × 3 (2 s each) to solve the door puzzle.
   3. Press A in a loop waiting up to ENCOUNTER_A_WAIT s per press
-     for the encounter flash (>WHITE_COUNT_MIN white pixels).
+     for the encounter flash (WHITE_FRACTION of the region white).
   4. Wait BATTLE_LOAD_WAIT s for the sprite to appear.
   5. avg_rgb check on the calibrated region vs. baseline ± tolerance.
   6. Soft-reset and repeat if not shiny.
@@ -32,6 +32,9 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.pyramid import reduced_decode
+from scripts.regions import px
+from scripts.transition import whiteout
 
 
 def _cal_path() -> str:
@@ -68,7 +71,8 @@ class SwordShieldShinyRegi(BaseScript):
 
     # ── White pixel detection (encounter flash) ───────────────────────────────
     WHITE_THRESHOLD   = 200    # R, G, B all > this to count as white
-    WHITE_COUNT_MIN   = 1000   # minimum white pixels to detect encounter flash
+    WHITE_FRACTION    = 0.125  # share of white pixels (1000 of 8000) = encounter flash
+    FLASH_REGION      = px(370, 200, 100, 80)   # right-centre, where the flash appears
 
     COLOUR_TOLERANCE  = 15
 
@@ -213,25 +217,11 @@ class SwordShieldShinyRegi(BaseScript):
                                    timeout: float) -> bool:
         """
         Wait up to `timeout` seconds for the white encounter flash
-        (>WHITE_COUNT_MIN pixels above WHITE_THRESHOLD brightness).
+        (over WHITE_FRACTION of FLASH_REGION above WHITE_THRESHOLD).
         """
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            if stop_event.is_set():
-                return False
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                # Check the right-centre region where the white flash appears
-                sample = frame[200:280, 370:470]
-                white = (
-                    (sample[:, :, 0] > self.WHITE_THRESHOLD) &
-                    (sample[:, :, 1] > self.WHITE_THRESHOLD) &
-                    (sample[:, :, 2] > self.WHITE_THRESHOLD)
-                )
-                if int(white.sum()) > self.WHITE_COUNT_MIN:
-                    return True
-            time.sleep(0.03)
-        return False
+        with reduced_decode(frame_grabber):
+            return whiteout(self.WHITE_THRESHOLD, self.WHITE_FRACTION, self.FLASH_REGION
+                            ).wait_for_start(frame_grabber, stop_event, timeout)
 
     # ── Calibration helpers ───────────────────────────────────────────────────
 
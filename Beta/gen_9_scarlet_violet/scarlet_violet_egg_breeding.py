@@ -25,6 +25,7 @@ Setup:
 
 import time
 from scripts.base_script import BaseScript
+from scripts.colour_classes import ColourClasses
 
 
 class ScarletVioletEggBreeding(BaseScript):
@@ -112,19 +113,16 @@ class ScarletVioletEggBreeding(BaseScript):
         or until MAX_WAIT_PER_EGG seconds have passed.
         Returns True if an egg was detected, False on timeout.
         """
+        yellow = ColourClasses().yellow(
+            'yellow', self.YELLOW_R_MIN, self.YELLOW_G_MIN, self.YELLOW_B_MAX).compile()
         deadline = time.time() + self.MAX_WAIT_PER_EGG
         while time.time() < deadline:
             if stop_event.is_set():
                 return False
             frame = frame_grabber.get_latest_frame() if frame_grabber else None
             if frame is not None:
-                region = frame[y:y + h, x:x + w]
-                yellow = (
-                    (region[:, :, 0] > self.YELLOW_R_MIN) &
-                    (region[:, :, 1] > self.YELLOW_G_MIN) &
-                    (region[:, :, 2] < self.YELLOW_B_MAX)
-                )
-                if yellow.sum() > self.YELLOW_PIXEL_THRESHOLD:
+                count = yellow.count(frame[y:y + h, x:x + w])['yellow']
+                if count > self.YELLOW_PIXEL_THRESHOLD:
                     return True
             time.sleep(self.EGG_CHECK_INTERVAL)
         return False
@@ -41,6 +41,9 @@ import os
 import sys
 import time
 from scripts.base_script import BaseScript
+from scripts.pyramid import reduced_decode
+from scripts.regions import Region, px
+from scripts.transition import blackout
 
 
 def _cal_path() -> str:
@@ -71,9 +74,12 @@ class SVRoute1WildEncounter(BaseScript):
 
     # ── Detection ─────────────────────────────────────────────────────────────
     BRIGHTNESS_REGION     = (200, 150, 200, 150)  # (x, y, w, h) centre of screen
-    ENCOUNTER_DARK_THRESH = 60    # avg RGB below this = encounter transition dark
+    ENCOUNTER_DARK_THRESH = 60    # R, G, B below this = dark pixel
+    ENCOUNTER_DARK_FRACTION = 0.65  # share of dark pixels = encounter transition
     COLOUR_TOLERANCE      = 15
 
+    _transition = None    # created on first use (see _encounter_dark)
+
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("SV Wild Encounter Shiny Hunter started.")
 
@@ -94,7 +100,7 @@ class SVRoute1WildEncounter(BaseScript):
         else:
             log(f"Calibration loaded from {_cal_path()}")
 
-        rx, ry, rw, rh = cal['region']
+        sprite = Region.from_json(cal['region'])
         br, bg, bb = cal['baseline']
         tol = cal.get('tolerance', self.COLOUR_TOLERANCE)
         sr_count = 0
@@ -114,17 +120,13 @@ class SVRoute1WildEncounter(BaseScript):
                     controller.hold_down()
 
                 # Poll for encounter during the walk
-                for _ in range(self.ENCOUNTER_POLL_CYCLES):
-                    if stop_event.is_set():
-                        break
-                    if not self.wait(self.ENCOUNTER_POLL_INTERVAL, stop_event):
-                        break
-                    frame = frame_grabber.get_latest_frame()
-                    if frame is not None:
-                        bx, by, bw, bh = self.BRIGHTNESS_REGION
-                        r, g, b = self.avg_rgb(frame, bx, by, bw, bh)
-                        avg = (r + g + b) / 3
-                        if avg < self.ENCOUNTER_DARK_THRESH:
+                with reduced_decode(frame_grabber):
+                    for _ in range(self.ENCOUNTER_POLL_CYCLES):
+                        if stop_event.is_set():
+                            break
+                        if not self.wait(self.ENCOUNTER_POLL_INTERVAL, stop_event):
+                            break
+                        if self._encounter_dark(frame_grabber):
                             controller.release_all()
                             encounter = True
                             break
@@ -151,7 +153,7 @@ class SVRoute1WildEncounter(BaseScript):
             shiny_found = False
 
             if frame is not None:
-                r, g, b = self.avg_rgb(frame, rx, ry, rw, rh)
+                r, g, b = self.avg_rgb(frame, *sprite.to_pixels(frame.shape))
                 log(
                     f"SR #{sr_count + 1}: "
                     f"R:{r:.0f} G:{g:.0f} B:{b:.0f}  "
@@ -163,7 +165,7 @@ class SVRoute1WildEncounter(BaseScript):
                         break
                     frame2 = frame_grabber.get_latest_frame()
                     if frame2 is not None:
-                        r2, g2, b2 = self.avg_rgb(frame2, rx, ry, rw, rh)
+                        r2, g2, b2 = self.avg_rgb(frame2, *sprite.to_pixels(frame2.shape))
                         if (abs(r2 - br) > tol or
                                 abs(g2 - bg) > tol or
                                 abs(b2 - bb) > tol):
@@ -202,6 +204,21 @@ class SVRoute1WildEncounter(BaseScript):
 
     # ── Calibration ───────────────────────────────────────────────────────────
 
+    def _encounter_dark(self, frame_grabber) -> bool:
+        """
+        True once the encounter transition has darkened the screen centre.
+        The detector is then reset, so the next encounter must go dark
+        again rather than an overworld between `exit` and `enter` counting.
+        """
+        if self._transition is None:
+            self._transition = blackout(self.ENCOUNTER_DARK_THRESH,
+                                        self.ENCOUNTER_DARK_FRACTION,
+                                        px(*self.BRIGHTNESS_REGION))
+        if not self._transition.check(frame_grabber):
+            return False
+        self._transition.reset()
+        return True
+
     def _calibrate(self, controller, frame_grabber, stop_event,
                    log, request_calibration):
         """Walk into one encounter and capture the baseline sprite region."""
@@ -215,14 +232,10 @@ class SVRoute1WildEncounter(BaseScript):
                 controller.release_all()
                 return None
             time.sleep(self.ENCOUNTER_POLL_INTERVAL)
-            frame = frame_grabber.get_latest_frame()
-            if frame is not None:
-                bx, by, bw, bh = self.BRIGHTNESS_REGION
-                r, g, b = self.avg_rgb(frame, bx, by, bw, bh)
-                if (r + g + b) / 3 < self.ENCOUNTER_DARK_THRESH:
-                    controller.release_all()
-                    encountered = True
-                    break
+            if self._encounter_dark(frame_grabber):
+                controller.release_all()
+                encountered = True
+                break
         controller.release_all()
 
         if not encountered:
@@ -244,12 +257,12 @@ class SVRoute1WildEncounter(BaseScript):
             log("No frame — ensure webcam is connected.")
             return None
 
-        rx, ry, rw, rh = region
-        r, g, b = self.avg_rgb(frame, rx, ry, rw, rh)
+        r, g, b = self.avg_rgb(frame, *region)
         log(f"Baseline — R:{r:.1f}  G:{g:.1f}  B:{b:.1f}")
         log("Calibration complete. Default tolerance ±15 applied.")
         return {
-            'region': [rx, ry, rw, rh],
+            # Stored as fractions of the frame so it survives capture-size changes.
+            'region': Region.from_pixels(*region, frame.shape).to_json(),
             'baseline': [r, g, b],
             'tolerance': self.COLOUR_TOLERANCE,
         }
@@ -8,21 +8,31 @@ for random ones received from other players over the internet.
 How it works:
   1. Presses Y to open Poke Portal.
   2. Navigates down to Surprise Trade and presses A.
-  3. Selects the first Pokemon in Box 1 (A).
+  3. Moves the box cursor to the next occupied slot after the last one
+     offered (box_cursor.py, every press checked on screen; empty slots
+     skipped, moving on box by box) and selects it (A).
   4. Confirms the trade offer (A).
-  5. Waits TRADE_WAIT seconds for a partner to be found and the trade
-     to complete automatically in the background.
-  6. Presses A to collect the received Pokemon and close the result
-     screen.
-  7. Closes Poke Portal (B) and repeats.
+  5. Closes Poke Portal (B); the search runs in the background.
+  6. Watches NOTICE_REGION over the overworld for the trade notice
+     (trade_watch.py) instead of sitting in the portal for a fixed time.
+  7. Presses A to collect the received Pokemon, B to close any screen,
+     and offers the next one straight away. If no notice shows within
+     TRADE_WAIT, it collects anyway and offers again.
 
 Setup:
   - Connect to the internet / local wireless in-game before starting.
   - Save with Poke Portal accessible (Y button).
-  - Fill Box 1 with the Pokemon you want to trade away; the script
-    always picks position 1 (top-left) of the current box.
-  - Adjust TRADE_WAIT to the typical time it takes to find a partner
-    in your region (default 90 s — increase if trades time out).
+  - Fill the boxes with the Pokemon you want to trade away, starting
+    from the box Surprise Trade opens on.
+  - On the first trade, with the box open and the cursor on the top-left
+    slot, draw a region over the grid of slots, one over the cursor
+    highlight and one over the box name (a tiny box skips it). If the
+    cursor cannot be found from those, the script always offers slot 1 of
+    the current box, as before. Delete calibration/sv_surprise_trade.json
+    to recalibrate.
+  - Stand somewhere quiet: NOTICE_REGION (top of the screen) should not
+    have NPCs or Pokemon walking through it, or they may read as a notice.
+  - TRADE_WAIT (300 s) only matters when the notice is missed.
 
 Notes:
   - If the Poke Portal layout changes (DLC, updates), adjust
@@ -30,7 +40,24 @@ Notes:
   - PORTAL_OPEN_DELAY may need increasing on slower hardware.
 """
 
+import json
+import os
+import sys
+import time
 from scripts.base_script import BaseScript
+from scripts.box_cursor import BoxGrid, BoxNavigator, calibrate_box_grid
+from scripts.regions import px
+from scripts.trade_watch import TradeWatcher
+
+
+def _cal_path() -> str:
+    if getattr(sys, 'frozen', False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cal_dir = os.path.join(base, 'calibration')
+    os.makedirs(cal_dir, exist_ok=True)
+    return os.path.join(cal_dir, 'sv_surprise_trade.json')
 
 
 class SVSurpriseTrade(BaseScript):
@@ -43,26 +70,42 @@ class SVSurpriseTrade(BaseScript):
     # ── Settings ──────────────────────────────────────────────────────────────
     SURPRISE_TRADE_DOWN_PRESSES = 1   # Down presses from top of Poke Portal menu
                                        # to reach Surprise Trade
+    MAX_BOXES = 32                    # boxes to look through for the next Pokemon
+
+    # ── Trade notice detection ────────────────────────────────────────────────
+    NOTICE_REGION = px(0, 0, 640, 100)   # where the "trade complete" notice shows
+    NOTICE_CHANGE = 20.0                 # mean difference that counts as the notice
 
     # ── Timing (seconds) ─────────────────────────────────────────────────────
     PORTAL_OPEN_DELAY     = 2.0   # after Y, before menu is ready
     PORTAL_NAV_DELAY      = 0.8   # between Down presses in Poke Portal menu
     SURPRISE_OPEN_DELAY   = 2.0   # after A on Surprise Trade
     BOX_OPEN_DELAY        = 2.0   # after Box opens
+    BOX_PRESS_DELAY       = 0.3   # after each D-pad press in the box
     SELECT_MON_DELAY      = 1.5   # after A to select Pokemon
     CONFIRM_DELAY         = 1.5   # after A to confirm trade offer
-    TRADE_WAIT            = 90.0  # wait for partner + trade animations
+    TRADE_WAIT            = 300.0 # give up on the trade notice after this
+    NOTICE_SETTLE         = 2.0   # after the notice appears, before collecting
     COLLECT_A_DELAY       = 1.5   # between A presses to collect / close screens
     PORTAL_CLOSE_B_DELAY  = 1.5   # between B presses to close portal
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("SV Surprise Trade started.")
         log(
-            f"Trading indefinitely. TRADE_WAIT = {self.TRADE_WAIT}s. "
+            "Trading indefinitely, one trade per notice. "
             "Press ■ Stop at any time."
         )
 
         trade_count = 0
+        timeouts    = 0
+        started     = time.time()
+        watcher     = TradeWatcher(self.NOTICE_REGION, change=self.NOTICE_CHANGE)
+
+        cal = self._load_calibration()
+        navigator = self._navigator(cal, controller) if cal is not None else None
+        next_slot = 0
+        if navigator is not None:
+            log(f"Box calibration loaded from {_cal_path()}")
 
         while not stop_event.is_set():
 
@@ -80,9 +123,25 @@ class SVSurpriseTrade(BaseScript):
             controller.press_a()                  # open Surprise Trade
             if not self.wait(self.SURPRISE_OPEN_DELAY, stop_event): break
 
-            # ── Open box and select first Pokemon ─────────────────────────────
+            # ── Open box and select the next Pokemon ──────────────────────────
             if not self.wait(self.BOX_OPEN_DELAY, stop_event): break
-            controller.press_a()                  # select first Pokemon (Box 1 pos 1)
+
+            if cal is None:
+                cal = self._calibrate(frame_grabber, stop_event, log, request_calibration)
+                if stop_event.is_set(): break
+                navigator = self._navigator(cal, controller)
+
+            if navigator is not None:
+                slot = navigator.next_occupied(frame_grabber, stop_event,
+                                               next_slot, self.MAX_BOXES)
+                if stop_event.is_set(): break
+                if slot is None:
+                    log("No Pokemon left to trade (or the box cursor was lost) — stopping.")
+                    break
+                next_slot = slot + 1
+                log(f"Offering box slot {slot + 1}.")
+
+            controller.press_a()                  # select the highlighted Pokemon
             if not self.wait(self.SELECT_MON_DELAY, stop_event): break
 
             # ── Confirm trade offer ───────────────────────────────────────────
@@ -91,12 +150,26 @@ class SVSurpriseTrade(BaseScript):
             controller.press_a()                  # confirm
             if not self.wait(self.CONFIRM_DELAY, stop_event): break
 
-            # ── Wait for trade to complete ────────────────────────────────────
+            # ── Close Poke Portal; the search carries on in the background ───
+            for _ in range(2):
+                if stop_event.is_set(): break
+                controller.press_b()
+                if not self.wait(self.PORTAL_CLOSE_B_DELAY, stop_event): break
+            if stop_event.is_set(): break
+
+            # ── Wait for the trade notice over the overworld ──────────────────
             log(
                 f"Trade #{trade_count + 1} offered. "
-                f"Waiting up to {self.TRADE_WAIT}s for partner..."
+                f"Watching for the trade notice (up to {self.TRADE_WAIT:.0f}s)..."
             )
-            if not self.wait(self.TRADE_WAIT, stop_event): break
+            offered = time.time()
+            watcher.arm(frame_grabber)
+            seen = watcher.wait_for_change(frame_grabber, stop_event, self.TRADE_WAIT)
+            if stop_event.is_set(): break
+            if seen is None:
+                timeouts += 1
+                log("No trade notice seen — collecting anyway and offering again.")
+            elif not self.wait(self.NOTICE_SETTLE, stop_event): break
 
             # ── Collect received Pokemon ──────────────────────────────────────
             for _ in range(4):
@@ -105,14 +178,51 @@ class SVSurpriseTrade(BaseScript):
                 if not self.wait(self.COLLECT_A_DELAY, stop_event): break
             if stop_event.is_set(): break
 
-            # ── Close Poke Portal ─────────────────────────────────────────────
             for _ in range(2):
                 if stop_event.is_set(): break
                 controller.press_b()
                 if not self.wait(self.PORTAL_CLOSE_B_DELAY, stop_event): break
             if stop_event.is_set(): break
 
+            if seen is None:
+                continue
             trade_count += 1
-            log(f"Trade #{trade_count} complete.")
+            hours = (time.time() - started) / 3600.0
+            log(f"Trade #{trade_count} complete after {time.time() - offered:.0f}s "
+                f"({trade_count / hours:.0f} trades/hour, {timeouts} timed out).")
 
         log("SV Surprise Trade stopped.")
+
+    # ── Box navigation ────────────────────────────────────────────────────────
+
+    def _navigator(self, cal, controller):
+        grid = BoxGrid.from_calibration(cal)
+        if grid is None:
+            return None
+        return BoxNavigator(grid, controller, self.wait, press_delay=self.BOX_PRESS_DELAY)
+
+    def _calibrate(self, frame_grabber, stop_event, log, request_calibration):
+        """First box opening: calibrate the grid, or record that it is skipped."""
+        log("Box calibration — the Surprise Trade box is open.")
+        cal = calibrate_box_grid(frame_grabber, stop_event, log, request_calibration)
+        if stop_event.is_set():
+            return {}
+        if not cal:
+            log("Falling back to slot 1 of the current box. Delete "
+                f"{_cal_path()} to calibrate again.")
+        self._save_calibration(cal)
+        return cal
+
+    def _load_calibration(self):
+        path = _cal_path()
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _save_calibration(self, cal):
+        with open(_cal_path(), 'w') as f:
+            json.dump(cal, f, indent=2)
@@ -15,21 +15,33 @@ How it works:
   4. First encounter: records the dark-duration as the baseline, then gives
      you a 10-second window to press Stop if it might already be a shiny.
      Threshold is set to baseline + SHINY_EXTRA_SECONDS.
-  5. Subsequent encounters: if dark-duration >= threshold → shiny detected,
-     script pauses so you can catch it.
+     With SPRITE_CHECK on, you also draw a region over each of the five
+     wild Pokemon there (their colours become per-slot baselines).
+  5. Subsequent encounters: the dark-phase time and the five sprites are
+     fused into one confidence (fusion.py). A dark phase >= threshold
+     calls a shiny at once; otherwise the sprites are compared on the
+     first settled battle frame (horde.py), and any slot off its baseline
+     → shiny detected, script pauses so you can catch it. The log names
+     the deviating slot.
   6. If not shiny: flees with Down → Right → A and repeats.
 
 Setup:
   - Save in a location with hordes of the Pokemon you want to hunt.
   - Ensure the first Pokemon in your party knows Sweet Scent.
   - Position the LDR so it faces the 3DS bottom screen.
-  - Tune LDR_DARK_THRESHOLD using the Live button on the Light Sensor dial
-    in the app. It should be above the value when the screen is dark and
-    below the value when the screen is bright.
+  - Run the Light Sensor Test once with the LDR in place: its measured
+    dark threshold and step (calibration/light_sensor.json) replace
+    LDR_DARK_THRESHOLD and LDR_STEP_CHANGE.
+  - Otherwise tune LDR_DARK_THRESHOLD using the Live button on the Light
+    Sensor dial in the app. It should be above the value when the screen
+    is dark and below the value when the screen is bright.
 """
 
 import time
 from scripts.base_script import BaseScript
+from scripts.fusion import Evidence, HordeSensor, SensorFusion
+from scripts.horde import HordeDetector, calibrate_horde_slots
+from scripts.ldr_profile import apply_device_latency, load_ldr_profile
 
 
 class HordeEncounters(BaseScript):
@@ -61,6 +73,10 @@ class HordeEncounters(BaseScript):
     # ── Shiny detection ───────────────────────────────────────────────────────
     SHINY_EXTRA_SECONDS    = 1.2   # threshold = baseline + this
     BASELINE_STOP_WINDOW   = 10.0  # seconds to press Stop after first baseline
+    SPRITE_CHECK           = True  # also compare all five sprites to their baselines
+    SPRITE_TIMEOUT         = 6.0   # max wait for the battle screen to settle
+    TIMING_WEIGHT          = 0.5   # fused weight of the dark-phase time
+    SPRITE_WEIGHT          = 1.0   # fused weight of the sprite check
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("XY - Horde Encounter started.")
@@ -78,6 +94,7 @@ class HordeEncounters(BaseScript):
             log("Screen calibration cancelled — stopping.")
             return
         log(f"Screen calibrated ({warp_info['out_w']}×{warp_info['out_h']} px).")
+        self._apply_ldr_profile(frame_grabber, log)
 
         log(
             f"LDR dark threshold: {self.LDR_DARK_THRESHOLD}  "
@@ -87,6 +104,8 @@ class HordeEncounters(BaseScript):
         log("Horde encounter loop running. Press Stop at any time.")
 
         threshold = None
+        detector = None
+        fusion = None
         encounter_count = 0
 
         while not stop_event.is_set():
@@ -146,6 +165,13 @@ class HordeEncounters(BaseScript):
                     f"Baseline: {elapsed:.2f}s → shiny threshold: {threshold:.2f}s "
                     f"(+{self.SHINY_EXTRA_SECONDS:.1f}s)"
                 )
+                if self.SPRITE_CHECK:
+                    detector = HordeDetector.from_calibration(calibrate_horde_slots(
+                        frame_grabber, stop_event, log, request_calibration))
+                    if stop_event.is_set(): break
+                    if detector is None:
+                        log("No sprite regions — using the dark-phase timing only.")
+                fusion = self._fusion(detector)
                 log(
                     f"If this first encounter is shiny, press Stop now "
                     f"({self.BASELINE_STOP_WINDOW:.0f}s window)."
@@ -158,17 +184,33 @@ class HordeEncounters(BaseScript):
                 if not self._flee(controller, stop_event): break
                 continue
 
-            # ── Shiny check ───────────────────────────────────────────────────
-            if elapsed >= threshold:
-                log(
-                    f"*** SHINY DETECTED! Encounter #{encounter_count} — "
-                    f"{elapsed:.2f}s >= {threshold:.2f}s ***"
-                )
+            # ── Shiny check: dark-phase timing and sprites, fused ─────────────
+            timing = Evidence('timing', self._timing_score(elapsed, threshold),
+                              self.TIMING_WEIGHT)
+            verdict = fusion.decide(controller, frame_grabber, stop_event,
+                                    self.SPRITE_TIMEOUT, prior=[timing])
+            if verdict is None: break
+            shiny_slots = fusion.camera.slots if fusion.camera is not None else None
+
+            if verdict.shiny:
+                log(f"Fused shiny check: {verdict}")
+                if elapsed >= threshold:
+                    log(
+                        f"*** SHINY DETECTED! Encounter #{encounter_count} — "
+                        f"{elapsed:.2f}s >= {threshold:.2f}s ***"
+                    )
+                if shiny_slots:
+                    log(
+                        f"*** SHINY DETECTED! Encounter #{encounter_count} — "
+                        f"{detector.describe(shiny_slots)} ***"
+                    )
                 log("Script paused — catch your shiny! Press Stop when done.")
                 stop_event.wait()
                 break
 
             # ── Not shiny — flee ──────────────────────────────────────────────
+            if verdict.shiny is None:
+                log("Battle screen did not settle — using the dark-phase timing only.")
             log(
                 f"Encounter #{encounter_count}: not shiny "
                 f"({elapsed:.2f}s < {threshold:.2f}s) — fleeing."
@@ -177,8 +219,38 @@ class HordeEncounters(BaseScript):
 
         log("XY - Horde Encounter stopped.")
 
+    # ── Fused shiny check ──────────────────────────────────────────────────────
+
+    def _fusion(self, detector) -> SensorFusion:
+        """
+        Timing (a prior) plus the sprites. Either one calls a shiny; "not
+        shiny" needs the sprites, or the timing alone without them.
+        """
+        if detector is None:
+            return SensorFusion(accept=self.TIMING_WEIGHT, reject=0.0)
+        return SensorFusion(camera=HordeSensor(detector, self.SPRITE_WEIGHT),
+                            accept=self.TIMING_WEIGHT, reject=-self.SPRITE_WEIGHT)
+
+    def _timing_score(self, elapsed, threshold) -> float:
+        """+1 at or over the threshold, down to -1 a full margin under it."""
+        if elapsed >= threshold:
+            return 1.0
+        return -min(1.0, (threshold - elapsed) / self.SHINY_EXTRA_SECONDS)
+
     # ── LDR helpers ────────────────────────────────────────────────────────────
 
+    def _apply_ldr_profile(self, frame_grabber, log):
+        """Use the threshold and step measured by the Light Sensor Test, if any."""
+        profile = load_ldr_profile()
+        if profile is None:
+            log("LDR not measured — using LDR_DARK_THRESHOLD / LDR_STEP_CHANGE "
+                "(run the Light Sensor Test to measure them).")
+            return
+        self.LDR_DARK_THRESHOLD = profile.threshold
+        self.LDR_STEP_CHANGE = profile.step
+        apply_device_latency(frame_grabber, profile)
+        log(f"LDR profile loaded: {profile}")
+
     def _ldr_wait_dark(self, controller, stop_event) -> bool:
         """Wait for LDR to drop below LDR_DARK_THRESHOLD."""
         deadline = time.time() + self.DARK_WAIT_TIMEOUT
@@ -89,6 +89,21 @@ class BaseScript(ABC):
             time.sleep(0.05)
         return True
 
+    @staticmethod
+    def detect(frame_grabber, fn, *args, deadline: Optional[float] = None):
+        """
+        Run a detection function fn(*args) and return its result.
+
+        Under the headless orchestrator the call is queued on the shared,
+        bounded detection pool; if `deadline` (a time.time() value) passes
+        before a worker is free it returns None instead of running late.
+        Under the GUI it simply calls fn(*args) in the script's thread.
+        """
+        runner = getattr(frame_grabber, 'detect', None)
+        if runner is None:
+            return fn(*args)
+        return runner(fn, *args, deadline=deadline)
+
     @staticmethod
     def avg_rgb(frame, x: int, y: int, w: int, h: int) -> Tuple[float, float, float]:
         """
@@ -99,3 +114,14 @@ class BaseScript(ABC):
         region = frame[y:y + h, x:x + w]       # BGR slice
         mean = region.mean(axis=(0, 1))          # [B_avg, G_avg, R_avg]
         return float(mean[2]), float(mean[1]), float(mean[0])   # → (R, G, B)
+
+    @staticmethod
+    def count_target_pixels(frame, x: int, y: int, w: int, h: int,
+                            tr: float, tg: float, tb: float, tolerance: float) -> int:
+        """
+        Count pixels in a rectangular region of a BGR frame whose R, G and B
+        are each within ±tolerance of the target colour (tr, tg, tb).
+        """
+        from scripts.colour_classes import target_classes
+        classes = target_classes(float(tr), float(tg), float(tb), float(tolerance))
+        return classes.count(frame[y:y + h, x:x + w])['target']
@@ -0,0 +1,430 @@
+"""
+Box cursor — find the PC box cursor on screen and move it with checks.
+
+Trading scripts walked the box blind: a slot number turned into Right and
+Down presses with a fixed delay after each, so one dropped press put every
+later trade on the wrong Pokemon. BoxGrid reads the box from the frame
+instead:
+
+  * the grid is calibrated once (a region over the 6×5 slots) together
+    with the colour of the cursor highlight;
+  * locate() returns the slot whose cell holds the most highlight-coloured
+    pixels, so the cursor position is known after every press;
+  * is_empty() tells empty slots (a flat cell) from occupied ones.
+
+BoxNavigator moves the cursor one press at a time along the shortest path
+and checks each step on screen: a dropped press is pressed again, an
+overshoot is re-planned from where the cursor really is. next_occupied()
+walks to the next occupied slot from a given one, moving on to the next
+box at the end of a box, so a batch run can go through box after box
+unattended. A received Pokemon lands in the traded one's slot, so a
+trading script keeps its own slot counter rather than looking for the
+first occupied slot.
+
+The box change itself is checked too: the grid and the box name (the
+header region, if calibrated) must look different after Right. If they
+do not, Right is pressed again; a box change that never shows (the last
+box, or two empty boxes with no header region) ends the walk rather than
+scanning the same box again from its first slot.
+
+Slots are numbered row by row from 0 (top-left) to rows × cols - 1.
+
+Example
+-------
+from scripts.box_cursor import BoxGrid, BoxNavigator, calibrate_box_grid
+
+cal.update(calibrate_box_grid(frame_grabber, stop_event, log, request_calibration))
+...
+grid = BoxGrid.from_calibration(cal)
+navigator = BoxNavigator(grid, controller, self.wait)
+slot = navigator.next_occupied(frame_grabber, stop_event, start=next_slot)
+if slot is None:
+    log("No Pokemon left in the boxes.")
+next_slot = slot + 1                        # after the trade
+"""
+
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from scripts.regions import Region
+
+
+class BoxGrid:
+    """The slots of one PC box, the cursor highlight and empty slots."""
+
+    def __init__(self, region: Region, cursor_bgr: Sequence[float], rows: int = 5,
+                 cols: int = 6, tolerance: int = 40, min_share: float = 0.02,
+                 empty_std: float = 10.0, header: Optional[Region] = None,
+                 change: float = 6.0):
+        """
+        Parameters
+        ----------
+        region : Region
+            The whole grid of slots.
+        cursor_bgr : (B, G, R)
+            Colour of the cursor highlight.
+        rows, cols : int
+            Grid size (5 × 6 in every game from Gen 4 on).
+        tolerance : int
+            Per-channel distance from `cursor_bgr` that counts as highlight.
+        min_share : float
+            Share of a cell that must be highlight for the cursor to be on it.
+        empty_std : float
+            A slot whose centre has a lower brightness spread is empty.
+        header : Region or None
+            The box name above the grid, to see a box change.
+        change : float
+            Mean brightness difference (0-255) of the grid or header that
+            counts as a different box.
+        """
+        self.region = region
+        self.cursor_bgr = np.array(cursor_bgr, np.int16)
+        self.rows = rows
+        self.cols = cols
+        self.tolerance = tolerance
+        self.min_share = min_share
+        self.empty_std = empty_std
+        self.header = header
+        self.change = change
+
+    @classmethod
+    def from_calibration(cls, cal: dict, **kwargs) -> Optional['BoxGrid']:
+        """Grid for a calibration written with calibrate_box_grid(), else None."""
+        if 'box_grid' not in cal:
+            return None
+        header = Region.from_json(cal['box_header']) if cal.get('box_header') else None
+        return cls(Region.from_json(cal['box_grid']), cal['box_cursor_bgr'],
+                   header=header, **kwargs)
+
+    @property
+    def slots(self) -> int:
+        return self.rows * self.cols
+
+    def _cells(self, frame) -> List[np.ndarray]:
+        """Views of each slot's cell, row by row."""
+        grid = self.region.crop(frame)
+        h, w = grid.shape[:2]
+        return [grid[r * h // self.rows:(r + 1) * h // self.rows,
+                     c * w // self.cols:(c + 1) * w // self.cols]
+                for r in range(self.rows) for c in range(self.cols)]
+
+    # ── Cursor ────────────────────────────────────────────────────────────────
+
+    def cursor_shares(self, frame) -> np.ndarray:
+        """Share of highlight-coloured pixels in each slot's cell."""
+        shares = np.zeros(self.slots)
+        for i, cell in enumerate(self._cells(frame)):
+            near = np.abs(cell.astype(np.int16) - self.cursor_bgr) <= self.tolerance
+            shares[i] = near.all(axis=2).mean() if cell.size else 0.0
+        return shares
+
+    def locate(self, frame) -> Optional[int]:
+        """Slot the cursor is on, or None if no cell clearly holds it."""
+        shares = self.cursor_shares(frame)
+        best = int(np.argmax(shares))
+        if shares[best] < self.min_share:
+            return None
+        runner_up = np.partition(shares, -2)[-2] if self.slots > 1 else 0.0
+        return best if shares[best] > 1.5 * runner_up else None
+
+    # ── Slots ─────────────────────────────────────────────────────────────────
+
+    def is_empty(self, frame, slot: int) -> bool:
+        """True if the centre of the slot's cell is flat (no Pokemon icon)."""
+        cell = self._cells(frame)[slot]
+        h, w = cell.shape[:2]
+        centre = cell[h // 4:h - h // 4, w // 4:w - w // 4]
+        return float(centre.mean(axis=2).std()) < self.empty_std
+
+    def occupied(self, frame) -> List[int]:
+        return [i for i in range(self.slots) if not self.is_empty(frame, i)]
+
+    # ── Box ───────────────────────────────────────────────────────────────────
+
+    def view(self, frame) -> List[np.ndarray]:
+        """Coarse brightness of the grid (and header) to compare boxes by."""
+        regions = [self.region] + ([self.header] if self.header is not None else [])
+        return [region.crop(frame)[::4, ::4].mean(axis=2) for region in regions]
+
+    def box_changed(self, before: List[np.ndarray], frame) -> bool:
+        """True if the grid or the header of `frame` differs from `before`."""
+        return any(a.shape == b.shape and float(np.abs(a - b).mean()) >= self.change
+                   for a, b in zip(before, self.view(frame)))
+
+
+class BoxNavigator:
+    """Moves the box cursor press by press, checking each step on screen."""
+
+    def __init__(self, grid: BoxGrid, controller, wait, press_delay: float = 0.3,
+                 verify_timeout: float = 1.0, retries: int = 3):
+        """
+        Parameters
+        ----------
+        grid : BoxGrid
+        controller
+            The script's controller.
+        wait : callable(seconds, stop_event) -> bool
+            The script's wait (BaseScript.wait).
+        press_delay : float
+            Wait after each press before looking for the cursor.
+        verify_timeout : float
+            How long to keep looking for the cursor after a press.
+        retries : int
+            Consecutive presses that may fail before giving up.
+        """
+        self.grid = grid
+        self.controller = controller
+        self.wait = wait
+        self.press_delay = press_delay
+        self.verify_timeout = verify_timeout
+        self.retries = retries
+        self.presses = 0
+        self.repeats = 0
+
+    def where(self, frame_grabber, stop_event, previous: Optional[int] = None) -> Optional[int]:
+        """
+        Current cursor slot. With `previous`, keep looking (up to
+        verify_timeout) for the cursor to leave that slot.
+        """
+        deadline = time.time() + self.verify_timeout
+        slot = None
+        while not stop_event.is_set():
+            frame = frame_grabber.get_latest_frame()
+            if frame is not None:
+                slot = self.grid.locate(frame)
+                if slot is not None and slot != previous:
+                    return slot
+            if time.time() >= deadline:
+                return slot
+            time.sleep(0.03)
+        return None
+
+    def _press(self, direction: str):
+        getattr(self.controller, 'press_' + direction)()
+        self.presses += 1
+
+    def move_to(self, frame_grabber, stop_event, target: int) -> bool:
+        """Move the cursor onto `target`; False if it cannot be seen or moved."""
+        current = self.where(frame_grabber, stop_event)
+        failures = 0
+        while not stop_event.is_set():
+            if current is None:
+                failures += 1
+                if failures > self.retries:
+                    return False
+                current = self.where(frame_grabber, stop_event)
+                continue
+            if current == target:
+                return True
+            row, col = divmod(current, self.grid.cols)
+            t_row, t_col = divmod(target, self.grid.cols)
+            if col != t_col:
+                direction, expected = ('right', current + 1) if t_col > col else ('left', current - 1)
+            else:
+                step = self.grid.cols if t_row > row else -self.grid.cols
+                direction, expected = ('down' if step > 0 else 'up'), current + step
+            self._press(direction)
+            if not self.wait(self.press_delay, stop_event):
+                return False
+            moved = self.where(frame_grabber, stop_event, previous=current)
+            if moved != expected:
+                # Dropped press (still on `current`), overshoot, or lost
+                self.repeats += 1
+                failures += 1
+                if failures > self.retries:
+                    return False
+            else:
+                failures = 0
+            current = moved
+        return False
+
+    def next_box(self, frame_grabber, stop_event) -> bool:
+        """
+        Switch to the next box through the box header: Up from the top row
+        until the cursor leaves the grid, Right until the box looks
+        different, then Down until the cursor is back. Each press is
+        repeated up to `retries` times; False if one never shows, so a
+        box change that cannot be seen is never taken for one.
+        """
+        if not self.move_to(frame_grabber, stop_event, 0):
+            return False
+        for direction in ('up', 'right', 'down'):
+            before = None
+            if direction == 'right':
+                frame = frame_grabber.get_latest_frame()
+                if frame is None:
+                    return False
+                before = self.grid.view(frame)
+            for _ in range(self.retries + 1):
+                self._press(direction)
+                if not self.wait(self.press_delay, stop_event):
+                    return False
+                if before is not None:
+                    if self._box_changed(frame_grabber, stop_event, before):
+                        break
+                elif self._on_grid(frame_grabber, stop_event, direction == 'down'):
+                    break
+                self.repeats += 1
+            else:
+                return False
+        return True
+
+    def _box_changed(self, frame_grabber, stop_event, before) -> bool:
+        """Wait up to verify_timeout for the box to look different from `before`."""
+        deadline = time.time() + self.verify_timeout
+        while not stop_event.is_set():
+            frame = frame_grabber.get_latest_frame()
+            if frame is not None and self.grid.box_changed(before, frame):
+                return True
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.03)
+        return False
+
+    def _on_grid(self, frame_grabber, stop_event, wanted: bool) -> bool:
+        """Wait up to verify_timeout for the cursor to be on (or off) the grid."""
+        deadline = time.time() + self.verify_timeout
+        while not stop_event.is_set():
+            frame = frame_grabber.get_latest_frame()
+            if frame is not None and (self.grid.locate(frame) is not None) == wanted:
+                return True
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.03)
+        return False
+
+    def next_occupied(self, frame_grabber, stop_event, start: int = 0,
+                      max_boxes: int = 32) -> Optional[int]:
+        """
+        Put the cursor on the first occupied slot at or after `start`,
+        moving on to the next box (from its first slot) when there is none,
+        up to `max_boxes` times. Returns the slot, or None if every box was
+        empty, the next box could not be reached or the cursor was lost.
+        """
+        for _ in range(max_boxes):
+            frame = frame_grabber.get_latest_frame()
+            if frame is None or stop_event.is_set():
+                return None
+            occupied = [i for i in self.grid.occupied(frame) if i >= start]
+            if occupied:
+                return occupied[0] if self.move_to(frame_grabber, stop_event, occupied[0]) else None
+            if not self.next_box(frame_grabber, stop_event):
+                return None
+            start = 0
+        return None
+
+
+def calibrate_box_grid(frame_grabber, stop_event, log, request_calibration) -> dict:
+    """
+    Ask for the box grid, the cursor highlight and the box name while the
+    box is open with the cursor on the top-left slot; return the
+    calibration entries BoxGrid.from_calibration() reads, or {} if the
+    cursor cannot be found. A tiny (or cancelled) box name region is
+    skipped; box changes are then seen from the grid alone.
+    """
+    log("Open the box with the cursor on the top-left slot.")
+    grid_rect = request_calibration("Draw region over the whole grid of box slots")
+    if stop_event.is_set():
+        return {}
+    cursor_rect = request_calibration("Draw a small region over the cursor highlight")
+    if stop_event.is_set():
+        return {}
+    header_rect = request_calibration("Draw region over the box name (tiny box to skip)")
+    if stop_event.is_set():
+        return {}
+    time.sleep(0.1)
+    frame = frame_grabber.get_latest_frame()
+    if frame is None:
+        return {}
+    x, y, w, h = cursor_rect
+    bgr = [float(v) for v in frame[y:y + h, x:x + w].reshape(-1, 3).mean(axis=0)]
+    header = None
+    if header_rect is not None and min(header_rect[2], header_rect[3]) >= 4:
+        header = Region.from_pixels(*header_rect, frame_shape=frame.shape)
+    grid = BoxGrid(Region.from_pixels(*grid_rect, frame_shape=frame.shape), bgr, header=header)
+    slot = grid.locate(frame)
+    if slot != 0:
+        where = "not found in the grid" if slot is None else f"found on slot {slot + 1}"
+        log(f"Cursor {where}, not on the top-left slot — box navigation disabled.")
+        return {}
+    log(f"Box grid calibrated; cursor colour B:{bgr[0]:.0f} G:{bgr[1]:.0f} R:{bgr[2]:.0f}, "
+        f"{len(grid.occupied(frame))} occupied slot(s).")
+    return {'box_grid': grid.region.to_json(), 'box_cursor_bgr': [round(v, 1) for v in bgr],
+            'box_header': header.to_json() if header is not None else None}
+
+
+if __name__ == '__main__':
+    import threading
+
+    class _Box:
+        """A drawn 6×5 box: icons in `filled` slots, a yellow cursor bar on
+        `cursor`, the box number as a dark mark in the header; every third
+        press is dropped."""
+
+        def __init__(self, filled, cursor=0):
+            self.boxes = [set(filled), set(range(30))]
+            self.box, self.cursor, self.pressed = 0, cursor, 0
+            self.header = False
+
+        def get_latest_frame(self):
+            frame = np.full((480, 640, 3), 200, np.uint8)
+            frame[60:90, 80 + self.box * 40:120 + self.box * 40] = 0
+            rng = np.random.default_rng(1)
+            for slot in self.boxes[self.box]:
+                r, c = divmod(slot, 6)
+                frame[100 + r * 60 + 15:100 + r * 60 + 45, 80 + c * 80 + 20:80 + c * 80 + 60] = \
+                    rng.integers(0, 255, (30, 40, 3), np.uint8)
+            if not self.header:
+                r, c = divmod(self.cursor, 6)
+                frame[100 + r * 60:100 + r * 60 + 6, 80 + c * 80 + 10:80 + c * 80 + 70] = (0, 220, 250)
+            return frame
+
+        def _move(self, direction):
+            self.pressed += 1
+            if self.pressed % 3 == 0:
+                return                                   # dropped press
+            r, c = divmod(self.cursor, 6)
+            if self.header:
+                if direction == 'right':
+                    self.box = min(self.box + 1, len(self.boxes) - 1)
+                elif direction == 'down':
+                    self.header = False
+                return
+            if direction == 'up' and r == 0:
+                self.header = True
+                return
+            r += {'up': -1, 'down': 1}.get(direction, 0)
+            c += {'left': -1, 'right': 1}.get(direction, 0)
+            self.cursor = min(4, max(0, r)) * 6 + min(5, max(0, c))
+
+        def __getattr__(self, name):
+            if name.startswith('press_'):
+                return lambda: self._move(name[6:])
+            raise AttributeError(name)
+
+    box = _Box(filled=[], cursor=0)
+    grid = BoxGrid(Region.from_pixels(80, 100, 480, 300), (0, 220, 250),
+                   header=Region.from_pixels(80, 60, 480, 30))
+    navigator = BoxNavigator(grid, box, lambda s, e: True, verify_timeout=0.05)
+    stop = threading.Event()
+    assert grid.locate(box.get_latest_frame()) == 0
+    assert navigator.move_to(box, stop, 29) and box.cursor == 29
+    assert navigator.move_to(box, stop, 7) and box.cursor == 7
+    box.boxes[0] = {3, 17, 22}
+    assert navigator.next_occupied(box, stop, start=4) == 17
+    slot = navigator.next_occupied(box, stop, start=23)
+    print(f"slot {slot} in box {box.box}; {navigator.presses} presses, "
+          f"{navigator.repeats} dropped/re-planned")
+    assert slot == 0 and box.box == 1
+    # Box 2 is the last: Right changes nothing, so the walk ends there
+    # instead of offering its first slot again.
+    assert navigator.next_occupied(box, stop, start=30) is None and box.box == 1
+    # Two empty boxes without a header region look the same: not a change.
+    box = _Box(filled=[], cursor=0)
+    box.boxes[1] = set()
+    navigator = BoxNavigator(BoxGrid(grid.region, (0, 220, 250)), box,
+                             lambda s, e: True, verify_timeout=0.05)
+    assert navigator.next_occupied(box, stop, start=0, max_boxes=3) is None
+    print("PASS")
@@ -0,0 +1,574 @@
+"""
+Capture — headless frame sources for running scripts without the GUI.
+
+SharedCapture owns one capture device (or a video file, replayed in a loop)
+and decodes it on a single background thread. Any number of ConsoleGrabber
+views can attach to the same SharedCapture, so two scripts watching the
+same console never decode the video twice.
+
+ConsoleGrabber exposes the same methods scripts already call on the GUI's
+FrameGrabber (get_latest_frame, set_crop, clear_crop, set_detect_overlay,
+clear_detect_overlay), so existing scripts run unchanged.
+
+With bus=True the capture decodes straight into a shared-memory FrameBus
+(see frame_bus.py). Readers that only look at pixels can then borrow the
+newest frame with read() instead of taking a copy, and other processes can
+attach to capture.bus.handle().
+
+Each decoded frame is also reduced once to a tiny area-averaged level
+(80×60 by default, see pyramid.py). Coarse screen-state checks read it
+through get_coarse_frame() without touching the full frame.
+
+With mjpeg=True the capture takes the card's compressed MJPEG frames and
+decodes them itself, at 1/2, 1/4 or 1/8 scale (JPEG DCT scaling) whenever
+no attached view needs full resolution. Views ask for a scale with
+ConsoleGrabber.set_decode_scale() — or the pyramid.reduced_decode() context
+manager around coarse-only phases — and the capture decodes at the finest
+scale any view currently asks for. Views start at full scale, so scripts
+that never ask keep full-resolution frames.
+
+With history_seconds > 0 the decode thread also keeps the last few seconds
+of downscaled frames in a FrameHistory (see history.py), shared by every
+view as `grabber.history`.
+
+Every frame carries a FrameInfo (arrival time, sequence number, decode
+time, frames lost before it) and feeds the capture's rolling CaptureStats
+(see frame_stats.py). Views expose them as `grabber.frame_info()` — for
+the frame the view read last — and `grabber.stats`.
+
+Example
+-------
+from scripts.capture import SharedCapture, ConsoleGrabber
+
+capture = SharedCapture(0)              # first USB capture card
+capture.start()
+grabber = ConsoleGrabber(capture)
+frame = grabber.get_latest_frame()      # BGR numpy array (640×480)
+capture.stop()
+"""
+
+import threading
+import time
+import weakref
+from typing import Optional, Tuple, Union
+
+from scripts.frame_bus import FrameBus, _NullRef
+from scripts.frame_stats import CaptureStats, FrameInfo
+from scripts.history import FrameHistory
+from scripts.overlay import Overlay
+from scripts.pyramid import COARSE_SIZE, coarse_sample, downscale
+
+
+DECODE_SCALES = (1, 2, 4, 8)
+_IMREAD_FLAGS = {
+    1: 'IMREAD_COLOR',
+    2: 'IMREAD_REDUCED_COLOR_2',
+    4: 'IMREAD_REDUCED_COLOR_4',
+    8: 'IMREAD_REDUCED_COLOR_8',
+}
+_INFO_RING = 64         # FrameInfo kept for frames still likely to be read
+
+
+class SharedCapture:
+    """One decode thread per capture device, shared by every attached view."""
+
+    def __init__(self, source: Union[int, str], width: int = 640, height: int = 480,
+                 bus: bool = False, bus_slots: int = 6,
+                 coarse_size: Optional[Tuple[int, int]] = COARSE_SIZE,
+                 mjpeg: bool = False, history_seconds: float = 0.0,
+                 history_size: Tuple[int, int] = (320, 240)):
+        """
+        Parameters
+        ----------
+        source : int or str
+            OpenCV device index, or a path to a video file. Files are
+            replayed in a loop at their recorded frame rate.
+        width, height : int
+            Size every decoded frame is scaled to. Scripts assume 640×480.
+        bus : bool
+            Decode into a shared-memory FrameBus of `bus_slots` slots.
+        coarse_size : (w, h) or None
+            Size of the per-frame coarse level; None disables it.
+        mjpeg : bool
+            Read compressed MJPEG frames and decode them here, so views can
+            ask for reduced-scale decoding. Falls back to normal capture if
+            the device or file does not deliver raw JPEG frames.
+        history_seconds : float
+            Keep this many seconds of frames, downscaled to `history_size`
+            (w, h), for retroactive checks. 0 disables the history.
+        """
+        self.source = source
+        self.width = width
+        self.height = height
+        self.bus = FrameBus((height, width, 3), bus_slots) if bus else None
+        self.coarse_size = coarse_size
+        self.mjpeg = mjpeg
+        self.history = (FrameHistory(history_seconds, size=history_size)
+                        if history_seconds > 0 else None)
+        self.stats = CaptureStats(infer_gaps=not self.is_replay)
+
+        self._cap = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = 0.0
+        self._seq = 0
+        self._coarse = None
+        self._raw = False
+        self._frame_scale = 1
+        self._scale_requests = weakref.WeakKeyDictionary()
+        self._infos = [None] * _INFO_RING
+
+    @property
+    def is_replay(self) -> bool:
+        return isinstance(self.source, str)
+
+    @property
+    def decode_scale(self) -> int:
+        """Scale the next frame will be decoded at (1 = full resolution)."""
+        with self._cond:
+            return min(self._scale_requests.values(), default=1)
+
+    @property
+    def frame_scale(self) -> int:
+        """Scale the newest frame was decoded at (always 1 without mjpeg)."""
+        with self._cond:
+            return self._frame_scale
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self):
+        if self._thread is not None:
+            return
+        import cv2
+        self._cap = cv2.VideoCapture(self.source)
+        if not self._cap.isOpened():
+            raise RuntimeError(f"Could not open capture source {self.source!r}")
+        if not self.is_replay:
+            self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.mjpeg:
+            if self.is_replay:
+                self._cap.set(cv2.CAP_PROP_FORMAT, -1)          # undecoded packets
+            else:
+                self._cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"capture-{self.source}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def close(self) -> bool:
+        """
+        Stop decoding and free the frame bus, if any. False if a borrowed
+        frame is still held (see FrameBus.close); the bus is then kept.
+        """
+        self.stop()
+        if self.bus is not None:
+            if not self.bus.close():
+                return False
+            self.bus = None
+        return True
+
+    # ── Frame access ──────────────────────────────────────────────────────────
+
+    def latest(self) -> Tuple[Optional[object], float, int]:
+        """
+        Return (frame, timestamp, seq) for the newest decoded frame.
+
+        The frame is shared with every other reader and must not be
+        modified. timestamp is time.time() when the frame finished decoding;
+        seq increases by one per frame and is 0 until the first frame.
+        In bus mode the frame is a private copy, since bus slots are reused.
+        """
+        if self.bus is not None:
+            with self.bus.read() as ref:
+                if ref is None:
+                    return None, 0.0, 0
+                return ref.frame.copy(), ref.timestamp, ref.seq
+        with self._cond:
+            return self._frame, self._timestamp, self._seq
+
+    def read(self, after_seq: int = 0):
+        """
+        Borrow the newest frame without copying it.
+
+        Returns a ref with .frame (read-only), .timestamp and .seq that is
+        also a context manager, or a falsy placeholder whose `with` target is
+        None if there is no frame newer than `after_seq`. Release it
+        promptly: in bus mode a held frame pins its slot, and close() waits
+        for it.
+        """
+        if self.bus is not None:
+            return self.bus.read(after_seq)
+        with self._cond:
+            if self._frame is None or self._seq <= after_seq:
+                return _NullRef()
+            return _LocalRef(self._frame, self._timestamp, self._seq)
+
+    def latest_coarse(self) -> Tuple[Optional[object], float, int]:
+        """
+        Return (coarse, timestamp, seq) for the newest frame. The coarse
+        level is read-only, shared and never reused; it is None before the
+        first frame or when disabled.
+        """
+        with self._cond:
+            return self._coarse, self._timestamp, self._seq
+
+    def frame_info(self, seq: int = 0) -> Optional[FrameInfo]:
+        """FrameInfo of frame `seq` (the newest if 0), while it is recent enough."""
+        with self._cond:
+            seq = seq or self._seq
+            info = self._infos[seq % _INFO_RING]
+            return info if info is not None and info.seq == seq else None
+
+    def wait_for_frame(self, after_seq: int, timeout: float) -> bool:
+        """Block until a frame newer than `after_seq` exists. False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._seq > after_seq, timeout)
+
+    def request_scale(self, owner, scale: int, timeout: float = 0.5):
+        """
+        Record that `owner` needs frames decoded at 1/`scale` or finer.
+
+        When this makes the decode finer than the newest frame, waits (up to
+        `timeout` seconds) for a frame at the new scale, so the owner's next
+        read is never coarser than it asked for.
+        """
+        if scale not in DECODE_SCALES:
+            raise ValueError(f"Decode scale must be one of {DECODE_SCALES}, got {scale!r}")
+        with self._cond:
+            self._scale_requests[owner] = scale
+            if self._raw and self._thread is not None:
+                self._cond.wait_for(lambda: self._frame_scale <= scale, timeout)
+
+    def release_scale(self, owner):
+        with self._cond:
+            self._scale_requests.pop(owner, None)
+
+    # ── Decode thread ─────────────────────────────────────────────────────────
+
+    def _run(self):
+        import cv2
+        interval = 0.0
+        if self.is_replay:
+            fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+            interval = 1.0 / fps
+        next_due = time.time()
+        lost = 0
+
+        while not self._stop.is_set():
+            slot = self.bus.begin_write() if self.bus is not None else None
+            target = slot.frame if slot is not None else None
+            # grab() returns once the device has delivered the frame;
+            # retrieve() then decodes it (or hands over the raw packet), so
+            # arrival is stamped before any host work and decode_ms counts
+            # all of it.
+            ok = self._cap.grab()
+            arrived = time.time()
+            t0 = time.perf_counter()
+            if ok:
+                ok, frame = self._cap.retrieve(None if self.mjpeg else target)
+            if not ok:
+                if self.is_replay:
+                    self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                time.sleep(0.01)
+                continue
+
+            scale, small = 1, None
+            if self.mjpeg and (frame.ndim == 1 or frame.shape[0] == 1):
+                # Compressed JPEG bytes: decode at the finest scale any view needs.
+                self._raw = True
+                scale = self.decode_scale
+                frame = cv2.imdecode(frame, getattr(cv2, _IMREAD_FLAGS[scale]))
+                if frame is None:
+                    continue        # corrupt packet
+                if scale > 1:
+                    small = frame
+                    # Nearest-neighbour upscale keeps full-size consumers
+                    # working; the pixels carry 1/scale detail.
+                    frame = cv2.resize(small, (self.width, self.height), dst=target,
+                                       interpolation=cv2.INTER_NEAREST)
+
+            if frame.shape[1] != self.width or frame.shape[0] != self.height:
+                frame = cv2.resize(frame, (self.width, self.height), dst=target,
+                                   interpolation=cv2.INTER_AREA)
+            elif target is not None and frame is not target:
+                target[...] = frame
+
+            coarse = None
+            if self.coarse_size is not None:
+                coarse = downscale(small if small is not None else frame, self.coarse_size)
+                coarse.flags.writeable = False
+            decode_ms = (time.perf_counter() - t0) * 1000.0
+
+            if interval:
+                next_due += interval
+                delay = next_due - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_due = time.time()
+                arrived = time.time()       # a replayed frame arrives when it is due
+
+            if self.bus is not None and slot is None:
+                lost += 1           # every spare slot is held by a reader
+                continue
+            seq = self._seq + 1
+            info = self.stats.add_frame(seq, arrived, time.time(), decode_ms, scale, lost)
+            lost = 0
+            if self.history is not None:
+                self.history.push(frame, arrived, seq)
+            with self._cond:
+                self._infos[seq % _INFO_RING] = info
+            if self.bus is not None:
+                self.bus.commit(slot, arrived)
+                frame = None
+            with self._cond:
+                self._frame = frame
+                self._coarse = coarse
+                self._frame_scale = scale
+                self._timestamp = arrived
+                self._seq = seq
+                self._cond.notify_all()
+
+
+class _LocalRef:
+    """Borrowed frame for captures without a bus; mirrors frame_bus.FrameRef."""
+
+    def __init__(self, frame, timestamp: float, seq: int):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.seq = seq
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class ConsoleGrabber:
+    """
+    Per-script view of a SharedCapture with the GUI FrameGrabber's interface.
+
+    Crop and overlay are per-view, so several scripts can share one capture
+    without affecting each other.
+    """
+
+    def __init__(self, capture: SharedCapture, scheduler=None, name: str = ""):
+        self.capture = capture
+        self.scheduler = scheduler
+        self.name = name or str(capture.source)
+        self._lock = threading.Lock()
+        self._crop: Optional[Tuple[int, int, int, int]] = None
+        self.overlay = Overlay()
+        self.decode_scale = 1
+        self.history = capture.history
+        self.stats = capture.stats
+        self._info: Optional[FrameInfo] = None
+        self._read_seq = 0
+        self._read_dropped = 0
+        capture.request_scale(self, 1)
+
+    def get_latest_frame(self):
+        """Return a BGR copy of the newest frame (cropped if set), or None."""
+        return self.read_frame()[0]
+
+    def read_frame(self) -> Tuple[Optional[object], float, int]:
+        """(frame, timestamp, seq) of the newest frame; see get_latest_frame."""
+        with self.capture.read() as ref:
+            if ref is None:
+                return None, 0.0, 0
+            frame = ref.frame
+            self._note_read(ref.seq)
+            with self._lock:
+                crop = self._crop
+            if crop is None:
+                return frame.copy(), ref.timestamp, ref.seq
+            import cv2
+            x, y, w, h = crop
+            return (cv2.resize(frame[y:y + h, x:x + w],
+                               (frame.shape[1], frame.shape[0]),
+                               interpolation=cv2.INTER_LINEAR),
+                    ref.timestamp, ref.seq)
+
+    def read_region(self, region) -> Tuple[Optional[object], float, int]:
+        """
+        (pixels, timestamp, seq) of a regions.Region of the newest frame, as
+        read_frame() would crop it, copying only the region — the fast path
+        for detectors that watch one small area every frame.
+        """
+        with self.capture.read() as ref:
+            if ref is None:
+                return None, 0.0, 0
+            frame = ref.frame
+            self._note_read(ref.seq)
+            with self._lock:
+                crop = self._crop
+            if crop is None:
+                return region.crop(frame).copy(), ref.timestamp, ref.seq
+            import cv2
+            x, y, w, h = crop
+            rx, ry, rw, rh = region.to_pixels((h, w))
+            view_w, view_h = region.to_pixels(frame.shape)[2:]
+            return (cv2.resize(frame[y + ry:y + ry + rh, x + rx:x + rx + rw], (view_w, view_h),
+                               interpolation=cv2.INTER_LINEAR),
+                    ref.timestamp, ref.seq)
+
+    def get_coarse_frame(self):
+        """
+        Return the newest frame's coarse level (cropped if set), or None.
+        Read-only and shared with other views; no full-size copy is made.
+        """
+        return self.read_coarse()[0]
+
+    def read_coarse(self) -> Tuple[Optional[object], float, int]:
+        """(coarse, timestamp, seq) of the newest frame; see get_coarse_frame."""
+        coarse, timestamp, seq = self.capture.latest_coarse()
+        if coarse is None:
+            if self.capture.coarse_size is not None:
+                return None, 0.0, 0
+            frame = self.get_latest_frame()
+            return (None if frame is None else downscale(frame)), timestamp, seq
+        self._note_read(seq)
+        with self._lock:
+            crop = self._crop
+        if crop is not None:
+            coarse = downscale(coarse_sample(coarse, *crop,
+                                             full_shape=(self.capture.height, self.capture.width)),
+                               (coarse.shape[1], coarse.shape[0]))
+        return coarse, timestamp, seq
+
+    def frame_info(self) -> Optional[FrameInfo]:
+        """
+        FrameInfo of the frame this view read last, with `dropped` and
+        `skipped` counted since the read before it. None before any read.
+        """
+        with self._lock:
+            return self._info
+
+    def _note_read(self, seq: int):
+        info = self.capture.frame_info(seq)
+        if info is None:
+            return
+        with self._lock:
+            if self._read_seq:
+                dropped = info.total_dropped - self._read_dropped
+                skipped = max(0, seq - self._read_seq - 1)
+            else:
+                dropped, skipped = info.dropped, 0
+            self._read_seq, self._read_dropped = seq, info.total_dropped
+            self._info = info._replace(dropped=dropped, skipped=skipped,
+                                       read_time=time.time())
+            read = self._info
+        self.stats.add_read(read)
+
+    def read(self, after_seq: int = 0):
+        """
+        Borrow the newest uncropped frame without copying (see
+        SharedCapture.read). Use for read-only consumers such as recorders.
+        """
+        return self.capture.read(after_seq)
+
+    def wait_for_frame(self, after_seq: int, timeout: float) -> bool:
+        return self.capture.wait_for_frame(after_seq, timeout)
+
+    def set_decode_scale(self, scale: int):
+        """
+        Ask for frames decoded at 1/`scale` (1, 2, 4 or 8). Use a coarse scale
+        only while this view's checks are coarse (dark/bright, large regions);
+        setting it back to 1 waits briefly for a full-resolution frame.
+        """
+        self.capture.request_scale(self, scale)
+        self.decode_scale = scale
+
+    def set_crop(self, x: int, y: int, w: int, h: int):
+        with self._lock:
+            self._crop = (int(x), int(y), max(1, int(w)), max(1, int(h)))
+
+    def clear_crop(self):
+        with self._lock:
+            self._crop = None
+
+    def set_detect_overlay(self, x: int, y: int, w: int, h: int):
+        self.overlay.set_rect('detect', int(x), int(y), int(w), int(h))
+
+    def clear_detect_overlay(self):
+        self.overlay.remove('detect')
+
+    def detect(self, fn, *args, deadline: Optional[float] = None):
+        """
+        Run fn(*args) on the shared detection scheduler, if one is attached.
+
+        Returns fn's result, or None if `deadline` (a time.time() value)
+        passed before a worker was free. Without a scheduler, fn runs inline.
+        """
+        if self.scheduler is None:
+            return fn(*args)
+        return self.scheduler.run(self.name, fn, *args, deadline=deadline)
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+if __name__ == '__main__':
+    # Decode cost per frame at each scale, on a recorded MJPEG clip
+    # (python -m scripts.capture clip.avi) or a synthetic one.
+    import os
+    import sys
+    import tempfile
+    import cv2
+    import numpy as np
+
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    clip = None
+    if path is None:
+        fd, clip = tempfile.mkstemp(suffix='.avi', prefix='mjpeg_bench_')
+        os.close(fd)
+        path = clip
+
+    packets = []
+    try:
+        if clip is not None:
+            rng = np.random.default_rng(0)
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (640, 480))
+            base = cv2.resize(rng.integers(0, 256, (48, 64, 3), dtype=np.uint8), (640, 480))
+            for i in range(60):
+                writer.write(np.roll(base, i * 4, axis=1))
+            writer.release()
+
+        cap = cv2.VideoCapture(path)
+        cap.set(cv2.CAP_PROP_FORMAT, -1)
+        while len(packets) < 60:
+            ok, packet = cap.read()
+            if not ok:
+                break
+            packets.append(packet.copy())
+        cap.release()
+    finally:
+        if clip is not None:
+            os.remove(clip)
+    if not packets or packets[0].shape[0] != 1:
+        sys.exit(f"{path} does not yield raw JPEG packets")
+
+    for scale in DECODE_SCALES:
+        flag = getattr(cv2, _IMREAD_FLAGS[scale])
+        t0 = time.perf_counter()
+        for packet in packets:
+            cv2.imdecode(packet, flag)
+        ms = (time.perf_counter() - t0) / len(packets) * 1000.0
+        print(f"decode 1/{scale}: {ms:6.2f} ms/frame")
@@ -0,0 +1,245 @@
+"""
+Colour classes — classify pixels into named colour classes with one lookup.
+
+Detectors used to build each mask from three or more chained comparisons,
+allocating a temporary array per step: (r > T) & (g > T) & (b > T) for white,
+R/G tests for the fishing exclamation mark, a tolerance cube for target-colour
+matching, and so on. ColourClasses compiles any set of such classes once into
+a small 3-D lookup table indexed by quantised (B, G, R). Classifying a region
+is then one indexing pass that yields a bitmask per pixel, and one histogram
+gives the pixel count of every class at the same time.
+
+Quantisation is exact for box classes (dark, white, red, yellow, target ±
+tolerance, or any per-channel range): the bin edges on each channel are
+placed at the classes' own thresholds, so every bin is entirely inside or
+entirely outside each box. Arbitrary predicate classes are evaluated at the
+centre of uniform bins of `1 << (8 - bits)` levels.
+
+Example
+-------
+from scripts.colour_classes import ColourClasses
+
+classes = (ColourClasses()
+           .white('white', 200)
+           .red('red', min_r=180, max_g=100))
+counts = classes.count(frame[y:y + h, x:x + w])
+if counts['white'] > 20 or counts['red'] > 10:
+    ...
+
+Channel arguments are always given as R, G, B; frames are BGR as usual.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+Range = Tuple[int, int]    # inclusive (lo, hi)
+_FULL: Range = (0, 255)
+
+
+class ColourClasses:
+    """A compiled set of named pixel classes (up to 32)."""
+
+    def __init__(self, bits: int = 5):
+        """
+        Parameters
+        ----------
+        bits : int
+            Quantisation used for predicate classes (levels per channel =
+            2 ** bits). Box classes are always exact.
+        """
+        self.bits = bits
+        self._boxes: List[Tuple[str, Range, Range, Range]] = []
+        self._predicates: List[Tuple[str, Callable]] = []
+        self._compiled = None
+
+    # ── Defining classes ──────────────────────────────────────────────────────
+
+    def box(self, name: str, r: Range = _FULL, g: Range = _FULL,
+            b: Range = _FULL) -> 'ColourClasses':
+        """Pixels whose R, G and B each fall in an inclusive (lo, hi) range."""
+        clamp = lambda rng: (max(0, int(rng[0])), min(255, int(rng[1])))
+        self._add(name)
+        self._boxes.append((name, clamp(r), clamp(g), clamp(b)))
+        return self
+
+    def predicate(self, name: str, fn: Callable) -> 'ColourClasses':
+        """Pixels for which fn(r, g, b) is true (fn receives float arrays)."""
+        self._add(name)
+        self._predicates.append((name, fn))
+        return self
+
+    def dark(self, name: str, threshold: int) -> 'ColourClasses':
+        """R, G and B all below `threshold`."""
+        t = (0, threshold - 1)
+        return self.box(name, t, t, t)
+
+    def white(self, name: str, threshold: int) -> 'ColourClasses':
+        """R, G and B all above `threshold`."""
+        t = (threshold + 1, 255)
+        return self.box(name, t, t, t)
+
+    def red(self, name: str, min_r: int, max_g: int) -> 'ColourClasses':
+        """R above `min_r` and G below `max_g`."""
+        return self.box(name, r=(min_r + 1, 255), g=(0, max_g - 1))
+
+    def yellow(self, name: str, min_r: int, min_g: int, max_b: int) -> 'ColourClasses':
+        """R above `min_r`, G above `min_g` and B below `max_b`."""
+        return self.box(name, r=(min_r + 1, 255), g=(min_g + 1, 255), b=(0, max_b - 1))
+
+    def target(self, name: str, r: float, g: float, b: float,
+               tolerance: float) -> 'ColourClasses':
+        """Every channel within ±tolerance of (r, g, b)."""
+        span = lambda c: (int(np.ceil(c - tolerance)), int(np.floor(c + tolerance)))
+        return self.box(name, span(r), span(g), span(b))
+
+    @property
+    def names(self) -> List[str]:
+        return [n for n, *_ in self._boxes] + [n for n, _ in self._predicates]
+
+    def _add(self, name: str):
+        if name in self.names:
+            raise ValueError(f"Colour class {name!r} already defined")
+        if len(self.names) >= 32:
+            raise ValueError("At most 32 colour classes per table")
+        self._compiled = None
+
+    # ── Compilation ───────────────────────────────────────────────────────────
+
+    def compile(self) -> 'ColourClasses':
+        """Build the lookup tables. Called automatically on first use."""
+        names = self.names
+        order = {n: i for i, n in enumerate(names)}
+        step = 1 << (8 - self.bits)
+
+        # Per-channel bin edges, in B, G, R order to match the frame layout.
+        edges = []
+        for ch in (2, 1, 0):
+            cuts = {0, 256}
+            for _, *ranges in self._boxes:
+                lo, hi = ranges[ch]
+                cuts.update((lo, hi + 1))
+            if self._predicates:
+                cuts.update(range(0, 256, step))
+            edges.append(np.array(sorted(c for c in cuts if 0 <= c <= 256)))
+
+        bins = [np.searchsorted(e, np.arange(256), side='right') - 1 for e in edges]
+        centres = [(e[:-1] + e[1:] - 1) / 2.0 for e in edges]
+        nb, ng, nr = (len(c) for c in centres)
+
+        dtype = np.uint8 if len(names) <= 8 else np.uint16 if len(names) <= 16 else np.uint32
+        cb, cg, cr = np.meshgrid(*centres, indexing='ij')
+        lut = np.zeros((nb, ng, nr), dtype)
+        for name, r, g, b in self._boxes:
+            inside = ((cr >= r[0]) & (cr <= r[1]) &
+                      (cg >= g[0]) & (cg <= g[1]) &
+                      (cb >= b[0]) & (cb <= b[1]))
+            lut[inside] |= dtype(1 << order[name])
+        for name, fn in self._predicates:
+            lut[np.asarray(fn(cr, cg, cb), bool)] |= dtype(1 << order[name])
+
+        # Fold the strides into the per-channel maps: index = mb[B] + mg[G] + mr[R].
+        idx_type = np.uint16 if nb * ng * nr <= 0xFFFF else np.uint32
+        self._compiled = {
+            'maps': (
+                (bins[0] * ng * nr).astype(idx_type),
+                (bins[1] * nr).astype(idx_type),
+                bins[2].astype(idx_type),
+            ),
+            'lut': lut.ravel(),
+            'names': names,
+            'bits': np.array([1 << order[n] for n in names], np.uint32),
+            'membership': (
+                (np.arange(1 << len(names))[:, None] >> np.arange(len(names))) & 1
+            ).astype(np.int64) if len(names) <= 12 else None,
+        }
+        return self
+
+    @property
+    def tables(self) -> dict:
+        """The compiled lookup tables (plain arrays), compiling first if needed."""
+        return self._compiled or self.compile()._compiled
+
+    @classmethod
+    def from_tables(cls, tables: dict) -> 'ColourClasses':
+        """
+        A classifier over another instance's `tables`, e.g. in a worker
+        process. It has no class definitions, so it cannot be extended.
+        """
+        classes = cls()
+        classes._compiled = tables
+        return classes
+
+    # ── Classification ────────────────────────────────────────────────────────
+
+    def classify(self, region, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Return the per-pixel class bitmask of a BGR region (bit i set when
+        the pixel belongs to class names[i]).
+        """
+        c = self._compiled or self.compile()._compiled
+        mb, mg, mr = c['maps']
+        idx = np.take(mb, region[..., 0])
+        idx += np.take(mg, region[..., 1])
+        idx += np.take(mr, region[..., 2])
+        return np.take(c['lut'], idx, out=out)
+
+    def count(self, region) -> Dict[str, int]:
+        """Pixel count of every class in a BGR region, from one pass."""
+        c = self._compiled or self.compile()._compiled
+        codes = self.classify(region)
+        names = c['names']
+        if c['membership'] is not None:
+            hist = np.bincount(codes.ravel(), minlength=1 << len(names))
+            totals = hist @ c['membership']
+            return {n: int(t) for n, t in zip(names, totals)}
+        return {n: int(np.count_nonzero(codes & bit)) for n, bit in zip(names, c['bits'])}
+
+    def mask(self, region, name: str) -> np.ndarray:
+        """Boolean mask of a single class."""
+        c = self._compiled or self.compile()._compiled
+        bit = c['bits'][c['names'].index(name)]
+        return (self.classify(region) & bit) != 0
+
+
+@lru_cache(maxsize=64)
+def target_classes(r: float, g: float, b: float, tolerance: float) -> ColourClasses:
+    """Cached single-class table for BaseScript.count_target_pixels()."""
+    return ColourClasses().target('target', r, g, b, tolerance).compile()
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+if __name__ == '__main__':
+    import timeit
+
+    rng = np.random.default_rng(0)
+    region = rng.integers(0, 256, (380, 540, 3), dtype=np.uint8)
+
+    classes = (ColourClasses()
+               .dark('dark', 40)
+               .white('white', 200)
+               .red('red', 180, 100)
+               .yellow('yellow', 200, 200, 100)
+               .target('target', 253, 209, 82, 25)
+               .compile())
+
+    def chained():
+        b, g, r = region[:, :, 0], region[:, :, 1], region[:, :, 2]
+        return {
+            'dark': int(((b < 40) & (g < 40) & (r < 40)).sum()),
+            'white': int(((b > 200) & (g > 200) & (r > 200)).sum()),
+            'red': int(((r > 180) & (g < 100)).sum()),
+            'yellow': int(((r > 200) & (g > 200) & (b < 100)).sum()),
+            'target': int(((np.abs(r.astype(np.int16) - 253) <= 25) &
+                           (np.abs(g.astype(np.int16) - 209) <= 25) &
+                           (np.abs(b.astype(np.int16) - 82) <= 25)).sum()),
+        }
+
+    assert chained() == classes.count(region), (chained(), classes.count(region))
+    n = 50
+    t_chain = timeit.timeit(chained, number=n) / n * 1000
+    t_lut = timeit.timeit(lambda: classes.count(region), number=n) / n * 1000
+    print(f"5 classes on 380×540: chained masks {t_chain:.2f} ms, LUT {t_lut:.2f} ms")
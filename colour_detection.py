@@ -1,75 +1,158 @@
 """
 Colour Detection — interactive calibration tool.
 
-Lets you click and drag a region on the live video feed, then continuously
-logs the average R, G, B values of that region. A red box is drawn over the
-selected region on the preview.
+Lets you click and drag up to MAX_REGIONS regions on the live video feed
+(draw a tiny box, or cancel, to stop adding). Every frame, the mean, spread,
+min / max and per-channel histogram of every region are computed in one
+vectorised pass (region_stats.py) and shown on the preview: each region gets
+a coloured box, a label with its mean R, G, B and a small R/G/B histogram
+strip, and a table in the top-left corner lists all regions.
+
+With PEAK_CAPTURE on, an animation in any region (its mean moving more
+than PEAK_TRIGGER away from rest) is recorded: when it has settled, the
+log gets one line per region with the range the mean went through, the
+darkest / brightest pixels and the tolerance that would have covered it.
+Play the shiny sparkle (or any animation) to set tolerances from real data.
+
+On a preview without text support (older GUI builds) the table is logged
+every LOG_INTERVAL seconds instead.
 
 Use this to find the correct colour values and tolerance for shiny detection
 before writing a new automation script.
 """
 
 import time
+
 from scripts.base_script import BaseScript
+from scripts.overlay import Overlay, get_overlay
+from scripts.pyramid import new_frames
+from scripts.region_stats import PeakTracker, RegionStats
+from scripts.regions import Region
+
+
+# Box colours (B, G, R), cycled over the regions.
+_COLOURS = [(0, 0, 255), (0, 255, 0), (255, 128, 0), (0, 255, 255),
+            (255, 0, 255), (255, 255, 0), (0, 128, 255), (255, 255, 255)]
 
 
 class ColourDetection(BaseScript):
     NAME = "Colour Detection"
-    DESCRIPTION = "Click a region on the video feed and monitor its average RGB values."
+    DESCRIPTION = "Select regions on the video feed and inspect their colours on every frame."
+
+    MAX_REGIONS    = 8
+    MIN_REGION     = 4       # px; a smaller box ends region selection
+    HIST_BINS      = 16
+    OVERLAY_FPS    = 10.0    # overlay refreshes per second (stats run every frame)
+    LOG_INTERVAL   = 2.0     # seconds between logged tables without an overlay
+    PEAK_CAPTURE   = True
+    PEAK_TRIGGER   = 12.0    # mean change that starts a peak capture
+    PEAK_SETTLE    = 0.5     # seconds at rest that end it
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("Colour Detection started.")
-        log("Draw a rectangle on the video feed to select a detection region.")
-
-        # Ask user to draw a region
-        region = request_calibration("Click and drag to select a region")
+        log(f"Draw up to {self.MAX_REGIONS} rectangles on the video feed; "
+            "draw a tiny box to finish.")
 
-        if stop_event.is_set():
+        rects = self._select_regions(stop_event, log, request_calibration)
+        if stop_event.is_set() or not rects:
             return
 
-        x, y, w, h = region
-        log(f"Region selected: x={x}  y={y}  w={w}  h={h}")
-        log("Logging average RGB values every 0.5 seconds...")
-
-        # Draw a persistent red box overlay on the video panel
-        def draw_overlay(canvas):
-            canvas.draw_rect(x, y, w, h, colour='red')
-
-        # The video panel overlay callback is set via request_calibration's canvas ref.
-        # We reach it through the request_calibration closure — but since we can't
-        # directly access the panel here, we draw the box via a trick:
-        # request a second calibration isn't appropriate, so we instruct the
-        # frame grabber to annotate frames directly.
-        # Instead, we annotate each captured frame using OpenCV and store it back.
-        # The FrameGrabber's get_latest_frame() already provides a copy, so we
-        # can annotate in-place for display by drawing on the copy we pass back.
-        # However, VideoPanel reads directly from the grabber. Simplest approach:
-        # use OpenCV to draw the box on each frame before it is displayed.
-
-        import cv2
-
-        count = 0
-        while not stop_event.is_set():
-            frame = frame_grabber.get_latest_frame()
-            if frame is None:
-                if not self.wait(0.1, stop_event):
-                    break
-                continue
-
-            # Draw rectangle on a working copy stored back into the grabber's frame
-            # so the VideoPanel shows it (the grabber stores our annotated copy)
-            annotated = frame.copy()
-            cv2.rectangle(annotated, (x, y), (x + w, y + h), (0, 0, 255), 2)
-            # Patch the grabber's internal frame so VideoPanel picks it up
-            with frame_grabber._lock:
-                frame_grabber._frame = annotated
-
-            # Compute average RGB
-            r, g, b = self.avg_rgb(frame, x, y, w, h)
-            count += 1
-            log(f"Sample {count:4d} — R: {r:6.1f}  G: {g:6.1f}  B: {b:6.1f}")
-
-            if not self.wait(0.5, stop_event):
-                break
-
+        frame = frame_grabber.get_latest_frame()
+        shape = frame.shape if frame is not None else None
+        engine = RegionStats([Region.from_pixels(*r, frame_shape=shape) for r in rects],
+                             bins=self.HIST_BINS)
+        peaks = PeakTracker(len(rects), self.PEAK_TRIGGER, self.PEAK_SETTLE)
+
+        # The overlay is composited at display time, so captured frames are
+        # never modified.
+        overlay = get_overlay(frame_grabber)
+        live_overlay = isinstance(overlay, Overlay)
+        ids = []
+        for i, (x, y, w, h) in enumerate(rects):
+            ids.append(f'colour-detection-{i}')
+            overlay.set_rect(ids[-1], x, y, w, h, colour=_COLOURS[i % len(_COLOURS)])
+        if not live_overlay:
+            log(f"No overlay text on this preview — logging every {self.LOG_INTERVAL:.0f} s.")
+        if self.PEAK_CAPTURE:
+            log("Peak capture on: animations in the regions are recorded below.")
+
+        frames = 0
+        started = time.time()
+        next_show = started + 0.5
+        try:
+            for frame, timestamp, _ in new_frames(frame_grabber, stop_event, poll=0.01):
+                frames += 1
+                stats = engine.compute(frame)
+                if self.PEAK_CAPTURE:
+                    capture = peaks.update(stats, timestamp)
+                    if capture is not None:
+                        self._log_capture(capture, len(rects), log)
+                now = time.time()
+                if now >= next_show:
+                    fps = frames / max(now - started, 1e-6)
+                    if live_overlay:
+                        self._show(overlay, ids, rects, stats, fps, peaks.capturing)
+                        next_show = now + 1.0 / self.OVERLAY_FPS
+                    else:
+                        self._log_table(stats, fps, log)
+                        next_show = now + self.LOG_INTERVAL
+        finally:
+            for item_id in ids:
+                overlay.remove(item_id)
+                overlay.remove(item_id + '-label')
+                overlay.remove(item_id + '-hist')
+                overlay.remove(item_id + '-row')
+            overlay.remove('colour-detection-title')
+
+        if frames:
+            self._log_table(stats, frames / max(time.time() - started, 1e-6), log)
         log("Colour Detection finished.")
+
+    # ── Region selection ──────────────────────────────────────────────────────
+
+    def _select_regions(self, stop_event, log, request_calibration):
+        rects = []
+        while len(rects) < self.MAX_REGIONS:
+            prompt = ("Click and drag to select a region" if not rects else
+                      f"Region {len(rects) + 1}: drag another, or a tiny box to finish")
+            rect = request_calibration(prompt)
+            if stop_event.is_set():
+                return []
+            if rect is None or min(rect[2], rect[3]) < self.MIN_REGION:
+                break
+            x, y, w, h = rect
+            rects.append((x, y, w, h))
+            log(f"Region {len(rects)} selected: x={x}  y={y}  w={w}  h={h}")
+        return rects
+
+    # ── Display ───────────────────────────────────────────────────────────────
+
+    def _show(self, overlay, ids, rects, stats, fps, capturing):
+        """Label, histogram strip and table row per region."""
+        title = f"{len(rects)} region(s)  {fps:4.1f} fps" + ("  [PEAK]" if capturing else "")
+        overlay.set_text('colour-detection-title', title, 8, 16, colour=(0, 255, 255))
+        for i, (x, y, w, h) in enumerate(rects):
+            r, g, b = stats.mean[i]
+            colour = _COLOURS[i % len(_COLOURS)]
+            overlay.set_text(ids[i] + '-label', f"{i + 1}: {r:.0f},{g:.0f},{b:.0f}",
+                             x, max(12, y - 4), colour=colour, scale=0.4)
+            hist = stats.hist[i]
+            overlay.set_heatmap(ids[i] + '-hist', x, y + h + 2, w, 12,
+                                hist / max(1, hist.max()), alpha=0.7, value_range=(0.0, 1.0))
+            # Hershey fonts are ASCII only: no '±'.
+            sr, sg, sb = stats.std[i]
+            lo, hi = stats.min[i], stats.max[i]
+            overlay.set_text(ids[i] + '-row',
+                             f"{i + 1} R{r:5.1f}/{sr:.0f} G{g:5.1f}/{sg:.0f} "
+                             f"B{b:5.1f}/{sb:.0f}  {int(lo.min())}-{int(hi.max())}",
+                             8, 32 + 14 * i, colour=colour, scale=0.4)
+
+    def _log_table(self, stats, fps, log):
+        log(f"Colour table ({fps:.1f} fps):")
+        for i in range(len(stats.mean)):
+            log(f"  {i + 1}: {stats.describe(i)}")
+
+    def _log_capture(self, capture, count, log):
+        log(f"Peak capture: {capture.end - capture.start:.2f} s, {capture.frames} frames")
+        for i in range(count):
+            log(f"  {i + 1}: {capture.describe(i)}")
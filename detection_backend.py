@@ -0,0 +1,397 @@
+"""
+Detection backend — run pixel-mask detection kernels in-thread or in worker
+processes.
+
+Detection kernels (dark/white/red pixel counts, the hatch-text strip) are
+small numpy functions called many times per second. With several scripts in
+one process they contend for the GIL with each other and with the GUI.
+
+ProcessBackend copies the region of interest into a preallocated slot of a
+multiprocessing.shared_memory block and hands only (kernel name, slot, shape,
+parameters) to a worker process — ndarrays are never pickled. Workers attach
+to the block once at start-up and send back a compact result (an int, a float
+or a small tuple). If worker processes cannot be started, or a region is
+larger than a slot, the kernel runs in the calling thread instead. Each
+worker marks the job it is running in a small shared array, so a job whose
+worker dies is re-run in the calling thread and its slot freed; once every
+worker has died the backend stays in-thread.
+
+ColourClasses parameters are not pickled with every job either: the first
+time a table's contents are used, its compiled lookup tables are sent to
+every worker once, and jobs carry only its key. Keys follow the contents,
+so an equal table built again (e.g. by target_classes() after its cache
+dropped it) is not sent again.
+
+InThreadBackend has the same interface and is the default, so scripts behave
+exactly as before unless the host opts in:
+
+    from scripts import detection_backend
+    detection_backend.configure(processes=3)
+
+Scripts call kernels through the active backend:
+
+    from scripts.detection_backend import get_backend
+    dark = get_backend().run('count_dark', frame, (310, 320, 145, 395), 120)
+
+The region is given as (y0, y1, x0, x1) in frame pixels.
+
+Frozen (PyInstaller) builds must call multiprocessing.freeze_support() at the
+top of the host application's entry point for worker processes to start.
+
+Run `python -m scripts.detection_backend` for a latency benchmark against
+the number of concurrently detecting scripts.
+"""
+
+import hashlib
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from scripts.colour_classes import ColourClasses
+from scripts.kernels import count_dark, count_red, count_white, dark_fraction, hatch_text
+
+
+# ── Kernels ──────────────────────────────────────────────────────────────────
+# Every kernel takes a BGR uint8 region first, then scalar parameters, and
+# returns something small enough to send back cheaply between processes.
+# The pixel-mask kernels live in kernels.py and reuse per-thread scratch
+# buffers, so worker processes allocate nothing per call either.
+
+def colour_counts(region, classes) -> Dict[str, int]:
+    """Pixel count of every class of a ColourClasses table (see colour_classes.py)."""
+    return classes.count(region)
+
+
+KERNELS = {
+    'count_dark': count_dark,
+    'dark_fraction': dark_fraction,
+    'count_white': count_white,
+    'count_red': count_red,
+    'hatch_text': hatch_text,
+    'colour_counts': colour_counts,
+}
+
+
+def _crop(frame, roi):
+    if roi is None:
+        return frame
+    y0, y1, x0, x1 = roi
+    return frame[y0:y1, x0:x1]
+
+
+# ── Backends ─────────────────────────────────────────────────────────────────
+
+class InThreadBackend:
+    """Runs kernels directly in the calling thread."""
+
+    name = 'in-thread'
+
+    def run(self, kernel: str, frame, roi: Optional[Tuple[int, int, int, int]], *params):
+        return KERNELS[kernel](_crop(frame, roi), *params)
+
+    def close(self):
+        pass
+
+
+class _TableRef(NamedTuple):
+    """Stands in for a ColourClasses parameter registered with the workers."""
+
+    key: int
+
+
+def _table_digest(tables: dict) -> bytes:
+    """Digest of a compiled colour table's contents (the rest derives from these)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update('\0'.join(tables['names']).encode())
+    for part in (*tables['maps'], tables['lut']):
+        h.update(part.dtype.str.encode())
+        h.update(part.tobytes())
+    return h.digest()
+
+
+def _worker_main(index: int, shm_name: str, slot_bytes: int, tasks, results, busy,
+                 inbox):
+    """
+    Worker process: attach to the slot block once, then serve tasks.
+    busy[index] holds the id of the job being run (-1 when idle); `inbox`
+    delivers (key, tables) of every registered ColourClasses.
+    """
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    tables: Dict[int, ColourClasses] = {}
+
+    def resolve(param):
+        if not isinstance(param, _TableRef):
+            return param
+        while param.key not in tables:
+            key, compiled = inbox.get(timeout=10.0)
+            tables[key] = ColourClasses.from_tables(compiled)
+        return tables[param.key]
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            job_id, kernel, slot, shape, params = task
+            busy[index] = job_id
+            try:
+                params = [resolve(p) for p in params]
+                region = np.ndarray(shape, np.uint8, shm.buf, slot * slot_bytes)
+                result = KERNELS[kernel](region, *params)
+                del region
+                results.put((job_id, True, result))
+            except Exception as exc:
+                results.put((job_id, False, repr(exc)))
+            busy[index] = -1
+    finally:
+        shm.close()
+
+
+class ProcessBackend:
+    """Runs kernels in worker processes fed through shared-memory slots."""
+
+    name = 'process'
+    TABLE_IDS = 64      # table objects whose key is remembered without a digest
+
+    def __init__(self, processes: int = 2, slots: Optional[int] = None,
+                 slot_shape: Tuple[int, int, int] = (480, 640, 3)):
+        """
+        Parameters
+        ----------
+        processes : int
+            Number of worker processes.
+        slots : int
+            Regions that can be in flight at once (default 2 × processes).
+            Callers block for a free slot when all are busy.
+        slot_shape : (h, w, c)
+            Largest region a slot holds. Bigger regions run in-thread.
+        """
+        import multiprocessing as mp
+        from multiprocessing import shared_memory
+
+        self.processes = processes
+        self.slot_bytes = int(np.prod(slot_shape))
+        n_slots = slots or 2 * processes
+
+        self._fallback = InThreadBackend()
+        self._broken = False
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * n_slots)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for i in range(n_slots):
+            self._free.put(i)
+        self._pending: Dict[int, Tuple[Future, int]] = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._table_keys: Dict[bytes, int] = {}    # contents digest -> key sent to workers
+        self._table_ids: "OrderedDict[int, Tuple[dict, int]]" = OrderedDict()
+        self._tables_lock = threading.Lock()
+
+        ctx = mp.get_context('spawn')
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._busy = ctx.Array('q', [-1] * processes, lock=False)
+        self._inboxes = [ctx.Queue() for _ in range(processes)]
+        self._procs = [
+            ctx.Process(target=_worker_main, daemon=True,
+                        args=(i, self._shm.name, self.slot_bytes, self._tasks,
+                              self._results, self._busy, self._inboxes[i]))
+            for i in range(processes)
+        ]
+        try:
+            for p in self._procs:
+                p.start()
+        except Exception:
+            self.close()
+            raise
+        self._collector = threading.Thread(target=self._collect, name="detect-results",
+                                           daemon=True)
+        self._collector.start()
+
+    def run(self, kernel: str, frame, roi: Optional[Tuple[int, int, int, int]], *params):
+        region = _crop(frame, roi)
+        if (self._broken or self._shm is None or region.dtype != np.uint8 or
+                region.nbytes > self.slot_bytes):
+            return self._fallback.run(kernel, region, None, *params)
+
+        slot = self._free.get()
+        dest = np.ndarray(region.shape, np.uint8, self._shm.buf, slot * self.slot_bytes)
+        np.copyto(dest, region)
+        del dest
+
+        future: Future = Future()
+        job_id = next(self._ids)
+        with self._pending_lock:
+            self._pending[job_id] = (future, slot)
+        sent = tuple(self._table_ref(p) if isinstance(p, ColourClasses) else p for p in params)
+        self._tasks.put((job_id, kernel, slot, region.shape, sent))
+        while True:
+            try:
+                return future.result(timeout=1.0)
+            except FutureTimeout:
+                alive = [p.is_alive() for p in self._procs]
+                lost = not any(alive) or any(
+                    not ok and self._busy[i] == job_id for i, ok in enumerate(alive))
+                if not lost:
+                    continue
+                if not any(alive):
+                    # Every worker has died; carry on in-thread from now on.
+                    self._broken = True
+                if self._abandon(job_id):
+                    return self._fallback.run(kernel, region, None, *params)
+
+    def _table_ref(self, classes: ColourClasses) -> _TableRef:
+        """
+        Key of a colour table, sending its compiled tables to every worker
+        the first time those contents are seen. Keys follow the contents, so
+        a table rebuilt after leaving target_classes()' cache reuses its key;
+        the last TABLE_IDS table objects skip the digest.
+        """
+        tables = classes.tables
+        with self._tables_lock:
+            memo = self._table_ids.get(id(tables))
+            if memo is not None and memo[0] is tables:
+                self._table_ids.move_to_end(id(tables))
+                return _TableRef(memo[1])
+            digest = _table_digest(tables)
+            key = self._table_keys.get(digest)
+            if key is None:
+                key = self._table_keys[digest] = len(self._table_keys)
+                for inbox in self._inboxes:
+                    inbox.put((key, tables))
+            # Holding `tables` keeps its id from being reused while it is remembered.
+            self._table_ids[id(tables)] = (tables, key)
+            if len(self._table_ids) > self.TABLE_IDS:
+                self._table_ids.popitem(last=False)
+        return _TableRef(key)
+
+    def _abandon(self, job_id: int) -> bool:
+        """
+        Drop a job whose worker died and free its slot. False if its result
+        arrived meanwhile (the future is then set).
+        """
+        with self._pending_lock:
+            entry = self._pending.pop(job_id, None)
+        if entry is None:
+            return False
+        self._free.put(entry[1])
+        return True
+
+    def _collect(self):
+        while True:
+            try:
+                item = self._results.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            job_id, ok, value = item
+            with self._pending_lock:
+                entry = self._pending.pop(job_id, None)
+            if entry is None:
+                continue                # abandoned: already re-run in-thread
+            future, slot = entry
+            self._free.put(slot)
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(RuntimeError(f"Detection worker failed: {value}"))
+
+    def close(self):
+        for _ in self._procs:
+            self._tasks.put(None)
+        for p in self._procs:
+            if p.pid is not None:
+                p.join(timeout=2.0)
+                if p.is_alive():
+                    p.terminate()
+        self._results.put(None)
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+# ── Process-wide default ─────────────────────────────────────────────────────
+
+_backend = InThreadBackend()
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the active backend (in-thread unless configure() enabled processes)."""
+    return _backend
+
+
+def configure(processes: int = 0, **kwargs):
+    """
+    Select the backend for every script in this process.
+
+    processes=0 runs kernels in-thread. Any other value starts a
+    ProcessBackend with that many workers; if that fails, the in-thread
+    backend is kept. Returns the active backend.
+    """
+    global _backend
+    with _backend_lock:
+        old = _backend
+        if processes <= 0:
+            _backend = InThreadBackend()
+        else:
+            try:
+                _backend = ProcessBackend(processes, **kwargs)
+            except Exception:
+                _backend = InThreadBackend()
+        if old is not _backend:
+            old.close()
+        return _backend
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+def _benchmark(backend, scripts: int, seconds: float = 2.0):
+    """Median / p95 latency (ms) of one detection call with `scripts` callers."""
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    latencies = []
+    lock = threading.Lock()
+    stop = time.time() + seconds
+
+    def caller():
+        local = []
+        while time.time() < stop:
+            t0 = time.perf_counter()
+            backend.run('dark_fraction', frame, (50, 430, 50, 590), 40)
+            backend.run('hatch_text', frame, (310, 320, 145, 395), 120)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=caller) for _ in range(scripts)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    lat = np.array(latencies) * 1000.0
+    return float(np.median(lat)), float(np.percentile(lat, 95)), len(lat) / seconds
+
+
+if __name__ == '__main__':
+    import os
+    workers = max(1, (os.cpu_count() or 2) - 1)
+    backends = [InThreadBackend()]
+    try:
+        backends.append(ProcessBackend(workers))
+    except Exception as exc:
+        print(f"Process backend unavailable ({exc!r}); benchmarking in-thread only.")
+    print(f"{'backend':>10} {'scripts':>7} {'median ms':>10} {'p95 ms':>8} {'calls/s':>8}")
+    for backend in backends:
+        for n in (1, 2, 4, 8):
+            med, p95, rate = _benchmark(backend, n)
+            print(f"{backend.name:>10} {n:7d} {med:10.3f} {p95:8.3f} {rate:8.0f}")
+        backend.close()
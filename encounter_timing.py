@@ -0,0 +1,205 @@
+"""
+Encounter timing — shiny detection from how long the encounter intro takes.
+
+The original C++ programs told shinies apart by timing: the shiny sparkle
+plays before the battle text box appears, so a shiny encounter takes
+longer from the battle blackout to the first text. The Python ports waited
+a fixed BATTLE_WAIT and compared the sprite colour instead. EncounterTimer
+restores the timing method on top of the capture's frame timestamps:
+
+  * the start is the timestamp of the first dark frame, as recorded by
+    the transition detector (see transition.py);
+  * the end is the timestamp of the first frame where the calibrated text
+    box shows white text — every frame is checked, so the delay is exact
+    to one frame rather than to the poll interval;
+  * the usual delay is learned from the first `learn` encounters (median
+    of the recent non-shiny ones), and an encounter is shiny when it runs
+    more than `margin` seconds over it.
+
+A verdict is ready as soon as the text box appears, so a script can flee
+or reset right away instead of waiting out BATTLE_WAIT. While the usual
+delay is still being learned, or if the text box is never seen, check()
+returns None and the script falls back to its sprite check.
+
+Example
+-------
+from scripts.encounter_timing import EncounterTimer, calibrate_text_region
+
+cal.update(calibrate_text_region(frame_grabber, stop_event, log, request_calibration))
+...
+timer = EncounterTimer.from_calibration(cal)
+detector = blackout()
+if detector.wait_for_start(frame_grabber, stop_event, 15.0):
+    verdict = timer.check(frame_grabber, stop_event, detector.start_time, 8.0, log)
+    # True: shiny, False: not shiny, None: use the sprite check
+
+With the GUI's FrameGrabber (no frame timestamps) the time of each poll is
+used instead, which is what the scripts did before.
+"""
+
+import time
+from collections import deque
+from statistics import median
+from typing import Optional
+
+from scripts.kernels import count_white
+from scripts.pyramid import new_frames
+from scripts.regions import Region
+
+
+class EncounterTimer:
+    """Blackout-to-text delay, judged against the learned usual delay."""
+
+    def __init__(self, text_region: Region, white_min: int = 200,
+                 text_fraction: float = 0.01, margin: float = 0.8,
+                 threshold: Optional[float] = None, learn: int = 5, keep: int = 20):
+        """
+        Parameters
+        ----------
+        text_region : Region
+            The battle text box.
+        white_min, text_fraction : int, float
+            Text is showing once more than `text_fraction` of the region has
+            B, G and R all above `white_min`.
+        margin : float
+            Seconds over the usual delay that count as shiny.
+        threshold : float or None
+            Fixed delay in seconds above which an encounter is shiny; skips
+            learning.
+        learn, keep : int
+            Encounters needed before judging, and how many recent non-shiny
+            delays the usual delay is the median of.
+        """
+        self.text_region = text_region
+        self.white_min = white_min
+        self.text_fraction = text_fraction
+        self.margin = margin
+        self.threshold = threshold
+        self.learn = learn
+        self.delays = deque(maxlen=keep)
+        self.last_delay: Optional[float] = None
+
+    @classmethod
+    def from_calibration(cls, cal: dict, **kwargs) -> Optional['EncounterTimer']:
+        """Timer for a calibration written with calibrate_text_region(), else None."""
+        if 'text_region' not in cal:
+            return None
+        kwargs.setdefault('text_fraction', cal.get('text_fraction', 0.01))
+        return cls(Region.from_json(cal['text_region']), **kwargs)
+
+    # ── Measuring ─────────────────────────────────────────────────────────────
+
+    def text_share(self, frame) -> float:
+        sample = self.text_region.crop(frame)
+        return count_white(sample, self.white_min) / max(1, sample.shape[0] * sample.shape[1])
+
+    def wait_for_text(self, frame_grabber, stop_event, timeout: float,
+                      poll: float = 0.03) -> Optional[float]:
+        """Timestamp of the first frame showing text, or None on timeout/stop."""
+        for frame, timestamp, _ in new_frames(frame_grabber, stop_event, timeout, poll):
+            if self.text_share(frame) > self.text_fraction:
+                return timestamp
+        return None
+
+    def measure(self, frame_grabber, stop_event, start_time: float,
+                timeout: float) -> Optional[float]:
+        """Seconds from `start_time` (a frame timestamp) to the text box."""
+        text_time = self.wait_for_text(frame_grabber, stop_event, timeout)
+        self.last_delay = None if text_time is None else text_time - start_time
+        return self.last_delay
+
+    # ── Judging ───────────────────────────────────────────────────────────────
+
+    @property
+    def usual_delay(self) -> Optional[float]:
+        """Median recent non-shiny delay, or None while still learning."""
+        if len(self.delays) < self.learn:
+            return None
+        return median(self.delays)
+
+    def classify(self, delay: float) -> Optional[bool]:
+        """
+        True if `delay` is a shiny's, False if not, None while learning.
+        Non-shiny delays are added to the usual delay.
+        """
+        if self.threshold is not None:
+            return delay > self.threshold
+        usual = self.usual_delay
+        shiny = usual is not None and delay > usual + self.margin
+        if not shiny:
+            self.delays.append(delay)
+        return None if usual is None else shiny
+
+    def check(self, frame_grabber, stop_event, start_time: float, timeout: float,
+              log) -> Optional[bool]:
+        """measure() then classify(), logging the result."""
+        delay = self.measure(frame_grabber, stop_event, start_time, timeout)
+        if delay is None:
+            if not stop_event.is_set():
+                log("Text box not seen — using the sprite check.")
+            return None
+        verdict = self.classify(delay)
+        usual = self.threshold if self.threshold is not None else self.usual_delay
+        if verdict is None:
+            log(f"Encounter took {delay:.2f} s (learning usual delay, "
+                f"{len(self.delays)}/{self.learn}).")
+        elif verdict:
+            log(f"*** SHINY BY TIMING! Encounter took {delay:.2f} s "
+                f"(usual {usual:.2f} s) ***")
+        else:
+            log(f"Encounter took {delay:.2f} s (usual {usual:.2f} s) — not shiny.")
+        return verdict
+
+
+def calibrate_text_region(frame_grabber, stop_event, log, request_calibration,
+                          white_min: int = 200) -> dict:
+    """
+    Ask for the battle text box while it shows text; return the calibration
+    entries EncounterTimer.from_calibration() reads, or {} if it is unusable.
+    """
+    log("Draw a region over the battle text box while it shows text "
+        "(used to time the encounter).")
+    rect = request_calibration("Draw region over the battle text box")
+    if stop_event.is_set():
+        return {}
+    time.sleep(0.1)
+    frame = frame_grabber.get_latest_frame()
+    if frame is None:
+        return {}
+    region = Region.from_pixels(*rect, frame_shape=frame.shape)
+    share = EncounterTimer(region, white_min).text_share(frame)
+    if share < 0.005:
+        log("No white text found in that region — encounter timing disabled.")
+        return {}
+    log(f"Text box: {share:.1%} white with text showing.")
+    return {'text_region': region.to_json(), 'text_fraction': round(share / 3, 4)}
+
+
+if __name__ == '__main__':
+    import threading
+    import numpy as np
+
+    class _Replay:
+        """Frames at 30 fps: blackout at frame 0, text from `text_frame`."""
+
+        def __init__(self, text_frame):
+            self.i, self.text_frame = 0, text_frame
+
+        def read_frame(self):
+            frame = np.full((480, 640, 3), 60, np.uint8)
+            if self.i >= self.text_frame:
+                frame[400:440, 40:300:4] = 255          # glyph columns
+            self.i += 1
+            return frame, self.i / 30.0, self.i
+
+        def wait_for_frame(self, after_seq, timeout):
+            return True                                 # replay: never wait
+
+    timer = EncounterTimer(Region.from_pixels(20, 390, 600, 60))
+    verdicts = []
+    for text_frame in [130, 128, 133, 131, 129, 132, 130, 190, 131]:
+        delay = timer.measure(_Replay(text_frame), threading.Event(), 1 / 30.0, 5.0)
+        verdicts.append(timer.classify(delay))
+    print("usual delay:", timer.usual_delay, "verdicts:", verdicts)
+    assert verdicts[:5] == [None] * 5 and verdicts[5:] == [False, False, True, False]
+    print("PASS")
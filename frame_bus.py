@@ -0,0 +1,266 @@
+"""
+Frame bus — one capture, many zero-copy readers.
+
+A FrameBus is a ring of preallocated frame slots in a
+multiprocessing.shared_memory block. Exactly one writer (the capture thread)
+fills slots; any number of readers — the video panel, scripts, a recorder,
+an analysis process — borrow the newest slot as a read-only numpy view.
+
+Every slot carries a sequence number and a reader reference count. The writer
+only ever reuses a slot nobody holds, so a reader's view never changes under
+it, and a reader never copies the pixels. Memory traffic is one write per
+captured frame no matter how many readers attach. If every spare slot is held
+when a frame arrives, that frame is dropped (and counted) rather than blocking
+the capture.
+
+Readers in other processes attach with the picklable handle():
+
+    # host
+    bus = FrameBus((480, 640, 3))
+    proc = multiprocessing.Process(target=recorder, args=(bus.handle(),))
+
+    # recorder process
+    bus = FrameBus.attach(handle)
+    with bus.read() as ref:
+        if ref is not None:
+            writer.write(ref.frame)
+
+Writers fill a slot in place, so the decoder can write straight into shared
+memory:
+
+    slot = bus.begin_write()
+    capture.read(slot.frame)        # cv2.VideoCapture decodes into the slot
+    bus.commit(slot)
+"""
+
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+_ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class FrameRef:
+    """A borrowed, read-only frame. Release it (or use `with`) when done."""
+
+    def __init__(self, bus: 'FrameBus', slot: int, seq: int, timestamp: float):
+        self._bus = bus
+        self.slot = slot
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = bus._read_views[slot]
+
+    def release(self):
+        if self._bus is not None:
+            self._bus._release(self.slot)
+            self._bus = None
+            self.frame = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _NullRef:
+    """Stand-in returned by read() when no frame is available yet."""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        pass
+
+    def __bool__(self):
+        return False
+
+    def release(self):
+        pass
+
+
+class WriteSlot:
+    """A slot reserved by the writer. Fill `frame`, then pass to commit()."""
+
+    def __init__(self, index: int, frame):
+        self.index = index
+        self.frame = frame
+
+
+class FrameBus:
+    """Single-writer, multi-reader ring of shared-memory frame slots."""
+
+    # Header layout (int64): latest slot, latest seq, dropped frames,
+    # then seq[slots], refs[slots]; followed by float64 timestamps[slots].
+    _LATEST, _SEQ, _DROPPED, _FIXED = 0, 1, 2, 3
+
+    def __init__(self, shape: Tuple[int, int, int] = (480, 640, 3), slots: int = 4,
+                 _shm=None, _lock=None):
+        """
+        Parameters
+        ----------
+        shape : (h, w, c)
+            Frame shape (uint8). Every slot holds one frame of this shape.
+        slots : int
+            Ring size. Needs to be at least 2; each reader holding a frame
+            at the moment a new one arrives pins one slot.
+        """
+        from multiprocessing import shared_memory
+        import multiprocessing as mp
+
+        if slots < 2:
+            raise ValueError("FrameBus needs at least 2 slots")
+        self.shape = tuple(shape)
+        self.slots = slots
+        self._frame_bytes = int(np.prod(self.shape))
+
+        n_ints = self._FIXED + 2 * slots
+        self._header_bytes = _aligned(8 * n_ints + 8 * slots)
+        size = self._header_bytes + slots * _aligned(self._frame_bytes)
+
+        self._owner = _shm is None
+        self._held = 0                  # FrameRefs of this process not yet released
+        self._shm = _shm or shared_memory.SharedMemory(create=True, size=size)
+        self._lock = _lock or mp.get_context('spawn').Lock()
+
+        buf = self._shm.buf
+        self._ints = np.ndarray((n_ints,), np.int64, buf, 0)
+        self._times = np.ndarray((slots,), np.float64, buf, 8 * n_ints)
+        self._seqs = self._ints[self._FIXED:self._FIXED + slots]
+        self._refs = self._ints[self._FIXED + slots:]
+        self._views = []
+        for i in range(slots):
+            offset = self._header_bytes + i * _aligned(self._frame_bytes)
+            view = np.ndarray(self.shape, np.uint8, buf, offset)
+            self._views.append(view)
+        self._read_views = []
+        for view in self._views:
+            ro = view.view()
+            ro.flags.writeable = False
+            self._read_views.append(ro)
+
+        if self._owner:
+            self._ints[:] = 0
+            self._ints[self._LATEST] = -1
+            self._times[:] = 0.0
+
+    # ── Cross-process attach ──────────────────────────────────────────────────
+
+    def handle(self) -> tuple:
+        """Picklable handle for FrameBus.attach() in a child process."""
+        return (self._shm.name, self.shape, self.slots, self._lock)
+
+    @classmethod
+    def attach(cls, handle: tuple) -> 'FrameBus':
+        from multiprocessing import shared_memory
+        name, shape, slots, lock = handle
+        return cls(shape, slots, _shm=shared_memory.SharedMemory(name=name), _lock=lock)
+
+    # ── Writer ────────────────────────────────────────────────────────────────
+
+    def begin_write(self) -> Optional[WriteSlot]:
+        """
+        Reserve a slot nobody is reading. Returns None (and counts a dropped
+        frame) if every slot other than the newest is still held by readers.
+        """
+        with self._lock:
+            latest = int(self._ints[self._LATEST])
+            for i in range(self.slots):
+                if i != latest and self._refs[i] == 0:
+                    self._seqs[i] = 0
+                    return WriteSlot(i, self._views[i])
+            self._ints[self._DROPPED] += 1
+            return None
+
+    def commit(self, slot: WriteSlot, timestamp: Optional[float] = None) -> int:
+        """Publish a filled slot as the newest frame. Returns its sequence number."""
+        with self._lock:
+            seq = int(self._ints[self._SEQ]) + 1
+            self._seqs[slot.index] = seq
+            self._times[slot.index] = time.time() if timestamp is None else timestamp
+            self._ints[self._SEQ] = seq
+            self._ints[self._LATEST] = slot.index
+            return seq
+
+    def publish(self, frame, timestamp: Optional[float] = None) -> int:
+        """Copy `frame` into a free slot and publish it. Returns 0 if dropped."""
+        slot = self.begin_write()
+        if slot is None:
+            return 0
+        np.copyto(slot.frame, frame)
+        return self.commit(slot, timestamp)
+
+    # ── Readers ───────────────────────────────────────────────────────────────
+
+    def read(self, after_seq: int = 0):
+        """
+        Borrow the newest frame if its sequence number is above `after_seq`.
+
+        Returns a FrameRef (release it, or use it as a context manager), or a
+        falsy placeholder whose `with` target is None when there is no such
+        frame yet.
+        """
+        with self._lock:
+            slot = int(self._ints[self._LATEST])
+            if slot < 0:
+                return _NullRef()
+            seq = int(self._seqs[slot])
+            if seq <= after_seq:
+                return _NullRef()
+            self._refs[slot] += 1
+            self._held += 1
+            ts = float(self._times[slot])
+        return FrameRef(self, slot, seq, ts)
+
+    def _release(self, slot: int):
+        with self._lock:
+            if self._refs[slot] > 0:
+                self._refs[slot] -= 1
+            self._held -= 1
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self._ints[self._SEQ])
+
+    @property
+    def dropped(self) -> int:
+        return int(self._ints[self._DROPPED])
+
+    def readers(self) -> int:
+        """Total outstanding FrameRefs across all processes."""
+        with self._lock:
+            return int(self._refs.sum())
+
+    # ── Teardown ──────────────────────────────────────────────────────────────
+
+    def close(self, timeout: float = 1.0) -> bool:
+        """
+        Detach this process; the owner also frees the shared memory.
+
+        FrameRefs borrowed in this process are views into the block, so
+        close waits up to `timeout` seconds for them to be released. If any
+        is still held, nothing is freed and False is returned; call again
+        once they are. (Readers in other processes keep their own mapping.)
+        """
+        if self._shm is None:
+            return True
+        deadline = time.time() + timeout
+        while self._held > 0:
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        self._views = []
+        self._read_views = []
+        self._ints = self._times = self._seqs = self._refs = None
+        if self._shm is not None:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+            self._shm = None
+        return True
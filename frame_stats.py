@@ -0,0 +1,212 @@
+"""
+Frame stats — per-frame capture metadata and rolling capture health.
+
+Timing-based detection is only as good as the frames behind it. SharedCapture
+attaches a FrameInfo to every decoded frame and feeds a CaptureStats, so a
+script (or whoever hosts it) can see:
+
+  * when each frame arrived from the device, and when it became readable;
+  * how long the host spent on it (JPEG decode, resize, coarse level);
+  * frames lost before it — gaps in a live device's frame clock, and frames
+    thrown away because every bus slot was held by a reader;
+  * per view: frames lost and frames decoded but never read since that
+    view's previous read, and how old the frame was when it was read.
+
+CaptureStats keeps the last `window` frames for rolling FPS, decode time,
+pipeline latency and read age, and flags an overloaded host before it
+starts missing short events such as a shiny sparkle.
+
+The delay between light reaching the capture card and the frame arriving
+on the host cannot be seen from software; set CaptureStats.device_latency
+once it has been measured (e.g. with the light sensor) and use
+sensor_time() to turn frame timestamps into on-screen times.
+
+Example
+-------
+from scripts.frame_stats import get_frame_info, get_stats
+
+frame = frame_grabber.get_latest_frame()
+info = get_frame_info(frame_grabber)        # for that frame, or None
+if info is not None and info.dropped:
+    log(f"{info.dropped} frame(s) lost before #{info.seq}")
+
+stats = get_stats(frame_grabber)
+if stats is not None and stats.overloaded():
+    log(f"Capture struggling: {stats}")
+"""
+
+import threading
+from collections import deque
+from statistics import median
+from typing import NamedTuple, Optional
+
+
+class FrameInfo(NamedTuple):
+    """Metadata of one decoded frame (times are time.time() values)."""
+
+    seq: int
+    timestamp: float            # arrived from the device
+    published: float            # readable by views
+    decode_ms: float            # host work: JPEG decode, resize, coarse level
+    scale: int                  # decode scale (1 = full resolution)
+    dropped: int                # frames lost just before it; at a view, since its last read
+    total_dropped: int          # frames lost since the capture started
+    skipped: int = 0            # at a view: frames decoded but not read since its last read
+    read_time: float = 0.0      # at a view: when it was read
+
+    @property
+    def latency(self) -> float:
+        """Seconds from arrival to being read (or published, if not read yet)."""
+        return (self.read_time or self.published) - self.timestamp
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _mean(values) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+class CaptureStats:
+    """Rolling capture health over the last `window` frames. Thread-safe."""
+
+    def __init__(self, window: int = 150, infer_gaps: bool = True):
+        """
+        Parameters
+        ----------
+        window : int
+            Frames (and reads) the rolling figures cover.
+        infer_gaps : bool
+            Count a gap of more than 1.5 frame intervals between arrivals as
+            lost frames. Off for replays, which are paced by the host.
+        """
+        self.infer_gaps = infer_gaps
+        self.device_latency = 0.0
+        self.frames = 0
+        self.total_dropped = 0
+        self._arrivals = deque(maxlen=window)
+        self._intervals = deque(maxlen=window)
+        self._decode_ms = deque(maxlen=window)
+        self._pipeline_ms = deque(maxlen=window)
+        self._lost = deque(maxlen=window)
+        self._read_ages_ms = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    # ── Recording ─────────────────────────────────────────────────────────────
+
+    def add_frame(self, seq: int, timestamp: float, published: float,
+                  decode_ms: float, scale: int = 1, lost: int = 0) -> FrameInfo:
+        """Record a decoded frame; `lost` are frames known to be thrown away."""
+        with self._lock:
+            if self._arrivals:
+                interval = timestamp - self._arrivals[-1]
+                if self.infer_gaps and len(self._intervals) >= 10:
+                    usual = median(self._intervals)
+                    if usual > 0 and interval > 1.5 * usual:
+                        lost += int(round(interval / usual)) - 1
+                self._intervals.append(interval)
+            self._arrivals.append(timestamp)
+            self._decode_ms.append(decode_ms)
+            self._pipeline_ms.append((published - timestamp) * 1000.0)
+            self._lost.append(lost)
+            self.frames += 1
+            self.total_dropped += lost
+            return FrameInfo(seq, timestamp, published, decode_ms, scale,
+                             lost, self.total_dropped)
+
+    def add_read(self, info: FrameInfo):
+        """Record a view reading the frame described by `info` (read_time set)."""
+        with self._lock:
+            self._read_ages_ms.append((info.read_time - info.timestamp) * 1000.0)
+
+    # ── Rolling figures ───────────────────────────────────────────────────────
+
+    @property
+    def fps(self) -> float:
+        with self._lock:
+            if len(self._arrivals) < 2:
+                return 0.0
+            span = self._arrivals[-1] - self._arrivals[0]
+            return (len(self._arrivals) - 1) / span if span > 0 else 0.0
+
+    @property
+    def drop_rate(self) -> float:
+        """Lost frames over frames that should have arrived, in the window."""
+        with self._lock:
+            lost = sum(self._lost)
+            return lost / (lost + len(self._lost)) if self._lost else 0.0
+
+    def summary(self) -> dict:
+        """Rolling figures as a dict (milliseconds, fps, rates)."""
+        fps, drop_rate = self.fps, self.drop_rate
+        with self._lock:
+            return {
+                'fps': fps,
+                'decode_ms': _mean(self._decode_ms),
+                'decode_p95_ms': _percentile(self._decode_ms, 0.95),
+                'pipeline_ms': _mean(self._pipeline_ms),
+                'read_age_ms': _mean(self._read_ages_ms),
+                'read_age_p95_ms': _percentile(self._read_ages_ms, 0.95),
+                'drop_rate': drop_rate,
+                'total_dropped': self.total_dropped,
+                'frames': self.frames,
+            }
+
+    def overloaded(self, nominal_fps: Optional[float] = None,
+                   max_drop_rate: float = 0.02) -> bool:
+        """
+        True if frames are being lost, decoding takes most of a frame
+        interval, or the frame rate is under 90 % of `nominal_fps`.
+        """
+        s = self.summary()
+        if s['frames'] < 30:
+            return False
+        if s['drop_rate'] > max_drop_rate:
+            return True
+        if s['fps'] > 0 and s['decode_p95_ms'] > 0.8 * 1000.0 / s['fps']:
+            return True
+        return nominal_fps is not None and s['fps'] < 0.9 * nominal_fps
+
+    def sensor_time(self, timestamp: float) -> float:
+        """When a frame stamped `timestamp` was on screen, given device_latency."""
+        return timestamp - self.device_latency
+
+    def __str__(self) -> str:
+        s = self.summary()
+        return (f"{s['fps']:.1f} fps  decode {s['decode_ms']:.2f}/{s['decode_p95_ms']:.2f} ms  "
+                f"pipeline {s['pipeline_ms']:.1f} ms  "
+                f"read age {s['read_age_ms']:.1f}/{s['read_age_p95_ms']:.1f} ms  "
+                f"dropped {s['total_dropped']} ({s['drop_rate']:.1%})")
+
+
+def get_stats(frame_grabber) -> Optional[CaptureStats]:
+    """The grabber's capture stats, or None (GUI grabber)."""
+    return getattr(frame_grabber, 'stats', None)
+
+
+def get_frame_info(frame_grabber) -> Optional[FrameInfo]:
+    """Metadata of the frame the grabber returned last, or None."""
+    getter = getattr(frame_grabber, 'frame_info', None)
+    return getter() if getter is not None else None
+
+
+if __name__ == '__main__':
+    # A live 30 fps clock with frames 40 and 41 missing, then a bus drop.
+    stats = CaptureStats()
+    seq, dropped = 0, []
+    for i in range(90):
+        if i in (40, 41):
+            continue
+        seq += 1
+        t = i / 30.0
+        info = stats.add_frame(seq, t, t + 0.002, 1.5, lost=1 if i == 60 else 0)
+        if info.dropped:
+            dropped.append((i, info.dropped))
+    print(dropped, stats)
+    assert dropped == [(42, 2), (60, 1)] and stats.total_dropped == 3
+    assert 29.0 < stats.fps < 30.0 and stats.overloaded()     # 3 of 90 lost
+    print("PASS")
@@ -0,0 +1,328 @@
+"""
+Fusion — one shiny decision from the light sensor and the camera together.
+
+Each script picked a single sensor: the LDR (fast, high-rate, but only a
+brightness number) or the camera (colour, but at frame rate and only
+after the frame has arrived). SensorFusion runs both in one loop:
+
+  * an LDR sensor is read every `ldr_interval` seconds — it gives the
+    timing (see ldr_window.py: the step judged when the sparkle window
+    closes);
+  * a camera sensor sees every new frame — it confirms by colour or by
+    the sparkle burst (horde.py, sparkle.py);
+  * fixed evidence the script already has (e.g. the measured dark-phase
+    time) goes in as `prior`.
+
+Every sensor holds a score from -1 (surely not shiny) to +1 (surely
+shiny), 0 while it has no opinion. The confidence is the weighted sum of
+the scores, clipped to -1..1, and the wait ends as soon as it reaches
+`accept` (shiny) or `reject` (not shiny). With the default weights and
+limits either sensor alone can call a shiny, two half-sure sensors call
+one that neither would on its own, and "not shiny" needs both — a missed
+shiny costs more than a pause for nothing. A script whose camera sensor
+cannot argue "not shiny" (the sparkle) lowers `reject` to one sensor's
+weight, less what a sparkle score below its noise floor adds, so the LDR
+alone can end the wait.
+
+Example
+-------
+from scripts.fusion import SensorFusion, LdrSensor, SparkleSensor
+from scripts.ldr_window import SparkleWindow
+from scripts.sparkle import SparkleDetector
+
+fusion = SensorFusion(LdrSensor(SparkleWindow(40, 3.0)),
+                      SparkleSensor(SparkleDetector(px(360, 60, 220, 200))))
+verdict = fusion.decide(controller, frame_grabber, stop_event, timeout=4.0)
+if verdict is not None and verdict.shiny:
+    log(f"Shiny! {verdict}")
+
+With the GUI's FrameGrabber (no frame history) the sparkle sensor has no
+frames to look at and stays at 0; the LDR decides alone.
+"""
+
+import time
+from typing import NamedTuple, Optional, Sequence
+
+from scripts.history import get_history
+from scripts.pyramid import new_frames, read_frame
+
+
+class Evidence(NamedTuple):
+    """A score the script already has when the decision starts."""
+
+    name: str
+    score: float
+    weight: float = 0.5
+
+
+class FusedVerdict(NamedTuple):
+    """Outcome of SensorFusion.decide()."""
+
+    shiny: Optional[bool]       # None: undecided when the wait timed out
+    confidence: float
+    scores: dict                # name -> (score, seconds after start it was set)
+    elapsed: float
+
+    def __str__(self) -> str:
+        parts = ", ".join(f"{name} {score:+.2f} at {when:.1f} s"
+                          for name, (score, when) in self.scores.items())
+        return f"confidence {self.confidence:+.2f} after {self.elapsed:.1f} s ({parts})"
+
+
+# ── Sensors ──────────────────────────────────────────────────────────────────
+
+class _Sensor:
+    """Score holder shared by the sensors below."""
+
+    name = 'sensor'
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.score = 0.0
+        self.when = 0.0
+
+    def begin(self):
+        self.score, self.when = 0.0, 0.0
+
+    def _set(self, score: float, elapsed: float):
+        if score != self.score:
+            self.score, self.when = score, elapsed
+
+
+class LdrSensor(_Sensor):
+    """
+    SparkleWindow as a sensor: +1 or -1 once the window closes, on a step
+    or without one. While it is open, a step between the halves so far of
+    over half the limit counts as partial evidence (up to 0.9). Readings start `delay` seconds into the decision, e.g.
+    once the battle screen is up.
+    """
+
+    name = 'ldr'
+
+    def __init__(self, window, weight: float = 0.5, delay: float = 0.0):
+        super().__init__(weight)
+        self.window = window
+        self.delay = delay
+        self.verdict: Optional[bool] = None
+
+    def begin(self):
+        super().begin()
+        self.window.begin()
+        self.verdict = None
+
+    def read(self, controller, elapsed: float):
+        if self.verdict is not None or elapsed < self.delay:
+            return
+        self.verdict = self.window.feed(controller.read_light_value(), elapsed - self.delay)
+        if self.verdict is None:
+            ratio = self.window.last_step / self.window.step_limit
+            self._set(min(0.9, ratio) if ratio > 0.5 else 0.0, elapsed)
+        else:
+            self._set(1.0 if self.verdict else -1.0, elapsed)
+
+
+class HordeSensor(_Sensor):
+    """HordeDetector as a sensor: +1 if a slot deviates, -1 if none does."""
+
+    name = 'sprites'
+
+    def __init__(self, detector, weight: float = 0.5):
+        super().__init__(weight)
+        self.detector = detector
+        self.slots = None
+
+    def begin(self):
+        super().begin()
+        self.detector.begin()
+        self.slots = None
+
+    def see(self, frame_grabber, frame, elapsed: float):
+        if self.slots is not None:
+            return
+        self.slots = self.detector.feed(frame)
+        if self.slots is not None:
+            self._set(1.0 if self.slots else -1.0, elapsed)
+
+
+class SparkleSensor(_Sensor):
+    """
+    SparkleDetector over the last `lookback` seconds of frame history,
+    every `every` seconds: its confidence (0 to 1) is the score. It never
+    argues "not shiny".
+    """
+
+    name = 'sparkle'
+
+    def __init__(self, detector, weight: float = 0.5, lookback: float = 1.5,
+                 every: float = 0.25):
+        super().__init__(weight)
+        self.detector = detector
+        self.lookback = lookback
+        self.every = every
+        self._next = 0.0
+
+    def begin(self):
+        super().begin()
+        self._next = 0.0
+
+    def see(self, frame_grabber, frame, elapsed: float):
+        history = get_history(frame_grabber)
+        if history is None or elapsed < self._next:
+            return
+        self._next = elapsed + self.every
+        score = self.detector.score_history(history, time.time() - self.lookback)
+        self._set(max(self.score, score), elapsed)
+
+
+# ── Engine ───────────────────────────────────────────────────────────────────
+
+def _no_frame(frame_grabber):
+    """new_frames() reader for a fusion without a camera sensor."""
+    return None, time.time(), 0
+
+
+class SensorFusion:
+    """Runs an LDR sensor and a camera sensor until their confidence decides."""
+
+    def __init__(self, ldr: Optional[LdrSensor] = None, camera=None,
+                 accept: float = 0.5, reject: float = -0.75,
+                 ldr_interval: Optional[float] = None, poll: float = 0.02):
+        """
+        Parameters
+        ----------
+        ldr : LdrSensor or None
+            Read every `ldr_interval` seconds.
+        camera : HordeSensor, SparkleSensor or None
+            Shown every new frame.
+        accept, reject : float
+            Confidence at or above which the encounter is shiny, at or
+            below which it is not.
+        ldr_interval : float or None
+            Seconds between LDR reads; defaults to the window's interval.
+        poll : float
+            Longest sleep between checks.
+        """
+        self.ldr = ldr
+        self.camera = camera
+        self.accept = accept
+        self.reject = reject
+        if ldr_interval is None:
+            ldr_interval = ldr.window.interval if ldr is not None else poll
+        self.ldr_interval = ldr_interval
+        self.poll = poll
+
+    def confidence(self, prior: Sequence[Evidence] = ()) -> float:
+        """Weighted sum of the current scores and `prior`, clipped to -1..1."""
+        total = sum(e.weight * e.score for e in prior)
+        for sensor in (self.ldr, self.camera):
+            if sensor is not None:
+                total += sensor.weight * sensor.score
+        return max(-1.0, min(1.0, total))
+
+    def _verdict(self, shiny, confidence, prior, elapsed) -> FusedVerdict:
+        scores = {e.name: (e.score, 0.0) for e in prior}
+        for sensor in (self.ldr, self.camera):
+            if sensor is not None:
+                scores[sensor.name] = (sensor.score, sensor.when)
+        return FusedVerdict(shiny, confidence, scores, elapsed)
+
+    def decide(self, controller, frame_grabber, stop_event, timeout: float,
+               prior: Sequence[Evidence] = ()) -> Optional[FusedVerdict]:
+        """
+        Run the sensors until the confidence reaches `accept` or `reject`,
+        or `timeout` seconds pass (shiny None). None if stopped.
+        """
+        ldr, camera = self.ldr, self.camera
+        for sensor in (ldr, camera):
+            if sensor is not None:
+                sensor.begin()
+        read = read_frame if camera is not None else _no_frame
+        poll = min(self.poll, self.ldr_interval) if ldr is not None else self.poll
+        start = time.time()
+        next_ldr = start
+        for frame, _, _ in new_frames(frame_grabber, stop_event, poll=poll, read=read,
+                                      idle=True):
+            now = time.time()
+            elapsed = now - start
+            if ldr is not None and now >= next_ldr:
+                ldr.read(controller, elapsed)
+                next_ldr = now + self.ldr_interval
+            if frame is not None:
+                camera.see(frame_grabber, frame, elapsed)
+
+            confidence = self.confidence(prior)
+            if confidence >= self.accept:
+                return self._verdict(True, confidence, prior, elapsed)
+            if confidence <= self.reject:
+                return self._verdict(False, confidence, prior, elapsed)
+            if elapsed >= timeout:
+                return self._verdict(None, confidence, prior, elapsed)
+        return None
+
+
+if __name__ == '__main__':
+    import threading
+    import numpy as np
+    from scripts.horde import HordeDetector, HORDE_SIZE
+    from scripts.ldr_window import SparkleWindow
+    from scripts.regions import Region
+
+    class _Rig:
+        """LDR at 100 with an optional +80 step from `step_at` seconds; 30 fps
+        frames of five grey sprites, slot 2 green if `green`."""
+
+        def __init__(self, step_at=None, green=False):
+            self.start, self.step_at, self.green = time.time(), step_at, green
+
+        def read_light_value(self):
+            t = time.time() - self.start
+            return 100 + (80 if self.step_at is not None and t >= self.step_at else 0)
+
+        def read_frame(self):
+            seq = int((time.time() - self.start) * 30) + 1
+            frame = np.full((480, 640, 3), 30, np.uint8)
+            for s in range(HORDE_SIZE):
+                colour = (60, 200, 60) if self.green and s == 2 else (120, 120, 120)
+                frame[200:260, 40 + s * 120:100 + s * 120] = colour
+            return frame, time.time(), seq
+
+        def wait_for_frame(self, after_seq, timeout):
+            time.sleep(min(timeout, 1 / 30.0))
+            return True
+
+    slots = [Region.from_pixels(45 + s * 120, 205, 50, 50) for s in range(HORDE_SIZE)]
+    stop = threading.Event()
+    cases = [
+        # (LDR step at, green sprite, camera on, expected, decided before)
+        (1.0, False, False, True, 2.5),     # the LDR alone calls it, at window close
+        (None, True, True, True, 0.5),      # the camera alone calls it
+        (None, False, True, False, 2.5),    # both say no: camera at once, LDR at window close
+        (1.0, False, True, None, 3.5),      # they disagree: undecided at the timeout
+    ]
+    for step_at, green, camera, expected, within in cases:
+        sprites = HordeSensor(HordeDetector(slots, [(120, 120, 120)] * HORDE_SIZE))
+        fusion = SensorFusion(LdrSensor(SparkleWindow(40, 2.0, interval=0.02)),
+                              sprites if camera else None)
+        rig = _Rig(step_at, green)
+        verdict = fusion.decide(rig, rig, stop, timeout=3.0)
+        print(expected, verdict.shiny, verdict)
+        assert verdict.shiny is expected and verdict.elapsed < within
+    # Neither half-sure sensor decides alone; together they do.
+    class _Values:
+        def __init__(self, values):
+            self.values = iter(values)
+
+        def read_light_value(self):
+            return next(self.values)
+
+    ldr = LdrSensor(SparkleWindow(40, 2.0))
+    ldr.begin()
+    values = _Values([100, 100, 100, 130, 130, 130])
+    for i in range(6):
+        ldr.read(values, i * 0.1)
+    fusion = SensorFusion(ldr)
+    print("LDR step 30 of 40:", fusion.confidence(),
+          "with a half-sure sparkle:", fusion.confidence([Evidence('sparkle', 0.5)]))
+    assert ldr.score == 0.75 and fusion.confidence() < fusion.accept
+    assert fusion.confidence([Evidence('sparkle', 0.5)]) >= fusion.accept
+    print("PASS")
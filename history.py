@@ -0,0 +1,145 @@
+"""
+History — a memory-capped ring of recent frames for retroactive checks.
+
+Scripts that see a possible shiny used to sleep a few seconds and look
+again, because the frames they had just seen were gone. FrameHistory keeps
+the last few seconds of (downscaled) frames in one preallocated array, so a
+detector can look back over the frames it already missed and confirm or
+reject a candidate straight away.
+
+SharedCapture(history_seconds=...) fills one per capture from its decode
+thread; ConsoleGrabber exposes it as `frame_grabber.history`. Frames are
+stored uncropped.
+
+Example
+-------
+from scripts.history import get_history
+from scripts.regions import px
+
+history = get_history(frame_grabber)
+if history is not None:
+    frames, stamps = history.between(time.time() - 1.0, region=px(x, y, w, h))
+    means = frames.reshape(len(frames), -1, 3).mean(axis=1)    # per-frame B, G, R
+"""
+
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class FrameHistory:
+    """Fixed-size ring of (frame, timestamp, seq), oldest overwritten first."""
+
+    def __init__(self, seconds: float = 3.0, fps: float = 30.0,
+                 size: Tuple[int, int] = (320, 240), max_bytes: int = 32 << 20):
+        """
+        Parameters
+        ----------
+        seconds, fps : float
+            How much history to keep: seconds × fps frames, unless that
+            exceeds `max_bytes`.
+        size : (w, h)
+            Stored frame size. Frames are area-downscaled to it on push.
+        max_bytes : int
+            Hard cap on the pixel buffer.
+        """
+        w, h = size
+        frame_bytes = w * h * 3
+        capacity = max(2, min(int(np.ceil(seconds * fps)), max_bytes // frame_bytes))
+        self.size = size
+        self._frames = np.zeros((capacity, h, w, 3), np.uint8)
+        self._timestamps = np.zeros(capacity, np.float64)
+        self._seqs = np.zeros(capacity, np.int64)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return len(self._frames)
+
+    @property
+    def nbytes(self) -> int:
+        return self._frames.nbytes
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    def push(self, frame, timestamp: float, seq: int = 0):
+        """Store a BGR frame, overwriting the oldest once full."""
+        with self._lock:
+            i = self._next
+            slot = self._frames[i]
+            if frame.shape[:2] == slot.shape[:2]:
+                np.copyto(slot, frame)
+            else:
+                import cv2
+                cv2.resize(frame, self.size, dst=slot, interpolation=cv2.INTER_AREA)
+            self._timestamps[i] = timestamp
+            self._seqs[i] = seq
+            self._next = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        with self._lock:
+            self._next = 0
+            self._count = 0
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def _order(self) -> np.ndarray:
+        """Slot indices, oldest first. Call with the lock held."""
+        start = (self._next - self._count) % self.capacity
+        return (start + np.arange(self._count)) % self.capacity
+
+    def _gather(self, idx, region):
+        frames = self._frames
+        if region is not None:
+            y0, y1, x0, x1 = region.roi(frames.shape[1:])
+            frames = frames[:, y0:y1, x0:x1]
+        return frames[idx], self._timestamps[idx]
+
+    def between(self, t0: float, t1: Optional[float] = None,
+                region=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Frames stamped t0 <= t <= t1 (t1 defaults to now), oldest first.
+
+        Returns (frames, timestamps): a (k, h, w, 3) copy — cropped to
+        `region` (a regions.Region) if given — and the k timestamps. k may
+        be 0.
+        """
+        with self._lock:
+            idx = self._order()
+            stamps = self._timestamps[idx]
+            keep = stamps >= t0
+            if t1 is not None:
+                keep &= stamps <= t1
+            return self._gather(idx[keep], region)
+
+    def latest(self, n: int = 1, region=None) -> Tuple[np.ndarray, np.ndarray]:
+        """The newest `n` frames (fewer if not yet filled), oldest first."""
+        with self._lock:
+            idx = self._order()[-n:] if n > 0 else self._order()[:0]
+            return self._gather(idx, region)
+
+    def span(self) -> float:
+        """Seconds between the oldest and newest stored frame."""
+        with self._lock:
+            if self._count < 2:
+                return 0.0
+            idx = self._order()
+            return float(self._timestamps[idx[-1]] - self._timestamps[idx[0]])
+
+
+def get_history(frame_grabber) -> Optional[FrameHistory]:
+    """The grabber's frame history, or None (GUI grabber, or disabled)."""
+    return getattr(frame_grabber, 'history', None)
+
+
+def region_means(frames) -> np.ndarray:
+    """Per-frame mean (R, G, B) of a (k, h, w, 3) BGR stack, shape (k, 3)."""
+    means = frames.reshape(len(frames), -1, 3).mean(axis=1)
+    return means[:, ::-1]
@@ -0,0 +1,270 @@
+"""
+Horde — shiny check over all five sprites of a horde battle at once.
+
+A horde has five wild Pokemon and any of them can be shiny, but the horde
+scripts compared one calibrated sprite (or only timed the LDR dark phase).
+HordeDetector keeps one region and one baseline colour per slot:
+
+  * slot_means() gets the mean B, G, R of every slot in one vectorised
+    pass — a label map over the slots' bounding box is built once per frame
+    size, and np.bincount sums each channel per label;
+  * deviating_slots() lists the slots whose colour is off their own
+    baseline by more than `tolerance` on any channel;
+  * wait_for_verdict() decides on the first settled battle frame: the slot
+    colours have stopped changing for `settle_frames` frames and at least
+    `min_matching` slots look like their baseline (so it is the battle, not
+    a fade or a text box). A deviation must then hold for `confirm_frames`
+    further frames, instead of a fixed wait and a recheck seconds later.
+
+Example
+-------
+from scripts.horde import HordeDetector, calibrate_horde_slots
+
+cal.update(calibrate_horde_slots(frame_grabber, stop_event, log, request_calibration))
+...
+detector = HordeDetector.from_calibration(cal)
+verdict = detector.wait_for_verdict(frame_grabber, stop_event, timeout=12.0)
+if verdict:                                         # e.g. [3]
+    log(f"Shiny in slot(s) {[s + 1 for s in verdict]}")
+"""
+
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from scripts.pyramid import new_frames
+from scripts.regions import Region
+
+
+HORDE_SIZE = 5
+
+
+class HordeDetector:
+    """Per-slot baselines for the sprites of a horde, judged per frame."""
+
+    def __init__(self, slots: Sequence[Region], baselines: Sequence[Sequence[float]],
+                 tolerance: float = 15.0, settle_delta: float = 4.0,
+                 settle_frames: int = 3, confirm_frames: int = 3,
+                 min_matching: Optional[int] = None):
+        """
+        Parameters
+        ----------
+        slots : list of Region
+            One region per sprite.
+        baselines : list of (B, G, R)
+            Each slot's mean colour when not shiny.
+        tolerance : float
+            Per-channel distance from the baseline that counts as deviating.
+        settle_delta : float
+            Largest change of any slot mean between frames that still counts
+            as settled.
+        settle_frames, confirm_frames : int
+            Settled frames before judging; frames a deviation must persist.
+        min_matching : int or None
+            Slots that must match their baseline for a frame to be the
+            battle screen. Defaults to all but two; at least one, and
+            fewer than the slots, so a fade cannot pass for the battle and
+            a shiny can still be seen. This needs two or more slots.
+        """
+        if len(slots) != len(baselines):
+            raise ValueError("need one baseline per slot")
+        if min_matching is None:
+            min_matching = max(1, len(slots) - 2)
+        if not 1 <= min_matching < len(slots):
+            raise ValueError(f"min_matching must be from 1 to {len(slots) - 1} "
+                             f"for {len(slots)} slot(s), got {min_matching}")
+        self.slots = list(slots)
+        self.baselines = np.array(baselines, np.float64)
+        self.tolerance = tolerance
+        self.settle_delta = settle_delta
+        self.settle_frames = settle_frames
+        self.confirm_frames = confirm_frames
+        self.min_matching = min_matching
+        self.last_means: Optional[np.ndarray] = None
+        self._labels_for = None
+        self.begin()
+
+    @classmethod
+    def from_calibration(cls, cal: dict, **kwargs) -> Optional['HordeDetector']:
+        """
+        Detector for a calibration written with calibrate_horde_slots(), or
+        None for anything else. An older single-region calibration
+        ('region', 'baseline') is rejected: one slot cannot tell the black
+        fade after the blackout from a shiny, so it must be recalibrated.
+        """
+        kwargs.setdefault('tolerance', cal.get('tolerance', 15))
+        if len(cal.get('horde_slots', ())) < 2:
+            return None
+        return cls([Region.from_json(r) for r in cal['horde_slots']],
+                   [b[::-1] for b in cal['horde_baselines']], **kwargs)
+
+    # ── Per-frame evaluation ─────────────────────────────────────────────────
+
+    def _labels(self, shape):
+        """Label map (0 = no slot, i + 1 = slot i) over the slots' bounding box."""
+        if self._labels_for != shape[:2]:
+            rects = [r.to_pixels(shape) for r in self.slots]
+            x0 = min(x for x, y, w, h in rects)
+            y0 = min(y for x, y, w, h in rects)
+            x1 = max(x + w for x, y, w, h in rects)
+            y1 = max(y + h for x, y, w, h in rects)
+            labels = np.zeros((y1 - y0, x1 - x0), np.intp)
+            for i, (x, y, w, h) in enumerate(rects):
+                labels[y - y0:y - y0 + h, x - x0:x - x0 + w] = i + 1
+            self._box = (y0, y1, x0, x1)
+            self._flat = labels.ravel()
+            self._counts = np.bincount(self._flat, minlength=len(self.slots) + 1)[1:]
+            self._labels_for = shape[:2]
+        return self._box
+
+    def slot_means(self, frame) -> np.ndarray:
+        """Mean (B, G, R) of every slot, shape (slots, 3)."""
+        y0, y1, x0, x1 = self._labels(frame.shape)
+        pixels = frame[y0:y1, x0:x1].reshape(-1, 3)
+        n = len(self.slots) + 1
+        sums = np.stack([np.bincount(self._flat, weights=pixels[:, c], minlength=n)[1:]
+                         for c in range(3)], axis=1)
+        return sums / np.maximum(self._counts, 1)[:, None]
+
+    def deviations(self, means: np.ndarray) -> np.ndarray:
+        """Largest per-channel distance of each slot from its baseline."""
+        return np.abs(means - self.baselines).max(axis=1)
+
+    def deviating_slots(self, frame) -> List[int]:
+        """Slots (0-based) whose colour is off their baseline."""
+        self.last_means = self.slot_means(frame)
+        return [int(i) for i in np.flatnonzero(self.deviations(self.last_means) > self.tolerance)]
+
+    def begin(self):
+        """Start judging a new battle (see feed())."""
+        self._previous, self._settled = None, 0
+        self._suspects, self._confirmed = None, 0
+
+    def feed(self, frame) -> Optional[List[int]]:
+        """
+        One frame of the battle after begin(). The shiny slots ([] if none)
+        once a settled battle frame decides, else None.
+        """
+        means = self.slot_means(frame)
+        previous, self._previous = self._previous, means
+        still = previous is not None and np.abs(means - previous).max() <= self.settle_delta
+        self._settled = self._settled + 1 if still else 0
+        off = self.deviations(means) > self.tolerance
+        if self._settled < self.settle_frames or len(off) - off.sum() < self.min_matching:
+            return None
+        self.last_means = means
+        slots = [int(i) for i in np.flatnonzero(off)]
+        if not slots:
+            return []
+        if slots == self._suspects:
+            self._confirmed += 1
+            if self._confirmed >= self.confirm_frames:
+                return slots
+        else:
+            self._suspects, self._confirmed = slots, 0
+        return None
+
+    # ── Grabber helper ────────────────────────────────────────────────────────
+
+    def wait_for_verdict(self, frame_grabber, stop_event, timeout: float,
+                         poll: float = 0.03) -> Optional[List[int]]:
+        """
+        Judge the first settled battle frame. Returns the shiny slots ([]
+        if none), or None on timeout / stop.
+        """
+        self.begin()
+        for frame, _, _ in new_frames(frame_grabber, stop_event, timeout, poll):
+            verdict = self.feed(frame)
+            if verdict is not None:
+                return verdict
+        return None
+
+    def describe(self, slots: Sequence[int]) -> str:
+        """'slot 4 B:.. G:.. R:.. (baseline ...)' for the log."""
+        parts = []
+        for s in slots:
+            b, g, r = self.last_means[s] if self.last_means is not None else (0, 0, 0)
+            bb, bg, br = self.baselines[s]
+            parts.append(f"slot {s + 1} R:{r:.0f} G:{g:.0f} B:{b:.0f} "
+                         f"(baseline R:{br:.0f} G:{bg:.0f} B:{bb:.0f})")
+        return "; ".join(parts)
+
+
+def calibrate_horde_slots(frame_grabber, stop_event, log, request_calibration,
+                          count: int = HORDE_SIZE) -> dict:
+    """
+    Ask for a region over each sprite of a loaded, non-shiny horde; return
+    the calibration entries HordeDetector.from_calibration() reads, or {}
+    if stopped.
+    """
+    log(f"Draw a region over each of the {count} wild Pokemon sprites, "
+        "left to right, back row first.")
+    rects = []
+    for i in range(count):
+        rect = request_calibration(f"Draw region over wild Pokemon {i + 1} of {count}")
+        if stop_event.is_set():
+            return {}
+        rects.append(rect)
+    time.sleep(0.1)
+    frame = frame_grabber.get_latest_frame()
+    if frame is None:
+        log("No frame — ensure webcam is connected.")
+        return {}
+    slots = [Region.from_pixels(*rect, frame_shape=frame.shape) for rect in rects]
+    means = HordeDetector(slots, [(0, 0, 0)] * count).slot_means(frame)
+    for i, (b, g, r) in enumerate(means):
+        log(f"Slot {i + 1} baseline — R:{r:.1f}  G:{g:.1f}  B:{b:.1f}")
+    return {'horde_slots': [s.to_json() for s in slots],
+            'horde_baselines': [[round(float(v), 1) for v in m[::-1]] for m in means]}
+
+
+if __name__ == '__main__':
+    import threading
+
+    class _Battle:
+        """Fade-in over 20 frames, then five grey sprites; `shiny` slot is
+        green from the start, with a few frames of idle wobble."""
+
+        def __init__(self, shiny=None):
+            self.i, self.shiny = 0, shiny
+
+        def read_frame(self):
+            level = min(1.0, self.i / 20.0)
+            frame = np.full((480, 640, 3), int(30 * level), np.uint8)
+            for s in range(HORDE_SIZE):
+                colour = (60, 200, 60) if s == self.shiny else (120, 120, 120)
+                wobble = 2 if self.i % 2 else 0
+                frame[200:260, 40 + s * 120 + wobble:100 + s * 120 + wobble] = \
+                    [int(c * level) for c in colour]
+            self.i += 1
+            return frame, self.i / 30.0, self.i
+
+        def wait_for_frame(self, after_seq, timeout):
+            return True
+
+    slots = [Region.from_pixels(45 + s * 120, 205, 50, 50) for s in range(HORDE_SIZE)]
+    detector = HordeDetector(slots, [(120, 120, 120)] * HORDE_SIZE)
+    stop = threading.Event()
+    for shiny in (None, 3):
+        battle = _Battle(shiny)
+        verdict = detector.wait_for_verdict(battle, stop, 5.0)
+        print(f"shiny slot {shiny}: verdict {verdict} at frame {battle.i}",
+              detector.describe(verdict or []))
+        assert verdict == ([] if shiny is None else [shiny]) and battle.i < 30
+
+    # A steady black fade must never be judged, and a one-region calibration
+    # (which would take the fade for a shiny) is refused.
+    class _Fade:
+        def read_frame(self):
+            return np.zeros((480, 640, 3), np.uint8), time.time(), 0
+
+    assert detector.wait_for_verdict(_Fade(), stop, 0.5) is None
+    legacy = {'region': slots[0].to_json(), 'baseline': [120, 120, 120]}
+    assert HordeDetector.from_calibration(legacy) is None
+    try:
+        HordeDetector(slots[:1], [(120, 120, 120)])
+        raise AssertionError("one slot accepted")
+    except ValueError:
+        pass
+    print("PASS")
@@ -0,0 +1,186 @@
+"""
+Kernels — allocation-free pixel-mask detection kernels.
+
+The dark / white / red tests that detectors run 20–30 times a second used to
+allocate several full-size temporaries per call (one boolean array per
+channel comparison, one per `&`, plus the result of `.sum()`/`.mean()`).
+These kernels instead:
+
+  * reduce the three channels in one step with an element-wise channel
+    max (all channels below T ⇔ max < T) or min (all above T ⇔ min > T),
+    written into a preallocated buffer with `out=`;
+  * threshold into a second preallocated boolean buffer with `out=`;
+  * count with np.count_nonzero, which allocates nothing.
+
+Buffers are kept per thread and per region shape, so each script thread
+reuses the same two buffers for every call after the first, and the kernels
+are safe to call from several scripts at once.
+
+Run `python -m scripts.kernels` to compare allocations and time per call
+against the chained-comparison versions they replace.
+"""
+
+import threading
+from typing import Tuple
+
+import numpy as np
+
+
+_local = threading.local()
+
+
+def scratch(key: str, shape: Tuple[int, ...], dtype) -> np.ndarray:
+    """
+    Return this thread's reusable buffer for (key, shape, dtype), allocating
+    it only the first time. Contents are undefined; callers overwrite them.
+    """
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    k = (key, shape, dtype)
+    buf = buffers.get(k)
+    if buf is None:
+        buf = buffers[k] = np.empty(shape, dtype)
+    return buf
+
+
+def channel_max(region, out=None) -> np.ndarray:
+    """Per-pixel max of B, G and R."""
+    if out is None:
+        out = scratch('chan', region.shape[:2], np.uint8)
+    np.maximum(region[..., 0], region[..., 1], out=out)
+    return np.maximum(out, region[..., 2], out=out)
+
+
+def channel_min(region, out=None) -> np.ndarray:
+    """Per-pixel min of B, G and R."""
+    if out is None:
+        out = scratch('chan', region.shape[:2], np.uint8)
+    np.minimum(region[..., 0], region[..., 1], out=out)
+    return np.minimum(out, region[..., 2], out=out)
+
+
+def dark_mask(region, threshold: int) -> np.ndarray:
+    """Scratch boolean mask of pixels with B, G and R all below `threshold`."""
+    return np.less(channel_max(region), threshold,
+                   out=scratch('mask', region.shape[:2], np.bool_))
+
+
+def white_mask(region, threshold: int) -> np.ndarray:
+    """Scratch boolean mask of pixels with B, G and R all above `threshold`."""
+    return np.greater(channel_min(region), threshold,
+                      out=scratch('mask', region.shape[:2], np.bool_))
+
+
+def count_dark(region, threshold: int) -> int:
+    """Pixels whose B, G and R are all below `threshold`."""
+    return int(np.count_nonzero(dark_mask(region, threshold)))
+
+
+def dark_fraction(region, threshold: int) -> float:
+    """Fraction of pixels whose B, G and R are all below `threshold`."""
+    return count_dark(region, threshold) / max(1, region.shape[0] * region.shape[1])
+
+
+def count_white(region, threshold: int) -> int:
+    """Pixels whose B, G and R are all above `threshold`."""
+    return int(np.count_nonzero(white_mask(region, threshold)))
+
+
+def count_red(region, min_r: int, max_g: int) -> int:
+    """Pixels with R above `min_r` and G below `max_g`."""
+    shape = region.shape[:2]
+    mask = np.greater(region[..., 2], min_r, out=scratch('mask', shape, np.bool_))
+    low_g = np.less(region[..., 1], max_g, out=scratch('mask2', shape, np.bool_))
+    return int(np.count_nonzero(np.logical_and(mask, low_g, out=mask)))
+
+
+def longest_run(mask) -> int:
+    """Longest run of consecutive True values in `mask`, read row by row."""
+    flat = mask.reshape(-1)
+    if not flat.any():
+        return 0
+    # Indices where the value changes, bracketed by the ends of the array.
+    change = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    bounds = np.concatenate(([0], change, [flat.size]))
+    lengths = np.diff(bounds)
+    # Runs alternate True/False starting with flat[0].
+    start = 0 if flat[0] else 1
+    return int(lengths[start::2].max()) if lengths[start::2].size else 0
+
+
+def hatch_text(region, threshold: int) -> Tuple[int, int]:
+    """
+    (dark pixel count, longest run of consecutive dark pixels) over the
+    region read row by row — the SwSh hatch-text bar test.
+    """
+    dark = dark_mask(region, threshold)
+    total = int(np.count_nonzero(dark))
+    if total == 0:
+        return 0, 0
+    return total, longest_run(dark)
+
+
+# ── Benchmark ────────────────────────────────────────────────────────────────
+
+def _chained_dark_fraction(region, threshold):
+    dark = ((region[:, :, 0] < threshold) &
+            (region[:, :, 1] < threshold) &
+            (region[:, :, 2] < threshold))
+    return dark.mean()
+
+
+def _chained_hatch_text(region, threshold):
+    dark = ((region[:, :, 0] < threshold) &
+            (region[:, :, 1] < threshold) &
+            (region[:, :, 2] < threshold)).ravel()
+    edges = np.diff(np.concatenate(([0], dark.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int(dark.sum()), int((ends - starts).max()) if starts.size else 0
+
+
+def _chained_white_red(region, white_min, red_min_r, red_max_g):
+    white = ((region[:, :, 0] > white_min) &
+             (region[:, :, 1] > white_min) &
+             (region[:, :, 2] > white_min))
+    red = ((region[:, :, 2] > red_min_r) &
+           (region[:, :, 1] < red_max_g))
+    return white.sum(), red.sum()
+
+
+def _measure(fn, calls: int = 200):
+    """(peak bytes allocated by one call, ms per call)."""
+    import time
+    import tracemalloc
+    fn()                                # warm scratch buffers
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return peak, (time.perf_counter() - t0) / calls * 1000.0
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    blackout = frame[50:430, 50:590]            # bdsp_wild_shiny sample
+    hatch = frame[310:320, 145:395]             # SwSh hatch-text strip
+    bite = frame[150:230, 280:360]              # chain fishing exclamation
+
+    cases = [
+        ("blackout 380×540", lambda: _chained_dark_fraction(blackout, 40),
+         lambda: dark_fraction(blackout, 40)),
+        ("hatch text 10×250", lambda: _chained_hatch_text(hatch, 120),
+         lambda: hatch_text(hatch, 120)),
+        ("exclamation 80×80", lambda: _chained_white_red(bite, 200, 180, 100),
+         lambda: (count_white(bite, 200), count_red(bite, 180, 100))),
+    ]
+    print(f"{'kernel':<20} {'before':>22} {'after':>22}")
+    for name, before, after in cases:
+        b_bytes, b_ms = _measure(before)
+        a_bytes, a_ms = _measure(after)
+        print(f"{name:<20} {b_bytes:>9d} B {b_ms:8.3f} ms {a_bytes:>9d} B {a_ms:8.3f} ms")
@@ -0,0 +1,333 @@
+"""
+LDR profile — measure the light sensor instead of hand-tuning it.
+
+The LDR scripts carry thresholds someone tuned by watching readings
+(LDR_DARK_THRESHOLD, LDR_STEP_CHANGE) and nobody knew how fast the sensor
+can be read. characterize() works them out from a recording of several
+dark / bright cycles of the bottom screen:
+
+  * the dark / bright split is Otsu's threshold over the readings — the
+    cut that best separates the two brightness levels;
+  * the noise floor is the spread of the reading-to-reading change while
+    the level does not move (a robust MAD, so edges do not count);
+  * the recommended step is the smallest the noise will not fake (six
+    sigma), but at most a quarter of the dark-to-bright contrast;
+  * read_light_value() is called back to back, so the recording also
+    gives the achievable sample rate and the command round trip.
+
+With a frame history (ConsoleGrabber) the same edges are looked for in
+the camera frames, and the median delay from the LDR edge to the frame
+is the capture's device latency (CaptureStats.device_latency). The LDR
+responds a little slowly, so it is a lower bound.
+
+The result is stored in calibration/light_sensor.json, written by the
+Light Sensor Test script and read by the hunting scripts.
+
+Example
+-------
+from scripts.ldr_profile import load_ldr_profile
+
+profile = load_ldr_profile()
+if profile is not None:
+    dark_threshold, step = profile.threshold, profile.step
+"""
+
+import json
+import os
+import sys
+import time
+from statistics import median
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from scripts.frame_stats import get_stats
+from scripts.history import get_history
+
+
+LDR_MAX = 1023
+
+
+def _cal_path() -> str:
+    if getattr(sys, 'frozen', False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.abspath(__file__))
+    cal_dir = os.path.join(base, 'calibration')
+    os.makedirs(cal_dir, exist_ok=True)
+    return os.path.join(cal_dir, 'light_sensor.json')
+
+
+class LdrSample(NamedTuple):
+    """One read_light_value() call."""
+
+    time: float                 # middle of the round trip
+    value: int
+    rtt: float                  # seconds the call took
+
+
+class LdrProfile(NamedTuple):
+    """What characterize() found."""
+
+    threshold: float            # below = dark
+    dark: float                 # median dark reading
+    bright: float               # median bright reading
+    noise: float                # noise floor (1 sigma, reading units)
+    step: float                 # recommended minimum step
+    cycles: int                 # dark -> bright edges seen
+    sample_rate: float          # readings per second
+    rtt_ms: float               # median round trip
+    rtt_p90_ms: float
+    device_latency_ms: Optional[float] = None
+
+    def __str__(self) -> str:
+        text = (f"dark {self.dark:.0f} / bright {self.bright:.0f}, threshold "
+                f"{self.threshold:.0f}, noise {self.noise:.1f}, step {self.step:.0f}, "
+                f"{self.cycles} cycle(s); {self.sample_rate:.0f} readings/s, round trip "
+                f"{self.rtt_ms:.1f} ms (p90 {self.rtt_p90_ms:.1f})")
+        if self.device_latency_ms is not None:
+            text += f"; capture latency {self.device_latency_ms:.0f} ms"
+        return text
+
+
+# ── Analysis ─────────────────────────────────────────────────────────────────
+
+def otsu_threshold(values) -> float:
+    """Otsu's threshold for integer readings: the cut maximising between-class variance."""
+    values = np.asarray(values, np.int64)
+    hist = np.bincount(np.clip(values, 0, LDR_MAX), minlength=LDR_MAX + 1).astype(np.float64)
+    levels = np.arange(len(hist), dtype=np.float64)
+    weight = np.cumsum(hist)
+    mass = np.cumsum(hist * levels)
+    total, total_mass = weight[-1], mass[-1]
+    below, above = weight, total - weight
+    valid = (below > 0) & (above > 0)
+    mean_below = np.divide(mass, below, out=np.zeros_like(mass), where=valid)
+    mean_above = np.divide(total_mass - mass, above, out=np.zeros_like(mass), where=valid)
+    between = np.where(valid, below * above * (mean_below - mean_above) ** 2, 0.0)
+    # Every cut in the empty gap between the classes scores the same: take
+    # the middle of them, not the edge of the dark class.
+    best = np.flatnonzero(between == between.max())
+    return float(best[0] + best[-1]) / 2.0 + 0.5
+
+
+def noise_floor(values) -> float:
+    """1-sigma reading noise from consecutive differences (MAD, edges ignored)."""
+    diffs = np.abs(np.diff(np.asarray(values, np.float64)))
+    if not len(diffs):
+        return 0.0
+    # The difference of two noisy readings has sqrt(2) times their sigma.
+    return float(1.4826 * np.median(diffs) / np.sqrt(2.0))
+
+
+def count_cycles(values, threshold: float, hysteresis: float) -> int:
+    """Dark -> bright edges, with `hysteresis` either side of the threshold."""
+    cycles, state = 0, None
+    for v in values:
+        if v < threshold - hysteresis:
+            new = 'dark'
+        elif v > threshold + hysteresis:
+            new = 'bright'
+        else:
+            continue
+        if state == 'dark' and new == 'bright':
+            cycles += 1
+        state = new
+    return cycles
+
+
+def link_speed(samples: List[LdrSample]) -> Tuple[float, float, float]:
+    """(readings per second, median round trip ms, p90 round trip ms)."""
+    if len(samples) < 2:
+        return 0.0, 0.0, 0.0
+    duration = samples[-1].time - samples[0].time
+    rtts = sorted(s.rtt * 1000.0 for s in samples)
+    rate = (len(samples) - 1) / duration if duration > 0 else 0.0
+    return round(rate, 1), round(median(rtts), 2), round(rtts[int(0.9 * (len(rtts) - 1))], 2)
+
+
+def characterize(samples: List[LdrSample], min_share: float = 0.05,
+                 min_contrast: float = 10.0,
+                 device_latency: Optional[float] = None) -> Optional[LdrProfile]:
+    """
+    Profile of a recording, or None unless both levels cover at least
+    `min_share` of the readings and stand `min_contrast` noise sigmas
+    apart.
+    """
+    if len(samples) < 10:
+        return None
+    values = np.array([s.value for s in samples], np.int64)
+    threshold = otsu_threshold(values)
+    dark, bright = values[values < threshold], values[values >= threshold]
+    if min(len(dark), len(bright)) < min_share * len(values):
+        return None
+    noise = noise_floor(values)
+    dark_level, bright_level = float(np.median(dark)), float(np.median(bright))
+    contrast = bright_level - dark_level
+    if contrast < min_contrast * max(noise, 1.0):
+        return None
+    # Smallest step the noise will not fake, but no more than a quarter of
+    # the full dark-to-bright contrast (a battle brightens less than that).
+    step = min(contrast / 4.0, max(6.0 * noise, 5.0))
+    cycles = count_cycles(values, threshold, max(3.0 * noise, contrast / 10.0))
+    rate, rtt, rtt_p90 = link_speed(samples)
+    return LdrProfile(
+        threshold=round(threshold, 1), dark=dark_level, bright=bright_level,
+        noise=round(noise, 2), step=round(step, 1), cycles=cycles,
+        sample_rate=rate, rtt_ms=rtt, rtt_p90_ms=rtt_p90,
+        device_latency_ms=None if device_latency is None else round(device_latency * 1000.0, 1))
+
+
+# ── Capture latency ──────────────────────────────────────────────────────────
+
+def frame_edge_delay(history, edge_time: float, rising: bool, span: float = 0.8,
+                     min_swing: float = 20.0) -> Optional[float]:
+    """
+    Seconds from an LDR edge at `edge_time` to the first frame past the
+    midpoint of the same brightness change, or None if the frames in
+    `span` seconds around it show no such change.
+    """
+    frames, stamps = history.between(edge_time - span / 2.0, edge_time + span)
+    if len(frames) < 3:
+        return None
+    means = frames.reshape(len(frames), -1).mean(axis=1)
+    low, high = means.min(), means.max()
+    if high - low < min_swing:
+        return None
+    mid = (low + high) / 2.0
+    crossed = means > mid if rising else means < mid
+    after = np.flatnonzero(crossed)
+    if not len(after) or after[0] == 0:
+        return None
+    return float(stamps[after[0]] - edge_time)
+
+
+# ── Recording ────────────────────────────────────────────────────────────────
+
+def record(controller, stop_event, seconds: float, frame_grabber=None,
+           progress=None, edge_threshold: Optional[float] = None
+           ) -> Tuple[List[LdrSample], List[float]]:
+    """
+    Read the LDR back to back for `seconds`. Returns the samples and, with
+    a frame history, the frame delays of the LDR edges (see
+    frame_edge_delay). `progress(sample)` is called about once a second.
+
+    Edges are found against `edge_threshold`, or against the midpoint of
+    the readings so far.
+    """
+    history = get_history(frame_grabber) if frame_grabber is not None else None
+    samples, delays, pending = [], [], []
+    low = high = None
+    state = None
+    start = time.time()
+    next_progress = start + 1.0
+    while time.time() - start < seconds and not stop_event.is_set():
+        t0 = time.time()
+        value = controller.read_light_value()
+        t1 = time.time()
+        sample = LdrSample((t0 + t1) / 2.0, int(value), t1 - t0)
+        samples.append(sample)
+        low = value if low is None else min(low, value)
+        high = value if high is None else max(high, value)
+
+        if history is not None and high - low > 0:
+            threshold = edge_threshold if edge_threshold is not None else (low + high) / 2.0
+            margin = (high - low) / 10.0
+            new = ('bright' if value > threshold + margin
+                   else 'dark' if value < threshold - margin else state)
+            if state is not None and new != state:
+                pending.append((sample.time, new == 'bright'))
+            state = new
+            while pending and t1 - pending[0][0] > 1.0:     # frames are in by now
+                edge_time, rising = pending.pop(0)
+                delay = frame_edge_delay(history, edge_time, rising)
+                if delay is not None:
+                    delays.append(delay)
+
+        if progress is not None and t1 >= next_progress:
+            progress(sample)
+            next_progress = t1 + 1.0
+    return samples, delays
+
+
+def device_latency(delays: List[float], min_edges: int = 3) -> Optional[float]:
+    """Median frame delay of the LDR edges, if enough edges were matched."""
+    if len(delays) < min_edges:
+        return None
+    return max(0.0, median(delays))
+
+
+def apply_device_latency(frame_grabber, profile: Optional[LdrProfile]) -> bool:
+    """Set the grabber's CaptureStats.device_latency from a profile that has one."""
+    stats = get_stats(frame_grabber)
+    if stats is None or profile is None or profile.device_latency_ms is None:
+        return False
+    stats.device_latency = profile.device_latency_ms / 1000.0
+    return True
+
+
+# ── Calibration store ────────────────────────────────────────────────────────
+
+def load_ldr_profile() -> Optional[LdrProfile]:
+    """The stored profile, or None if the sensor was never characterized."""
+    path = _cal_path()
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return LdrProfile(**{k: data[k] for k in LdrProfile._fields if k in data})
+    except Exception:
+        return None
+
+
+def save_ldr_profile(profile: LdrProfile):
+    data = profile._asdict()
+    data['measured'] = time.strftime('%Y-%m-%d %H:%M:%S')
+    with open(_cal_path(), 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+if __name__ == '__main__':
+    import threading
+
+    class _Sensor:
+        """Dark 150 / bright 700 square wave (1 s period), noise sigma 4,
+        with a 2 ms round trip."""
+
+        def __init__(self):
+            self.start = time.time()
+            self.rng = np.random.default_rng(0)
+
+        def read_light_value(self):
+            time.sleep(0.002)
+            level = 700 if int((time.time() - self.start) * 2) % 2 else 150
+            return int(level + self.rng.normal(0, 4))
+
+    samples, _ = record(_Sensor(), threading.Event(), 4.0)
+    profile = characterize(samples)
+    print(profile)
+    assert 150 < profile.threshold < 700 and abs(profile.noise - 4) < 1.5
+    assert profile.cycles >= 3 and 100 < profile.sample_rate < 600
+    assert 2.0 <= profile.rtt_ms < 10.0 and 20 <= profile.step <= 275
+    assert characterize(samples[:200]) is None          # one level only
+
+    # Camera latency: frames show the LDR's edges 60 ms late.
+    class _History:
+        def __init__(self, edges, latency):
+            self.stamps = np.arange(0.0, 4.0, 1 / 30.0)
+            self.levels = [200 if sum(t - latency >= e for e in edges) % 2 else 20
+                           for t in self.stamps]
+
+        def between(self, t0, t1=None, region=None):
+            keep = (self.stamps >= t0) & (self.stamps <= t1)
+            frames = np.array([np.full((4, 4, 3), v, np.uint8)
+                               for v, k in zip(self.levels, keep) if k])
+            return frames, self.stamps[keep]
+
+    edges = [1.0, 2.0, 3.0]
+    history = _History(edges, 0.06)
+    delays = [frame_edge_delay(history, e, i % 2 == 0) for i, e in enumerate(edges)]
+    print("frame delays:", delays, "latency:", device_latency(delays))
+    assert all(0.06 <= d < 0.06 + 1 / 30.0 + 1e-9 for d in delays)
+    print("PASS")
@@ -0,0 +1,208 @@
+"""
+LDR window — stop watching the light sensor once the sparkle can no longer
+come.
+
+The LDR scripts read the sensor for a fixed time per encounter (25 s for
+chain fishing) and compared the first half of the readings against the
+second. But the battle intro plays at the same pace every time: the
+sprites slide in, the sparkle plays if there is one, the text box opens,
+and after that the bottom screen does not change. SparkleWindow streams
+the sensor and learns where that happens:
+
+  * a shiny is still the averaged step the limits were tuned for: when
+    the window closes, the mean of the second half of its readings is
+    more than `step_limit` away from the mean of the first half. A short
+    transient in the intro moves one half's mean only a little, so it is
+    not a step even when it is bigger than the limit;
+  * every other change bigger than `activity` between two readings is the
+    intro playing. Each non-shiny encounter records when the first and
+    the last of those happened (seconds after monitoring started);
+  * after `learn` encounters the window is the median start of the
+    activity and the latest recent end plus `margin`. Once it has passed
+    the encounter is judged, and a non-shiny one can flee.
+
+Until the window is learned (or if the sensor never moves) the full
+`max_window` is watched, as before.
+
+Example
+-------
+from scripts.ldr_window import SparkleWindow
+
+window = SparkleWindow(step_limit=40, max_window=25.0)
+...
+shiny = window.check(controller, stop_event, log)    # per encounter
+if shiny:
+    log("Shiny!")
+"""
+
+import time
+from collections import deque
+from statistics import median
+from typing import Optional, Tuple
+
+
+class SparkleWindow:
+    """Streams LDR readings per encounter; learns when the sparkle can play."""
+
+    def __init__(self, step_limit: float, max_window: float, interval: float = 0.1,
+                 baseline: int = 3, activity: Optional[float] = None,
+                 margin: float = 1.0, learn: int = 5, keep: int = 20):
+        """
+        Parameters
+        ----------
+        step_limit : float
+            Step between the mean of the first and of the second half of
+            the readings that counts as the sparkle.
+        max_window : float
+            Seconds to watch while the window is unknown.
+        interval : float
+            Seconds between readings.
+        baseline : int
+            Readings each half needs before `last_step` is reported while
+            the window is open.
+        activity : float or None
+            Change between consecutive readings that counts as the intro
+            playing. Defaults to a quarter of `step_limit`.
+        margin : float
+            Seconds added after the latest learned end of the intro.
+        learn, keep : int
+            Encounters needed before exiting early, and how many recent
+            ones the window is learned from.
+        """
+        self.step_limit = step_limit
+        self.max_window = max_window
+        self.interval = interval
+        self.baseline = baseline
+        self.activity = step_limit / 4.0 if activity is None else activity
+        self.margin = margin
+        self.learn = learn
+        self.starts = deque(maxlen=keep)
+        self.ends = deque(maxlen=keep)
+        self.last_step = 0.0
+        self.last_elapsed = 0.0
+        self.last_active: Optional[Tuple[float, float]] = None
+
+    # ── Learned window ───────────────────────────────────────────────────────
+
+    @property
+    def window(self) -> Optional[Tuple[float, float]]:
+        """(offset, width) in seconds after monitoring starts, or None while learning."""
+        if len(self.ends) < self.learn:
+            return None
+        offset = median(self.starts)
+        return offset, max(self.ends) + self.margin - offset
+
+    @property
+    def closes_at(self) -> float:
+        """Seconds after which the encounter is judged."""
+        window = self.window
+        if window is None:
+            return self.max_window
+        return min(self.max_window, window[0] + window[1])
+
+    def record(self, start: float, end: float):
+        """Add one non-shiny encounter's intro activity (seconds after the start)."""
+        self.starts.append(start)
+        self.ends.append(end)
+
+    # ── Monitoring ────────────────────────────────────────────────────────────
+
+    def begin(self):
+        """Start a new encounter: forget its readings, fix when it closes."""
+        self._closes_at = self.closes_at
+        self._readings = []
+        self._first_active = self._last_active = None
+        self.last_step, self.last_elapsed, self.last_active = 0.0, 0.0, None
+
+    def feed(self, value: float, elapsed: float) -> Optional[bool]:
+        """
+        One reading, `elapsed` seconds after begin(). None while the window
+        is open; once it has closed, True on a step between the halves and
+        False without one (the encounter is recorded). While open,
+        `last_step` is the step between the halves so far.
+        """
+        readings = self._readings
+        if readings and abs(value - readings[-1]) > self.activity:
+            if self._first_active is None:
+                self._first_active = elapsed
+            self._last_active = elapsed
+        readings.append(value)
+        self.last_elapsed = elapsed
+        half = len(readings) // 2
+        if half >= self.baseline:
+            first = sum(readings[:half]) / half
+            second = sum(readings[half:]) / (len(readings) - half)
+            self.last_step = abs(second - first)
+        if elapsed < self._closes_at:
+            return None
+        if self.last_step > self.step_limit:
+            return True
+        if self._first_active is not None:
+            self.last_active = (self._first_active, self._last_active)
+            self.record(*self.last_active)
+        return False
+
+    def monitor(self, controller, stop_event) -> Optional[bool]:
+        """
+        Read the LDR every `interval` until the window closes: True on a
+        step, False without one. None if stopped.
+        """
+        self.begin()
+        start = time.time()
+        while not stop_event.is_set():
+            verdict = self.feed(controller.read_light_value(), time.time() - start)
+            if verdict is not None:
+                return verdict
+            if stop_event.wait(self.interval):
+                break
+        return None
+
+    def check(self, controller, stop_event, log) -> bool:
+        """monitor(), logging the step and the window."""
+        shiny = self.monitor(controller, stop_event)
+        if shiny is None:
+            return False
+        window = self.window
+        if window is None:
+            state = f"learning window, {len(self.ends)}/{self.learn}"
+        else:
+            state = f"window {window[0]:.1f}+{window[1]:.1f} s"
+        log(f"LDR step: {self.last_step:.1f} (limit {self.step_limit}) after "
+            f"{self.last_elapsed:.1f} s ({state})")
+        return shiny
+
+
+if __name__ == '__main__':
+    import threading
+
+    class _Sensor:
+        """Flat 100 with a `dip` from 1.0 s to 2.0 s (the intro); a shiny adds
+        +80 from 1.5 s."""
+
+        def __init__(self, shiny=False, dip=20):
+            self.start, self.shiny, self.dip = time.time(), shiny, dip
+
+        def read_light_value(self):
+            t = time.time() - self.start
+            value = 100
+            if 1.0 <= t < 2.0:
+                value -= self.dip
+            if self.shiny and t >= 1.5:
+                value += 80
+            return value
+
+    window = SparkleWindow(step_limit=40, max_window=5.0, interval=0.05, margin=0.5, learn=2)
+    stop = threading.Event()
+    for shiny in (False, False, False, True):
+        verdict = window.monitor(_Sensor(shiny), stop)
+        print(f"shiny={shiny}: verdict {verdict} after {window.last_elapsed:.2f} s, "
+              f"window {window.window}")
+        assert verdict == shiny
+    assert window.last_elapsed < 3.0                    # judged at ~2.5 s, not 5 s
+    verdict = window.monitor(_Sensor(), stop)
+    assert verdict is False and window.last_elapsed < 3.0
+    # An intro dip deeper than the limit is not a step: it moves each half's mean little.
+    verdict = window.monitor(_Sensor(dip=60), stop)
+    print(f"dip 60: verdict {verdict}, step {window.last_step:.1f}")
+    assert verdict is False
+    print("PASS")
@@ -1,32 +1,78 @@
 """
-Light Sensor Test — reads the LDR (light sensor) every second and logs its value.
+Light Sensor Test — measures the LDR (light sensor), then logs its value
+every second.
 
 Use this script to verify the GamePRo hardware is connected and communicating
-correctly before running a full automation script.
+correctly before running a full automation script, and to set the LDR
+thresholds the hunting scripts use.
 
-The raw value (0-1020) is returned by the Arduino. Values above BRIGHT_THRESHOLD
-are considered bright (screen on / encounter active); below is dark (screen off /
-black frame). Adjust BRIGHT_THRESHOLD to match your setup.
+The raw value (0-1020) is returned by the Arduino. For the first
+RECORD_SECONDS the sensor is read as fast as the link allows while you make
+the bottom screen go dark and bright a few times (close and open the lid,
+or open and close a dark menu). From that recording (ldr_profile.py):
+
+  - the dark / bright threshold (Otsu's split of the readings),
+  - the noise floor and a recommended step size,
+  - the achievable readings per second and the command round trip,
+  - with the app's capture, the capture card's latency against the LDR,
+
+are logged and saved to calibration/light_sensor.json, where the horde
+scripts pick up the threshold and step instead of LDR_DARK_THRESHOLD /
+LDR_STEP_CHANGE. With fewer than MIN_CYCLES cycles the profile is only
+logged, and its threshold used for this run's live readings; if no dark /
+bright cycle was seen at all, BRIGHT_THRESHOLD is used.
 """
 
 from scripts.base_script import BaseScript
+from scripts.ldr_profile import (apply_device_latency, characterize, device_latency,
+                                 link_speed, record, save_ldr_profile)
 
 
 class LightSensorTest(BaseScript):
     NAME = "Light Sensor Test"
-    DESCRIPTION = "Reads the LDR light sensor every second and logs the value (0-1020)."
+    DESCRIPTION = "Measures the LDR light sensor (thresholds, noise, speed), then logs it every second."
 
-    BRIGHT_THRESHOLD = 512  # values above this are considered bright
+    BRIGHT_THRESHOLD = 512  # values above this are considered bright (if not measured)
+    RECORD_SECONDS   = 20.0 # fast recording of dark / bright cycles
+    MIN_CYCLES       = 3    # dark -> bright cycles for a trustworthy profile
 
     def run(self, controller, frame_grabber, stop_event, log, request_calibration):
         log("Light Sensor Test started.")
-        log(f"Bright threshold: {self.BRIGHT_THRESHOLD}  (0 = dark, 1020 = bright)")
+        log(f"Recording for {self.RECORD_SECONDS:.0f} s: make the bottom screen go dark "
+            f"and bright at least {self.MIN_CYCLES} times (close / open the lid).")
+
+        samples, delays = record(controller, stop_event, self.RECORD_SECONDS, frame_grabber,
+                                 progress=lambda s: log(f"  ... {s.value:4d} / 1020"))
+        if stop_event.is_set():
+            log("Light Sensor Test finished.")
+            return
+
+        threshold = self.BRIGHT_THRESHOLD
+        profile = characterize(samples, device_latency=device_latency(delays))
+        if profile is None:
+            rate, rtt, rtt_p90 = link_speed(samples)
+            log(f"No dark / bright cycle seen — nothing saved. {rate:.0f} readings/s, "
+                f"round trip {rtt:.1f} ms (p90 {rtt_p90:.1f}).")
+        else:
+            log(f"LDR profile: {profile}")
+            if profile.cycles < self.MIN_CYCLES:
+                log(f"Only {profile.cycles} of {self.MIN_CYCLES} cycle(s) seen — nothing "
+                    f"saved. Run again for a profile the hunting scripts can use.")
+            else:
+                save_ldr_profile(profile)
+                log(f"Saved. Hunting scripts will use dark threshold {profile.threshold:.0f} "
+                    f"and step {profile.step:.0f}.")
+                if apply_device_latency(frame_grabber, profile):
+                    log(f"Capture latency set to {profile.device_latency_ms:.0f} ms.")
+            threshold = profile.threshold
+
+        log(f"Bright threshold: {threshold:.0f}  (0 = dark, 1020 = bright)")
         log("Readings will appear below. Click - Stop to end.")
 
         count = 0
         while not stop_event.is_set():
             value = controller.read_light_value()
-            state = "Bright" if value >= self.BRIGHT_THRESHOLD else "Dark"
+            state = "Bright" if value >= threshold else "Dark"
             count += 1
             log(f"Reading {count:4d} - Value: {value:4d} / 1020   ({state})")
             if not self.wait(1.0, stop_event):
@@ -0,0 +1,405 @@
+"""
+Orchestrator — run many scripts against many GamePRo units from one process.
+
+Each console is a (script, controller, capture source) triple. Consoles that
+name the same capture source share one SharedCapture, so the video is decoded
+once no matter how many scripts watch it. Every script runs in its own thread,
+exactly as it would under the GUI, with its own stop_event and a log prefixed
+with the console name.
+
+Detection work submitted through frame_grabber.detect() (or BaseScript.detect)
+runs on a single bounded DetectionScheduler shared by all consoles. Jobs are
+served earliest-deadline-first, and a job whose deadline has already passed
+when a worker picks it up is dropped instead of run. One console's detection
+backlog therefore never delays another console's button timing.
+
+Headless consoles cannot draw calibration rectangles. Pass the regions a
+script will ask for in `calibration`; they are returned in order. A console
+that asks for more regions than it was given is stopped.
+
+Example
+-------
+from scripts.orchestrator import Orchestrator
+
+orch = Orchestrator()
+orch.add_console("switch-1", "scripts.Beta.gen_8_bdsp.bdsp_wild_shiny:BDSPWildShiny",
+                 controller_1, source=0)
+orch.add_console("switch-2", "scripts.Beta.gen_8_bdsp.bdsp_wild_shiny:BDSPWildShiny",
+                 controller_2, source=1)
+orch.start()
+orch.join()
+
+Run `python -m scripts.orchestrator` for a self-check that drives eight
+mock consoles from one replayed clip.
+"""
+
+import heapq
+import importlib
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from scripts.base_script import BaseScript
+from scripts.capture import ConsoleGrabber, SharedCapture
+from scripts.frame_stats import CaptureStats
+from scripts.preview import PreviewRenderer
+
+
+def load_script(spec: Union[str, type, BaseScript]) -> BaseScript:
+    """
+    Return a script instance from a BaseScript subclass, an instance, or a
+    "package.module:ClassName" string. Modules are imported once per process.
+    """
+    if isinstance(spec, BaseScript):
+        return spec
+    if isinstance(spec, str):
+        module_name, _, class_name = spec.partition(':')
+        spec = getattr(importlib.import_module(module_name), class_name)
+    return spec()
+
+
+class DetectionScheduler:
+    """Earliest-deadline-first worker pool shared by all consoles."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        if max_workers is None:
+            # Leave one core free for the script threads' button timing.
+            max_workers = max(1, (os.cpu_count() or 2) - 1)
+        self.max_workers = max_workers
+
+        self._heap: List[tuple] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._listeners: List[Callable[[float], None]] = []
+        self._workers = [
+            threading.Thread(target=self._work, name=f"detect-{i}", daemon=True)
+            for i in range(max_workers)
+        ]
+        for t in self._workers:
+            t.start()
+
+    def submit(self, console: str, fn: Callable, *args,
+               deadline: Optional[float] = None) -> Future:
+        """Queue fn(*args). The future resolves to None if the deadline is missed."""
+        future: Future = Future()
+        key = deadline if deadline is not None else float('inf')
+        with self._cond:
+            if self._stopped:
+                future.set_result(None)
+                return future
+            heapq.heappush(self._heap, (key, next(self._counter), console,
+                                        time.time(), fn, args, future))
+            self._cond.notify()
+        return future
+
+    def run(self, console: str, fn: Callable, *args,
+            deadline: Optional[float] = None):
+        """Submit fn(*args) and block for its result (None if the deadline passed)."""
+        return self.submit(console, fn, *args, deadline=deadline).result()
+
+    def add_latency_listener(self, fn: Callable[[float], None]):
+        """
+        Call fn(seconds) with the queue wait + run time of every job, and
+        with the queue wait of every job dropped at its deadline.
+        """
+        self._listeners.append(fn)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-console {'runs', 'dropped', 'avg_queue_ms'} since start."""
+        with self._cond:
+            out = {}
+            for console, s in self._stats.items():
+                runs = s['runs']
+                out[console] = {
+                    'runs': runs,
+                    'dropped': s['dropped'],
+                    'avg_queue_ms': (s['queue_s'] / runs * 1000.0) if runs else 0.0,
+                }
+            return out
+
+    def shutdown(self):
+        with self._cond:
+            self._stopped = True
+            pending, self._heap = self._heap, []
+            self._cond.notify_all()
+        for item in pending:
+            item[-1].set_result(None)
+        for t in self._workers:
+            t.join(timeout=2.0)
+
+    def _report(self, latency: float):
+        for listener in self._listeners:
+            listener(latency)
+
+    def _work(self):
+        while True:
+            dropped = None
+            with self._cond:
+                while not self._heap and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                deadline, _, console, queued, fn, args, future = heapq.heappop(self._heap)
+                s = self._stats.setdefault(console, {'runs': 0, 'dropped': 0, 'queue_s': 0.0})
+                now = time.time()
+                if now > deadline:
+                    s['dropped'] += 1
+                    dropped = now - queued
+                else:
+                    s['runs'] += 1
+                    s['queue_s'] += now - queued
+
+            if dropped is not None:
+                future.set_result(None)
+                self._report(dropped)
+                continue
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as exc:
+                future.set_exception(exc)
+            self._report(time.time() - queued)
+
+
+class Console:
+    """One script bound to one controller and one capture view."""
+
+    def __init__(self, name: str, script: BaseScript, controller,
+                 grabber: ConsoleGrabber, calibration: List[Tuple[int, int, int, int]],
+                 log: Callable[[str], None]):
+        self.name = name
+        self.script = script
+        self.controller = controller
+        self.grabber = grabber
+        self.stop_event = threading.Event()
+        self.error: Optional[BaseException] = None
+        self._calibration = list(calibration)
+        self._log = log
+        self._thread: Optional[threading.Thread] = None
+
+    def log(self, msg: str):
+        self._log(f"[{self.name}] {msg}")
+
+    def request_calibration(self, prompt: str) -> Tuple[int, int, int, int]:
+        if self._calibration:
+            region = tuple(self._calibration.pop(0))
+            self.log(f"Calibration '{prompt}' -> {region}")
+            return region
+        self.log(f"No headless calibration left for '{prompt}' — stopping.")
+        self.stop_event.set()
+        return (0, 0, 1, 1)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"script-{self.name}",
+                                        daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            self.script.run(self.controller, self.grabber, self.stop_event,
+                            self.log, self.request_calibration)
+        except Exception as exc:
+            self.error = exc
+            self.log(f"Script crashed: {exc!r}")
+        finally:
+            try:
+                self.controller.release_all()
+            except Exception:
+                pass
+
+
+class Orchestrator:
+    """Headless runner binding N (controller, capture) pairs to N scripts."""
+
+    def __init__(self, max_detect_workers: Optional[int] = None,
+                 log: Callable[[str], None] = print, history_seconds: float = 2.0):
+        self.history_seconds = history_seconds
+        self.scheduler = DetectionScheduler(max_detect_workers)
+        self.consoles: Dict[str, Console] = {}
+        self._captures: Dict[Union[int, str], SharedCapture] = {}
+        self._previews: List[PreviewRenderer] = []
+        self._log_lock = threading.Lock()
+        self._log = log
+
+    def log(self, msg: str):
+        with self._log_lock:
+            self._log(msg)
+
+    def add_console(self, name: str, script, controller, source: Union[int, str],
+                    calibration: Optional[List[Tuple[int, int, int, int]]] = None
+                    ) -> Console:
+        """
+        Bind a script to a controller and a capture source.
+
+        script may be a BaseScript subclass, an instance, or a
+        "package.module:ClassName" string. Consoles naming the same source
+        share one decode thread.
+        """
+        if name in self.consoles:
+            raise ValueError(f"Console {name!r} already added")
+        capture = self._captures.get(source)
+        if capture is None:
+            capture = self._captures[source] = SharedCapture(
+                source, history_seconds=self.history_seconds)
+        grabber = ConsoleGrabber(capture, self.scheduler, name)
+        console = Console(name, load_script(script), controller, grabber,
+                          calibration or [], self.log)
+        self.consoles[name] = console
+        return console
+
+    def add_preview(self, name: str, deliver: Callable, **kwargs) -> PreviewRenderer:
+        """
+        Render console `name`'s feed with its overlay to deliver(rgb_image).
+        The preview throttles itself when detection latency rises; keyword
+        arguments go to PreviewRenderer.
+        """
+        grabber = self.consoles[name].grabber
+        renderer = PreviewRenderer(grabber, deliver, overlay=grabber.overlay, **kwargs)
+        self.scheduler.add_latency_listener(renderer.report_detection_latency)
+        self._previews.append(renderer)
+        return renderer
+
+    def capture_stats(self) -> Dict[Union[int, str], CaptureStats]:
+        """Rolling health (FPS, decode time, drops, latency) per capture source."""
+        return {source: capture.stats for source, capture in self._captures.items()}
+
+    def start(self):
+        for capture in self._captures.values():
+            capture.start()
+        for renderer in self._previews:
+            renderer.start()
+        for console in self.consoles.values():
+            console.log(f"Starting {console.script.NAME}")
+            console.start()
+
+    def stop(self):
+        for console in self.consoles.values():
+            console.stop_event.set()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait for every script to return, then release shared resources."""
+        end = None if timeout is None else time.time() + timeout
+        for console in self.consoles.values():
+            console.join(None if end is None else max(0.0, end - time.time()))
+        if any(c.is_alive() for c in self.consoles.values()):
+            return False
+        self.shutdown()
+        return True
+
+    def shutdown(self):
+        self.stop()
+        for console in self.consoles.values():
+            console.join(2.0)
+        for renderer in self._previews:
+            renderer.stop()
+        self.scheduler.shutdown()
+        for capture in self._captures.values():
+            capture.close()
+
+
+# ── Self-check: eight mock consoles on one replayed clip ─────────────────────
+
+class _MockController:
+    """Records button presses instead of writing to a serial port."""
+
+    def __init__(self):
+        self.presses: List[Tuple[float, str]] = []
+
+    def __getattr__(self, name):
+        if name.startswith(('press_', 'hold_', 'soft_reset')) or name == 'release_all':
+            return lambda *a: self.presses.append((time.time(), name))
+        raise AttributeError(name)
+
+    def read_light_value(self) -> int:
+        return 0
+
+
+class _BlackoutCounter(BaseScript):
+    NAME = "Blackout Counter (self-check)"
+
+    DARK_THRESHOLD = 40
+    DARK_FRACTION = 0.65
+
+    def run(self, controller, frame_grabber, stop_event, log, request_calibration):
+        x, y, w, h = request_calibration("Region to watch")
+        dark = False
+        while not stop_event.is_set():
+            frame = frame_grabber.get_latest_frame()
+            if frame is not None:
+                is_dark = self.detect(frame_grabber, self._is_dark, frame[y:y + h, x:x + w],
+                                      deadline=time.time() + 0.1)
+                if is_dark and not dark:
+                    controller.press_a()
+                if is_dark is not None:
+                    dark = is_dark
+            if not self.wait(0.02, stop_event):
+                break
+
+    def _is_dark(self, sample) -> bool:
+        return bool((sample.max(axis=2) < self.DARK_THRESHOLD).mean() > self.DARK_FRACTION)
+
+
+def _write_replay_clip(path: str, seconds: float = 2.0, fps: int = 30):
+    """Write a clip alternating 0.25 s dark / 0.25 s bright frames."""
+    import cv2
+    import numpy as np
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (640, 480))
+    for i in range(int(seconds * fps)):
+        level = 10 if (i // (fps // 4)) % 2 == 0 else 200
+        writer.write(np.full((480, 640, 3), level, np.uint8))
+    writer.release()
+
+
+def _self_check(consoles: int = 8, seconds: float = 4.0) -> bool:
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = os.path.join(tmp, 'replay.avi')
+        _write_replay_clip(clip)
+        orch = Orchestrator(log=lambda m: None)
+        controllers = {}
+        for i in range(consoles):
+            name = f"console-{i + 1}"
+            controllers[name] = _MockController()
+            orch.add_console(name, _BlackoutCounter, controllers[name], clip,
+                             calibration=[(50, 50, 540, 380)])
+        orch.start()
+        time.sleep(seconds)
+        capture_stats = orch.capture_stats()
+        orch.stop()
+        orch.join(5.0)
+
+        # The clip alternates every 7 frames at 30 fps, so each console
+        # should press A once per 14-frame dark/bright cycle.
+        expected = seconds * 30 / 14
+        ok = True
+        stats = orch.scheduler.stats()
+        for name, ctl in controllers.items():
+            n = len(ctl.presses)
+            s = stats.get(name, {})
+            passed = expected * 0.6 <= n <= expected * 1.4
+            ok &= passed
+            print(f"{name}: {n:3d} presses (expected ~{expected:.0f})  "
+                  f"detections={s.get('runs', 0)} dropped={s.get('dropped', 0)} "
+                  f"queue={s.get('avg_queue_ms', 0.0):.2f} ms  {'OK' if passed else 'FAIL'}")
+        for stats in capture_stats.values():
+            print(f"capture: {stats}")
+        print("PASS" if ok else "FAIL")
+        return ok
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(0 if _self_check() else 1)
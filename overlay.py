@@ -0,0 +1,189 @@
+"""
+Overlay — shapes, text and heatmaps drawn over the preview, never the frame.
+
+Scripts register overlay items by ID; the preview composites them onto its
+own display image, after scaling to preview resolution. Captured frames are
+never written to, so detection and every other consumer keep seeing exactly
+what the capture card delivered, and no full-frame copy is made to annotate.
+
+All coordinates are frame pixels (the same space as get_latest_frame and
+request_calibration). Registering an ID again replaces the old item.
+
+Example
+-------
+from scripts.overlay import get_overlay
+
+overlay = get_overlay(frame_grabber)
+overlay.set_rect('region', x, y, w, h, colour=(0, 0, 255))
+overlay.set_text('status', 'Watching...', x, y - 6)
+...
+overlay.clear()
+
+Frame grabbers that do not carry an Overlay (older GUI builds) get a shim
+that forwards the first rectangle to set_detect_overlay().
+
+Preview side
+------------
+display = cv2.resize(frame, (panel_w, panel_h))
+overlay.composite(display, frame.shape)
+"""
+
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+Colour = Tuple[int, int, int]   # B, G, R
+
+
+class Overlay:
+    """Thread-safe registry of overlay items, composited at display time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: Dict[str, tuple] = {}
+
+    # ── Registration (script threads) ─────────────────────────────────────────
+
+    def set_rect(self, item_id: str, x: int, y: int, w: int, h: int,
+                 colour: Colour = (0, 0, 255), thickness: int = 2):
+        """Outline a rectangle. thickness=-1 fills it."""
+        self._put(item_id, ('rect', (x, y, w, h), colour, thickness))
+
+    def set_text(self, item_id: str, text: str, x: int, y: int,
+                 colour: Colour = (255, 255, 255), scale: float = 0.5):
+        """Draw text with its baseline starting at (x, y)."""
+        self._put(item_id, ('text', (x, y), colour, (str(text), scale)))
+
+    def set_heatmap(self, item_id: str, x: int, y: int, w: int, h: int,
+                    values, alpha: float = 0.4,
+                    value_range: Optional[Tuple[float, float]] = None):
+        """
+        Blend a 2-D array of values over the region (x, y, w, h).
+
+        `values` may be any size; it is stretched over the region at
+        preview resolution. Values are normalised to `value_range`
+        (default: the array's own min..max).
+        """
+        arr = np.asarray(values, dtype=np.float32)
+        lo, hi = value_range if value_range is not None else (float(arr.min()), float(arr.max()))
+        norm = np.clip((arr - lo) / max(hi - lo, 1e-6), 0.0, 1.0)
+        self._put(item_id, ('heatmap', (x, y, w, h), None,
+                            ((norm * 255).astype(np.uint8), alpha)))
+
+    def remove(self, item_id: str):
+        with self._lock:
+            self._items.pop(item_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def _put(self, item_id: str, item: tuple):
+        with self._lock:
+            self._items[item_id] = item
+
+    # ── Compositing (preview thread) ──────────────────────────────────────────
+
+    def composite(self, image, frame_shape: Sequence[int]):
+        """
+        Draw every item onto `image` in place and return it.
+
+        `image` is the preview's own BGR display buffer; `frame_shape` is the
+        (h, w, ...) of the frame it was scaled from, used to map frame-pixel
+        coordinates to preview pixels.
+        """
+        with self._lock:
+            items = list(self._items.values())
+        if not items:
+            return image
+
+        import cv2
+        sx = image.shape[1] / float(frame_shape[1])
+        sy = image.shape[0] / float(frame_shape[0])
+
+        for kind, pos, colour, extra in items:
+            if kind == 'rect':
+                x, y, w, h = pos
+                p0 = (int(x * sx), int(y * sy))
+                p1 = (int((x + w) * sx), int((y + h) * sy))
+                cv2.rectangle(image, p0, p1, colour, extra)
+            elif kind == 'text':
+                text, scale = extra
+                org = (int(pos[0] * sx), int(pos[1] * sy))
+                cv2.putText(image, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale,
+                            colour, 1, cv2.LINE_AA)
+            elif kind == 'heatmap':
+                values, alpha = extra
+                x, y, w, h = pos
+                x0, y0 = max(0, int(x * sx)), max(0, int(y * sy))
+                x1 = min(image.shape[1], int((x + w) * sx))
+                y1 = min(image.shape[0], int((y + h) * sy))
+                if x1 <= x0 or y1 <= y0:
+                    continue
+                roi = image[y0:y1, x0:x1]
+                heat = cv2.applyColorMap(
+                    cv2.resize(values, (x1 - x0, y1 - y0), interpolation=cv2.INTER_NEAREST),
+                    cv2.COLORMAP_JET)
+                cv2.addWeighted(heat, alpha, roi, 1.0 - alpha, 0.0, dst=roi)
+        return image
+
+
+class _DetectOverlayShim:
+    """Overlay look-alike for grabbers that only offer set_detect_overlay()."""
+
+    def __init__(self, frame_grabber):
+        self._grabber = frame_grabber
+        self._rects: Dict[str, Tuple[int, int, int, int]] = {}
+        self._lock = threading.Lock()
+
+    def set_rect(self, item_id, x, y, w, h, colour=(0, 0, 255), thickness=2):
+        with self._lock:
+            self._rects[item_id] = (x, y, w, h)
+            self._sync()
+
+    def set_text(self, *args, **kwargs):
+        pass
+
+    def set_heatmap(self, *args, **kwargs):
+        pass
+
+    def remove(self, item_id):
+        with self._lock:
+            self._rects.pop(item_id, None)
+            self._sync()
+
+    def clear(self):
+        with self._lock:
+            self._rects.clear()
+            self._sync()
+
+    def __len__(self):
+        return len(self._rects)
+
+    def _sync(self):
+        if self._rects:
+            if hasattr(self._grabber, 'set_detect_overlay'):
+                self._grabber.set_detect_overlay(*next(iter(self._rects.values())))
+        elif hasattr(self._grabber, 'clear_detect_overlay'):
+            self._grabber.clear_detect_overlay()
+
+
+def get_overlay(frame_grabber):
+    """Return the grabber's Overlay, or a single-rectangle fallback."""
+    overlay = getattr(frame_grabber, 'overlay', None)
+    if overlay is not None:
+        return overlay
+    shim = getattr(frame_grabber, '_overlay_shim', None)
+    if shim is None:
+        shim = _DetectOverlayShim(frame_grabber)
+        try:
+            frame_grabber._overlay_shim = shim
+        except AttributeError:
+            pass
+    return shim
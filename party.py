@@ -0,0 +1,94 @@
+"""
+Party — a model of the eggs and hatchlings a breeding script carries.
+
+Breeding scripts used to hold one egg at a time, so "the egg" and "the
+hatchling" were always party slot 2. Carrying several at once needs to know
+which slot holds what. PartyState tracks the party after the slots the
+script must not touch (the Flame Body Pokemon in slot 1, by default):
+
+  * add_egg() when an egg is collected; it goes to the next free slot;
+  * hatch() when a hatch notification is seen; the oldest egg hatches,
+    which is the order the games hatch eggs carried for the same steps;
+  * expire() drops eggs that should have hatched long ago — collections
+    that never happened (the Day Care had no egg yet). Later members move
+    up a slot, as they do in the game's party;
+  * hatched_slots() lists the slots to check, in party order.
+
+`since` is whatever clock the script counts in (seconds, bike passes).
+
+Example
+-------
+from scripts.party import PartyState
+
+party = PartyState()
+party.add_egg(since=passes)
+...
+slot = party.hatch()                     # 0-based party slot that hatched
+for slot in party.hatched_slots():
+    ...                                  # open its summary and check it
+party.clear()                            # after a soft reset
+"""
+
+from typing import List, NamedTuple, Optional
+
+
+EGG = 'egg'
+HATCHED = 'hatched'
+
+
+class Member(NamedTuple):
+    kind: str           # EGG or HATCHED
+    since: float        # when it was collected
+
+
+class PartyState:
+    """Eggs and hatchlings in party order, after `reserved` untouched slots."""
+
+    def __init__(self, size: int = 6, reserved: int = 1):
+        self.size = size
+        self.reserved = reserved
+        self.members: List[Member] = []
+
+    @property
+    def free(self) -> int:
+        return self.size - self.reserved - len(self.members)
+
+    @property
+    def eggs(self) -> int:
+        return sum(1 for m in self.members if m.kind == EGG)
+
+    @property
+    def hatched(self) -> int:
+        return sum(1 for m in self.members if m.kind == HATCHED)
+
+    def add_egg(self, since: float = 0.0) -> Optional[int]:
+        """Record a collected egg; return its slot, or None if the party is full."""
+        if self.free <= 0:
+            return None
+        self.members.append(Member(EGG, since))
+        return self.reserved + len(self.members) - 1
+
+    def hatch(self) -> Optional[int]:
+        """Mark the oldest egg hatched; return its slot, or None if there is none."""
+        for i, m in enumerate(self.members):
+            if m.kind == EGG:
+                self.members[i] = m._replace(kind=HATCHED)
+                return self.reserved + i
+        return None
+
+    def expire(self, now: float, max_age: float) -> int:
+        """Forget eggs collected more than `max_age` ago; return how many."""
+        kept = [m for m in self.members if m.kind != EGG or now - m.since <= max_age]
+        dropped = len(self.members) - len(kept)
+        self.members = kept
+        return dropped
+
+    def hatched_slots(self) -> List[int]:
+        return [self.reserved + i for i, m in enumerate(self.members) if m.kind == HATCHED]
+
+    def clear(self):
+        self.members = []
+
+    def __str__(self) -> str:
+        kinds = ['keep'] * self.reserved + [m.kind for m in self.members] + ['-'] * self.free
+        return '[' + ' '.join(kinds) + ']'
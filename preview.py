@@ -0,0 +1,164 @@
+"""
+Preview — live-feed rendering decoupled from capture and detection.
+
+PreviewRenderer runs on its own thread and produces display-ready RGB images
+for the video panel at a capped frame rate that is independent of both the
+capture rate and how often scripts poll for frames. Each rendered frame is
+scaled down to panel size *before* the BGR→RGB conversion and overlay
+compositing, so that work happens on 640×480 (or smaller) pixels only.
+
+The renderer also listens for detection latency. While detection calls are
+taking longer than `latency_budget`, the preview frame rate is halved step
+by step (down to `min_fps`); once latency recovers it climbs back to
+`max_fps`. A second without any report decays the latency toward 0, so
+a detection path that has gone quiet does not pin the preview at
+`min_fps`. On a low-end mini-PC the preview therefore gives way to the
+detection path instead of competing with it.
+
+Example
+-------
+from scripts.preview import PreviewRenderer
+
+renderer = PreviewRenderer(frame_grabber, panel.show_rgb, size=(640, 480),
+                           max_fps=15, overlay=frame_grabber.overlay)
+renderer.start()
+...
+renderer.report_detection_latency(0.012)   # or scheduler.add_latency_listener(...)
+...
+renderer.stop()
+"""
+
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+
+class PreviewRenderer:
+    """Frame-rate-capped, auto-throttling preview pipeline."""
+
+    def __init__(self, source, deliver: Callable, size: Tuple[int, int] = (640, 480),
+                 max_fps: float = 15.0, min_fps: float = 2.0, overlay=None,
+                 latency_budget: float = 0.05):
+        """
+        Parameters
+        ----------
+        source : frame grabber
+            Anything with read() (zero-copy borrow, see capture.py) or
+            get_latest_frame().
+        deliver : callable(rgb_image)
+            Receives each rendered RGB uint8 image of shape (h, w, 3). Called
+            on the renderer thread; GUI code should hand it to its own
+            event loop.
+        size : (w, h)
+            Preview resolution.
+        max_fps, min_fps : float
+            Frame-rate cap, and the floor auto-throttling may drop to.
+        overlay : Overlay
+            Composited onto every preview image (see overlay.py).
+        latency_budget : float
+            Detection latency (seconds) above which the preview throttles.
+        """
+        self.source = source
+        self.deliver = deliver
+        self.size = size
+        self.max_fps = max_fps
+        self.min_fps = min_fps
+        self.overlay = overlay
+        self.latency_budget = latency_budget
+
+        self.fps = max_fps
+        self.frames_rendered = 0
+        self._latency = 0.0
+        self._reported = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_seq = 0
+
+    # ── Control ──────────────────────────────────────────────────────────────
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="preview", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def set_max_fps(self, fps: float):
+        with self._lock:
+            self.max_fps = max(self.min_fps, fps)
+            self.fps = min(self.fps, self.max_fps)
+
+    def report_detection_latency(self, seconds: float):
+        """Feed one detection call's latency (queue wait + run time)."""
+        with self._lock:
+            # Exponential moving average over roughly the last 10 calls.
+            self._latency += (seconds - self._latency) * 0.1
+            self._reported = True
+
+    @property
+    def detection_latency(self) -> float:
+        return self._latency
+
+    # ── Render loop ──────────────────────────────────────────────────────────
+
+    def _adjust_fps(self):
+        with self._lock:
+            if not self._reported:
+                self._latency *= 0.5
+            self._reported = False
+            if self._latency > self.latency_budget:
+                self.fps = max(self.min_fps, self.fps * 0.5)
+            elif self._latency < self.latency_budget * 0.7:
+                self.fps = min(self.max_fps, self.fps + 1.0)
+            return self.fps
+
+    def _run(self):
+        next_adjust = time.time() + 1.0
+        fps = self.fps
+        while not self._stop.is_set():
+            started = time.time()
+            if started >= next_adjust:
+                fps = self._adjust_fps()
+                next_adjust = started + 1.0
+
+            image = self._render()
+            if image is not None:
+                self.frames_rendered += 1
+                self.deliver(image)
+
+            delay = 1.0 / fps - (time.time() - started)
+            if delay > 0:
+                self._stop.wait(delay)
+
+    def _render(self):
+        read = getattr(self.source, 'read', None)
+        if read is not None:
+            with read(self._last_seq) as ref:
+                if ref is None:
+                    return None
+                self._last_seq = ref.seq
+                return self._convert(ref.frame)
+        frame = self.source.get_latest_frame()
+        if frame is None:
+            return None
+        return self._convert(frame)
+
+    def _convert(self, frame):
+        import cv2
+        w, h = self.size
+        if frame.shape[1] == w and frame.shape[0] == h:
+            small = frame
+        else:
+            small = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+        if self.overlay is not None and len(self.overlay):
+            if small is frame:
+                small = frame.copy()    # never draw on a shared capture frame
+            self.overlay.composite(small, frame.shape)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
@@ -0,0 +1,183 @@
+"""
+Pyramid — a tiny downscaled copy of each frame for coarse screen-state checks.
+
+Questions like "is the screen dark?", "did the brightness drop?" or "is
+there a white flash?" do not need 300 000 pixels. The headless capture
+(SharedCapture, see capture.py) can compute an 80×60 area-averaged level
+once per decoded frame; every coarse predicate then reads 4 800 pixels
+instead of the full frame, and never copies the full frame either.
+
+Each coarse pixel is the mean of an 8×8 block of the 640×480 frame, so
+thresholds keep their meaning for uniform screens (blackouts, flashes, fades)
+— the cases these checks exist for. Sprite-level checks still belong at full
+resolution.
+
+Example
+-------
+from scripts.pyramid import get_coarse_frame, coarse_sample
+from scripts.kernels import dark_fraction
+
+coarse = get_coarse_frame(frame_grabber)
+if coarse is not None:
+    if dark_fraction(coarse_sample(coarse, 50, 50, 540, 380), 40) > 0.65:
+        ...
+
+Grabbers without get_coarse_frame() (the GUI's FrameGrabber) fall back to
+downscaling get_latest_frame() — same answers, without the saving.
+
+A check that watches every new frame loops over new_frames(), which wakes
+on the capture's next frame instead of polling:
+
+for coarse, timestamp, seq in new_frames(frame_grabber, stop_event, 5.0,
+                                         read=read_coarse):
+    ...
+
+On an MJPEG capture (SharedCapture(..., mjpeg=True)) a coarse-only phase
+can also skip most of the JPEG decode:
+
+with reduced_decode(frame_grabber):
+    ...                                 # only coarse checks in here
+
+The capture then decodes at 1/8 scale — which is the 80×60 level itself —
+unless another view on the same capture still needs full resolution.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+COARSE_SIZE: Tuple[int, int] = (80, 60)     # (w, h)
+FULL_SHAPE: Tuple[int, int] = (480, 640)    # (h, w) the coordinates refer to
+
+
+def downscale(frame, size: Tuple[int, int] = COARSE_SIZE, out=None):
+    """Area-average `frame` down to `size` (w, h)."""
+    import cv2
+    return cv2.resize(frame, size, dst=out, interpolation=cv2.INTER_AREA)
+
+
+def get_coarse_frame(frame_grabber) -> Optional[np.ndarray]:
+    """Newest frame at COARSE_SIZE, from the grabber's pyramid if it has one."""
+    getter = getattr(frame_grabber, 'get_coarse_frame', None)
+    if getter is not None:
+        return getter()
+    frame = frame_grabber.get_latest_frame()
+    if frame is None:
+        return None
+    return downscale(frame)
+
+
+def read_coarse(frame_grabber) -> Tuple[Optional[np.ndarray], float, int]:
+    """
+    (coarse, timestamp, seq) of the newest frame. Without a pyramid the
+    timestamp is the time of the call and seq is 0.
+    """
+    reader = getattr(frame_grabber, 'read_coarse', None)
+    if reader is not None:
+        return reader()
+    return get_coarse_frame(frame_grabber), time.time(), 0
+
+
+def read_frame(frame_grabber) -> Tuple[Optional[np.ndarray], float, int]:
+    """Full-size counterpart of read_coarse: (frame, timestamp, seq)."""
+    reader = getattr(frame_grabber, 'read_frame', None)
+    if reader is not None:
+        return reader()
+    return frame_grabber.get_latest_frame(), time.time(), 0
+
+
+def read_region(frame_grabber, region) -> Tuple[Optional[np.ndarray], float, int]:
+    """
+    (pixels, timestamp, seq) of one regions.Region of the newest frame. The
+    capture's grabber copies only the region; others crop a full copy.
+    """
+    reader = getattr(frame_grabber, 'read_region', None)
+    if reader is not None:
+        return reader(region)
+    frame, timestamp, seq = read_frame(frame_grabber)
+    return (None if frame is None else region.crop(frame)), timestamp, seq
+
+
+def new_frames(frame_grabber, stop_event, timeout: Optional[float] = None,
+               poll: float = 0.03, read: Callable = read_frame, last_seq: int = -1,
+               idle: bool = False) -> Iterator[Tuple[Optional[np.ndarray], float, int]]:
+    """
+    Yield (image, timestamp, seq) of every new frame until `timeout` seconds
+    pass (None: never) or `stop_event` is set. Between reads it wakes on the
+    grabber's wait_for_frame(), or sleeps `poll` without one; without a
+    frame history (seq 0) every read counts as new.
+
+    `read` is read_frame, read_coarse or any callable(frame_grabber) with
+    the same result, e.g. functools.partial(read_region, region=...). With
+    `idle` the reads that found nothing new are yielded too, with image
+    None, for loops that have work besides the frames.
+    """
+    waiter = getattr(frame_grabber, 'wait_for_frame', None)
+    deadline = None if timeout is None else time.time() + timeout
+    while not stop_event.is_set() and (deadline is None or time.time() < deadline):
+        image, timestamp, seq = read(frame_grabber)
+        if image is not None and (seq == 0 or seq != last_seq):
+            last_seq = seq
+            yield image, timestamp, seq
+        elif idle:
+            yield None, timestamp, seq
+        if waiter is not None and seq:
+            waiter(seq, poll)               # wake on the next frame
+        else:
+            time.sleep(poll)
+
+
+@contextmanager
+def reduced_decode(frame_grabber, scale: int = 8):
+    """
+    Let the capture decode at 1/`scale` while inside the block, restoring
+    the grabber's previous scale on exit. A no-op for grabbers that always
+    decode at full resolution.
+    """
+    setter = getattr(frame_grabber, 'set_decode_scale', None)
+    if setter is None:
+        yield
+        return
+    previous = getattr(frame_grabber, 'decode_scale', 1)
+    setter(scale)
+    try:
+        yield
+    finally:
+        setter(previous)
+
+
+def scale_region(x: int, y: int, w: int, h: int, coarse_shape: Sequence[int],
+                 full_shape: Sequence[int] = FULL_SHAPE) -> Tuple[int, int, int, int]:
+    """Map a full-resolution (x, y, w, h) to coarse pixels (at least 1×1)."""
+    sx = coarse_shape[1] / float(full_shape[1])
+    sy = coarse_shape[0] / float(full_shape[0])
+    cx, cy = int(x * sx), int(y * sy)
+    cw = max(1, int(round((x + w) * sx)) - cx)
+    ch = max(1, int(round((y + h) * sy)) - cy)
+    return cx, cy, cw, ch
+
+
+def coarse_sample(coarse, x: int, y: int, w: int, h: int,
+                  full_shape: Sequence[int] = FULL_SHAPE):
+    """View of the coarse frame covering the full-resolution region (x, y, w, h)."""
+    cx, cy, cw, ch = scale_region(x, y, w, h, coarse.shape, full_shape)
+    return coarse[cy:cy + ch, cx:cx + cw]
+
+
+if __name__ == '__main__':
+    import timeit
+    from scripts.kernels import dark_fraction
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    coarse = downscale(frame)
+    n = 500
+    full = timeit.timeit(lambda: dark_fraction(frame[50:430, 50:590], 40), number=n) / n
+    small = timeit.timeit(
+        lambda: dark_fraction(coarse_sample(coarse, 50, 50, 540, 380), 40), number=n) / n
+    copy = timeit.timeit(lambda: frame.copy(), number=n) / n
+    print(f"dark check, full 380×540: {full * 1e6:8.1f} µs (+{copy * 1e6:.1f} µs frame copy)")
+    print(f"dark check, coarse level:  {small * 1e6:8.1f} µs  ({(full + copy) / small:.0f}× cheaper)")
@@ -0,0 +1,195 @@
+"""
+Reaction — press a button the moment a small screen region changes, and
+measure how long that took.
+
+Chain fishing breaks when the hook comes too late, but the bite checks
+polled get_latest_frame() (a full-frame copy) every 20-30 ms, sometimes
+built their colour classes on every call, and nobody knew how long a
+reaction actually took. Reactor is the dedicated path:
+
+  * it wakes on every new frame (wait_for_frame) instead of sleeping;
+  * it reads only its fixed region (pyramid.read_region: the capture copies
+    just those pixels) and runs a tiny detector on them;
+  * the button is resolved once, when the Reactor is built, so firing is a
+    single call with nothing else in between — logging comes afterwards;
+  * every reaction is a ReactionEvent with three times: the frame was
+    captured (its capture timestamp, less the device latency when
+    frame_stats knows it), the detector decided, the command was sent.
+
+ReactionStats keeps recent events and gives reaction-time percentiles, so
+a slow host or a slower detector shows up in the log as a regression
+against the script's budget.
+
+Example
+-------
+from scripts.reaction import Reactor
+from scripts.regions import px
+
+reactor = Reactor(px(0, 0, 640, 240), lambda roi: count_white(roi, 200) > 500,
+                  controller.press_a)
+event = reactor.wait_and_fire(frame_grabber, stop_event, timeout=15.0)
+if event is not None:
+    log(f"Hooked in {event.total_ms:.0f} ms  ({reactor.stats})")
+
+With the GUI's FrameGrabber (no frame timestamps or wake-ups) the time of
+each poll stands in for the capture time, so reactions read a little
+faster than they are.
+"""
+
+import time
+from collections import deque
+from functools import partial
+from typing import Callable, NamedTuple, Optional
+
+from scripts.frame_stats import get_stats
+from scripts.pyramid import new_frames, read_region
+
+
+class ReactionEvent(NamedTuple):
+    """One detection and the button press it caused (time.time() values)."""
+
+    seq: int
+    captured: float             # frame on screen / captured
+    decided: float              # detector said yes
+    sent: float                 # button command returned
+
+    @property
+    def detect_ms(self) -> float:
+        return (self.decided - self.captured) * 1000.0
+
+    @property
+    def send_ms(self) -> float:
+        return (self.sent - self.decided) * 1000.0
+
+    @property
+    def total_ms(self) -> float:
+        return (self.sent - self.captured) * 1000.0
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ReactionStats:
+    """Recent reaction times and their percentiles."""
+
+    def __init__(self, window: int = 200):
+        self.events = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, event: ReactionEvent):
+        self.events.append(event)
+        self.count += 1
+
+    def percentile(self, q: float, part: str = 'total_ms') -> float:
+        """Reaction time in ms at quantile `q` (0-1) over recent events."""
+        return _percentile([getattr(e, part) for e in self.events], q)
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'p50_ms': self.percentile(0.5),
+            'p90_ms': self.percentile(0.9),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.percentile(1.0),
+            'detect_p90_ms': self.percentile(0.9, 'detect_ms'),
+            'send_p90_ms': self.percentile(0.9, 'send_ms'),
+        }
+
+    def over_budget(self, budget_ms: float, q: float = 0.9) -> bool:
+        """True once the `q` percentile reaction is slower than `budget_ms`."""
+        return len(self.events) >= 5 and self.percentile(q) > budget_ms
+
+    def __str__(self) -> str:
+        s = self.summary()
+        return (f"reaction p50 {s['p50_ms']:.0f} / p90 {s['p90_ms']:.0f} / "
+                f"p99 {s['p99_ms']:.0f} ms  (detect p90 {s['detect_p90_ms']:.0f}, "
+                f"send p90 {s['send_p90_ms']:.0f} ms, n={s['count']})")
+
+
+class Reactor:
+    """Region watcher that fires a pre-resolved button on detection."""
+
+    def __init__(self, region, detect: Callable, press: Callable,
+                 stats: Optional[ReactionStats] = None):
+        """
+        Parameters
+        ----------
+        region : regions.Region
+            The only pixels the detector sees.
+        detect : callable(pixels) -> bool
+            Runs on the region of every new frame; keep it to a few kernels.
+        press : callable()
+            The button, e.g. controller.press_a (bound once, here).
+        stats : ReactionStats or None
+            Where events are recorded; a new one if omitted.
+        """
+        self.region = region
+        self.detect = detect
+        self.press = press
+        self.stats = stats if stats is not None else ReactionStats()
+
+    def wait_and_fire(self, frame_grabber, stop_event, timeout: float,
+                      poll: float = 0.01) -> Optional[ReactionEvent]:
+        """
+        Watch every new frame for up to `timeout` seconds; on the first
+        detection press the button and return the event. None on timeout
+        or stop (nothing pressed).
+        """
+        region, detect, press = self.region, self.detect, self.press
+        stats = get_stats(frame_grabber)
+        latency = stats.device_latency if stats is not None else 0.0
+        read = partial(read_region, region=region)
+        for pixels, timestamp, seq in new_frames(frame_grabber, stop_event, timeout, poll,
+                                                 read=read):
+            if detect(pixels):
+                decided = time.time()
+                press()
+                sent = time.time()
+                event = ReactionEvent(seq, timestamp - latency, decided, sent)
+                self.stats.add(event)
+                return event
+        return None
+
+
+if __name__ == '__main__':
+    import threading
+    import numpy as np
+    from scripts.kernels import count_white
+    from scripts.regions import px
+
+    class _Live:
+        """30 fps frames stamped on arrival; the mark appears at frame 20."""
+
+        def __init__(self):
+            self.start = time.time()
+            self.seq = 0
+
+        def _now_seq(self):
+            return int((time.time() - self.start) * 30)
+
+        def read_frame(self):
+            seq = self._now_seq()
+            frame = np.full((480, 640, 3), 80, np.uint8)
+            if seq >= 20:
+                frame[100:140, 300:320] = 255
+            return frame, self.start + seq / 30.0, seq + 1
+
+        def wait_for_frame(self, after_seq, timeout):
+            end = time.time() + timeout
+            while self._now_seq() + 1 <= after_seq and time.time() < end:
+                time.sleep(0.001)
+            return self._now_seq() + 1 > after_seq
+
+    presses = []
+    reactor = Reactor(px(0, 0, 640, 240), lambda roi: count_white(roi, 200) > 500,
+                      lambda: presses.append(time.time()))
+    for _ in range(5):
+        event = reactor.wait_and_fire(_Live(), threading.Event(), timeout=2.0)
+        assert event is not None and event.seq == 21 and len(presses)
+    print(reactor.stats)
+    assert reactor.stats.percentile(0.9) < 50.0
+    print("PASS")
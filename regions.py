@@ -0,0 +1,108 @@
+"""
+Regions — resolution-independent screen regions and calibrations.
+
+Scripts were written against 640×480 frames and slice them with literal
+pixel coordinates. A Region stores the same rectangle as fractions of the
+frame instead, and turns back into pixels for whatever frame it is applied
+to, so a capture can run at 320×240 on a weak host or at 1080p for a
+detector that needs the detail without re-calibrating or editing scripts.
+
+Existing 640×480 coordinates convert directly with px():
+
+from scripts.regions import px
+
+HATCH_TEXT = px(145, 310, 250, 10)          # x, y, w, h at 640×480
+
+strip = HATCH_TEXT.crop(frame)              # view of any-size BGR frame
+roi = HATCH_TEXT.roi(frame.shape)           # (y0, y1, x0, x1) for backends
+x, y, w, h = HATCH_TEXT.to_pixels(frame.shape)
+
+Calibrations
+------------
+request_calibration() returns pixels of the frame the user drew on. Store
+Region.from_pixels(*rect, frame.shape).to_json() instead of the raw rect;
+Region.from_json() reads both that and the old [x, y, w, h] pixel lists
+(taken as 640×480), so existing calibration files keep working.
+
+Thresholds that count pixels scale with area; multiply them by
+area_scale(frame.shape) when a detector is run off-reference.
+"""
+
+from typing import NamedTuple, Sequence, Tuple, Union
+
+
+REFERENCE_SIZE: Tuple[int, int] = (640, 480)    # (w, h) legacy coordinates refer to
+
+
+def _size(frame_shape: Sequence[int]) -> Tuple[int, int]:
+    """(w, h) from a numpy shape (h, w[, c])."""
+    return int(frame_shape[1]), int(frame_shape[0])
+
+
+class Region(NamedTuple):
+    """A rectangle as fractions (0–1) of the frame's width and height."""
+
+    x: float
+    y: float
+    w: float
+    h: float
+
+    # ── Construction ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def from_pixels(cls, x: float, y: float, w: float, h: float,
+                    frame_shape: Sequence[int] = None) -> 'Region':
+        """
+        Region from pixel coordinates of a frame of `frame_shape` (numpy
+        shape); REFERENCE_SIZE if omitted.
+        """
+        fw, fh = _size(frame_shape) if frame_shape is not None else REFERENCE_SIZE
+        return cls(x / fw, y / fh, w / fw, h / fh)
+
+    @classmethod
+    def from_json(cls, value: Union[dict, Sequence[float]]) -> 'Region':
+        """
+        Read a stored region: a {'x', 'y', 'w', 'h'} dict of fractions, or a
+        legacy [x, y, w, h] list of 640×480 pixels.
+        """
+        if isinstance(value, dict):
+            return cls(float(value['x']), float(value['y']),
+                       float(value['w']), float(value['h']))
+        return cls.from_pixels(*value)
+
+    def to_json(self) -> dict:
+        return {'x': round(self.x, 6), 'y': round(self.y, 6),
+                'w': round(self.w, 6), 'h': round(self.h, 6)}
+
+    # ── Applying to a frame ───────────────────────────────────────────────────
+
+    def to_pixels(self, frame_shape: Sequence[int]) -> Tuple[int, int, int, int]:
+        """(x, y, w, h) in pixels of a frame of `frame_shape`, at least 1×1."""
+        fw, fh = _size(frame_shape)
+        x0, y0 = int(round(self.x * fw)), int(round(self.y * fh))
+        x1 = int(round((self.x + self.w) * fw))
+        y1 = int(round((self.y + self.h) * fh))
+        x0, y0 = min(max(0, x0), fw - 1), min(max(0, y0), fh - 1)
+        return x0, y0, max(1, min(x1, fw) - x0), max(1, min(y1, fh) - y0)
+
+    def roi(self, frame_shape: Sequence[int]) -> Tuple[int, int, int, int]:
+        """(y0, y1, x0, x1), the form detection_backend kernels take."""
+        x, y, w, h = self.to_pixels(frame_shape)
+        return y, y + h, x, x + w
+
+    def crop(self, frame):
+        """View of `frame` covered by this region."""
+        x, y, w, h = self.to_pixels(frame.shape)
+        return frame[y:y + h, x:x + w]
+
+
+def px(x: float, y: float, w: float, h: float) -> Region:
+    """Region from 640×480 pixel coordinates — for converting literals."""
+    return Region.from_pixels(x, y, w, h)
+
+
+def area_scale(frame_shape: Sequence[int]) -> float:
+    """Pixel-count factor of a frame relative to REFERENCE_SIZE (1.0 at 640×480)."""
+    fw, fh = _size(frame_shape)
+    return (fw * fh) / float(REFERENCE_SIZE[0] * REFERENCE_SIZE[1])
+
@@ -0,0 +1,149 @@
+"""
+Sparkle — species-agnostic shiny detection from the entry sparkle burst.
+
+Every shiny plays the same sparkle animation when it enters battle: small
+bright stars that pop up and vanish within a few frames. SparkleDetector
+looks for exactly that in a stack of recent frames (see history.py) instead
+of comparing the sprite against a calibrated colour:
+
+  * brightness is the per-pixel channel max of each frame;
+  * a temporal top-hat (brightness minus its opening over `span` frames)
+    keeps only what got brighter and went away again within `span` frames
+    — a sprite sliding in, the screen fading or a static background all
+    leave it near zero;
+  * a frame "sparkles" when a small share of the region (between
+    `min_fraction` and `max_fraction` of its pixels) spikes above
+    `min_brightness` by more than `delta`. Whole-screen flashes exceed
+    `max_fraction` and are ignored.
+
+The confidence is the number of sparkling frames over `burst_frames`,
+capped at 1.0.
+
+Example
+-------
+from scripts.history import get_history
+from scripts.regions import px
+from scripts.sparkle import SparkleDetector
+
+detector = SparkleDetector(px(360, 60, 220, 200))
+history = get_history(frame_grabber)
+if history is not None and detector.score_history(history, time.time() - 1.5) > 0.6:
+    ...
+
+Run `python -m scripts.sparkle` for a synthetic check.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class SparkleDetector:
+    """Temporal high-pass sparkle detector over a frame stack."""
+
+    def __init__(self, region=None, delta: int = 60, min_brightness: int = 180,
+                 span: int = 4, min_fraction: float = 0.0005,
+                 max_fraction: float = 0.15, burst_frames: int = 3):
+        """
+        Parameters
+        ----------
+        region : regions.Region or None
+            Area around the sprite; None uses frames as given.
+        delta : int
+            Brightness a pixel must jump above its temporal opening.
+        min_brightness : int
+            Sparkle pixels are at least this bright (stars are near white).
+        span : int
+            Longest spike, in frames, still counted as a sparkle.
+        min_fraction, max_fraction : float
+            Share of region pixels spiking for a frame to count.
+        burst_frames : int
+            Sparkling frames that give full confidence.
+        """
+        self.region = region
+        self.delta = delta
+        self.min_brightness = min_brightness
+        self.span = span
+        self.min_fraction = min_fraction
+        self.max_fraction = max_fraction
+        self.burst_frames = burst_frames
+
+    def spike_fractions(self, frames) -> np.ndarray:
+        """Per-frame share of pixels that spike, for a (k, h, w, 3) BGR stack."""
+        k = len(frames)
+        if k < self.span + 2:
+            return np.zeros(k)
+        lum = np.maximum(frames[..., 0], frames[..., 1])
+        np.maximum(lum, frames[..., 2], out=lum)
+
+        # Opening along time: erode (min over span frames), then dilate
+        # (max over span frames). It follows the signal except for bright
+        # spikes shorter than `span` frames, which it cuts off.
+        eroded = sliding_window_view(lum, self.span, axis=0).min(axis=-1)
+        padded = np.concatenate([np.zeros((self.span - 1,) + eroded.shape[1:], np.uint8),
+                                 eroded,
+                                 np.zeros((self.span - 1,) + eroded.shape[1:], np.uint8)])
+        opened = sliding_window_view(padded, self.span, axis=0).max(axis=-1)
+
+        tophat = lum.astype(np.int16)
+        tophat -= opened
+        spikes = (tophat > self.delta) & (lum >= self.min_brightness)
+        fractions = spikes.reshape(k, -1).mean(axis=1)
+        # The first and last frames have no "after"/"before" to compare with.
+        fractions[:self.span - 1] = 0.0
+        fractions[k - self.span + 1:] = 0.0
+        return fractions
+
+    def score(self, frames) -> float:
+        """Confidence (0–1) that the stack contains a sparkle burst."""
+        if self.region is not None and len(frames):
+            y0, y1, x0, x1 = self.region.roi(frames.shape[1:])
+            frames = frames[:, y0:y1, x0:x1]
+        return self._score(frames)
+
+    def score_history(self, history, t0: float, t1: float = None) -> float:
+        """score() over a FrameHistory's frames stamped t0..t1."""
+        frames, _ = history.between(t0, t1, region=self.region)
+        return self._score(frames)
+
+    def _score(self, frames) -> float:
+        fractions = self.spike_fractions(frames)
+        sparkling = (fractions >= self.min_fraction) & (fractions <= self.max_fraction)
+        return min(1.0, int(np.count_nonzero(sparkling)) / float(self.burst_frames))
+
+
+# ── Synthetic check ──────────────────────────────────────────────────────────
+
+def _synthetic_entry(sparkles: bool, frames: int = 45, seed: int = 0):
+    """A sprite sliding in over a textured background, optionally sparkling."""
+    rng = np.random.default_rng(seed)
+    h, w = 120, 160
+    background = rng.integers(40, 120, (h, w, 3), dtype=np.uint8)
+    stack = np.empty((frames, h, w, 3), np.uint8)
+    for i in range(frames):
+        f = background.copy()
+        x = min(100, i * 5)
+        f[40:90, x:x + 50] = (70, 110, 170)             # the sprite
+        if i > frames - 8:
+            f[:] = np.minimum(255, f.astype(np.int16) + 120)   # menu fade-in
+        if sparkles and 20 <= i < 30 and i % 2 == 0:
+            for _ in range(4):
+                cy, cx = rng.integers(35, 95), rng.integers(95, 155)
+                f[cy - 1:cy + 2, cx - 1:cx + 2] = 255    # star
+        stack[i] = f
+    return stack
+
+
+if __name__ == '__main__':
+    import timeit
+
+    detector = SparkleDetector()
+    plain = [detector.score(_synthetic_entry(False, seed=s)) for s in range(5)]
+    shiny = [detector.score(_synthetic_entry(True, seed=s)) for s in range(5)]
+    print("no sparkle:", plain)
+    print("sparkle:   ", shiny)
+    stack = _synthetic_entry(True)
+    n = 20
+    ms = timeit.timeit(lambda: detector.score(stack), number=n) / n * 1000
+    print(f"{len(stack)} frames of {stack.shape[2]}×{stack.shape[1]}: {ms:.1f} ms per score")
+    assert max(plain) < 0.5 and min(shiny) >= 1.0
+    print("PASS")
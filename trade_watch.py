@@ -0,0 +1,248 @@
+"""
+Trade watch — see when an online trade is found, animating and done.
+
+The Wonder Trade / Surprise Trade scripts waited a fixed TRADE_WAIT per
+trade because they could not see the trade. TradeWatcher follows it on the
+80×60 coarse level (see pyramid.py) as a small state machine:
+
+  * SEARCHING — the screen still looks like the reference taken right
+    after the offer was confirmed (the "searching" screen). Slow drift
+    (lighting, an idle animation) is folded into the reference;
+  * ANIMATION — the screen has moved away from the reference: a partner
+    was found and the trade animation is playing;
+  * COMPLETE — the screen has been still for `settle` seconds after at
+    least `min_animation` seconds of change: the animation played out,
+    whatever screen it ended on;
+  * FAILED — the screen never left the searching screen within
+    `search_timeout`: no partner, nothing was traded;
+  * UNCLEAR — the screen left the searching screen, but the change was
+    shorter than `min_animation` and then stayed still for `hold`
+    seconds (a "no partner found" box, or a trade that was not seen
+    through), or did not settle within `trade_timeout`. The offered
+    Pokemon may have been traded, so a script must not offer "the same
+    slot" again without checking.
+
+A still moment shorter than `hold` early in a trade (a "partner found"
+box) does not end the wait: if the screen moves again, the animation
+carries on.
+
+wait_for_change() is the background variant: it only reports the moment a
+region moves away from its reference, e.g. a notification banner over the
+overworld while a Surprise Trade searches in the background.
+
+Example
+-------
+from scripts.trade_watch import TradeWatcher, COMPLETE
+
+watcher = TradeWatcher()
+watcher.arm(frame_grabber)                          # on the searching screen
+outcome = watcher.wait(frame_grabber, stop_event, search_timeout=90.0,
+                       trade_timeout=60.0)
+if outcome == COMPLETE:
+    log(f"Trade done in {watcher.done_time - watcher.armed_time:.0f} s")
+
+With the GUI's FrameGrabber (no frame timestamps) the time of each poll is
+used instead.
+"""
+
+import time
+from typing import Optional
+
+import numpy as np
+
+from scripts.pyramid import new_frames, read_coarse
+from scripts.regions import Region, px
+
+
+SEARCHING = 'searching'
+ANIMATION = 'animation'
+COMPLETE = 'complete'
+FAILED = 'failed'
+UNCLEAR = 'unclear'
+
+FULL_SCREEN = px(0, 0, 640, 480)
+
+
+def mean_diff(a, b) -> float:
+    """Mean absolute difference of two equally sized BGR samples (0-255)."""
+    return float(np.abs(a.astype(np.int16) - b).mean())
+
+
+class TradeWatcher:
+    """Searching → animation → complete / failed, from coarse frames."""
+
+    def __init__(self, region: Region = FULL_SCREEN, change: float = 25.0,
+                 motion: float = 4.0, settle: float = 1.5, min_animation: float = 5.0,
+                 hold: float = 6.0, drift: float = 0.05):
+        """
+        Parameters
+        ----------
+        region : Region
+            Where to look, resolution-independent.
+        change : float
+            Mean difference from the reference that counts as "a different
+            screen".
+        motion : float
+            Mean difference between consecutive frames that counts as
+            movement.
+        settle : float
+            Seconds without movement that end the trade animation.
+        min_animation : float
+            Shortest change, in seconds, that is a trade rather than a
+            message box.
+        hold : float
+            Seconds a shorter change must stay still before it ends the
+            wait as UNCLEAR.
+        drift : float
+            How fast the reference follows a searching screen that changes
+            a little (0 = never).
+        """
+        self.region = region
+        self.change = change
+        self.motion = motion
+        self.settle = settle
+        self.min_animation = min_animation
+        self.hold = hold
+        self.drift = drift
+        self.reference = None
+        self.reset()
+
+    def reset(self):
+        """Back to SEARCHING; the reference is kept."""
+        self.state = SEARCHING
+        self.armed_time: Optional[float] = None
+        self.found_time: Optional[float] = None
+        self.done_time: Optional[float] = None
+        self._previous = None
+        self._moved_time: Optional[float] = None
+        self._seq = -1
+
+    # ── Reference ─────────────────────────────────────────────────────────────
+
+    def arm(self, frame_grabber) -> bool:
+        """Take the current screen as the searching screen. False if no frame."""
+        self.reset()
+        coarse, timestamp, seq = read_coarse(frame_grabber)
+        if coarse is None:
+            self.reference = None
+            return False
+        self.reference = self.region.crop(coarse).astype(np.float32)
+        self.armed_time = timestamp
+        self._seq = seq
+        return True
+
+    # ── Per-frame evaluation ─────────────────────────────────────────────────
+
+    def update(self, coarse, timestamp: float) -> str:
+        """Feed one coarse frame; returns the state after it."""
+        sample = self.region.crop(coarse)
+        distance = mean_diff(sample, self.reference)
+        moving = self._previous is not None and mean_diff(sample, self._previous) > self.motion
+        self._previous = sample.copy()
+
+        if self.state == SEARCHING:
+            if distance > self.change:
+                self.state = ANIMATION
+                self.found_time = self._moved_time = timestamp
+            elif self.drift:
+                self.reference += self.drift * (sample - self.reference)
+        elif self.state == ANIMATION:
+            still = timestamp - self._moved_time
+            if moving:
+                self._moved_time = timestamp
+            elif self._moved_time - self.found_time >= self.min_animation:
+                if still >= self.settle:
+                    self.state, self.done_time = COMPLETE, timestamp
+            elif still >= self.hold:
+                self.state, self.done_time = UNCLEAR, timestamp
+        return self.state
+
+    # ── Grabber helpers ───────────────────────────────────────────────────────
+
+    def wait(self, frame_grabber, stop_event, search_timeout: float,
+             trade_timeout: float, poll: float = 0.05) -> Optional[str]:
+        """
+        Follow the trade from the armed searching screen. Returns COMPLETE,
+        FAILED (never left the searching screen) or UNCLEAR, or None if
+        stopped.
+        """
+        if self.reference is None:
+            return FAILED
+        start = time.time()
+        for coarse, timestamp, seq in new_frames(frame_grabber, stop_event, poll=poll,
+                                                 read=read_coarse, last_seq=self._seq,
+                                                 idle=True):
+            if coarse is not None:
+                self._seq = seq
+                if self.update(coarse, timestamp) in (COMPLETE, UNCLEAR):
+                    return self.state
+            elapsed = time.time() - start
+            if self.state == SEARCHING and elapsed > search_timeout:
+                self.state = FAILED
+                return FAILED
+            if elapsed > search_timeout + trade_timeout:
+                self.state = UNCLEAR
+                return UNCLEAR
+        return None
+
+    def wait_for_change(self, frame_grabber, stop_event, timeout: float,
+                        poll: float = 0.05) -> Optional[float]:
+        """
+        Timestamp of the first frame that moved away from the armed
+        reference, or None on timeout / stop.
+        """
+        if self.reference is None:
+            return None
+        for coarse, timestamp, seq in new_frames(frame_grabber, stop_event, timeout, poll,
+                                                 read=read_coarse, last_seq=self._seq):
+            self._seq = seq
+            if self.update(coarse, timestamp) != SEARCHING:
+                return self.found_time
+        return None
+
+
+if __name__ == '__main__':
+    import threading
+
+    class _Replay:
+        """Coarse frames at 30 fps from a list of (grey level, noise) steps."""
+
+        def __init__(self, steps):
+            self.frames = [level for level, count in steps for _ in range(count)]
+            self.i = 0
+            self.rng = np.random.default_rng(0)
+
+        def get_coarse_frame(self):
+            level = self.frames[min(self.i, len(self.frames) - 1)]
+            if level < 0:                               # animation: noise
+                return self.rng.integers(0, 255, (60, 80, 3), np.uint8)
+            return np.full((60, 80, 3), level, np.uint8)
+
+        def read_coarse(self):
+            frame = self.get_coarse_frame()
+            self.i += 1
+            return frame, self.i / 30.0, self.i
+
+        def wait_for_frame(self, after_seq, timeout):
+            return True
+
+    stop = threading.Event()
+    cases = {
+        # searching (with slow drift), the animation, back to the same screen
+        COMPLETE: [(100, 30), (102, 30), (104, 30), (-1, 240), (104, 120)],
+        # a "partner found" box stops the screen for 1.5 s early in a trade
+        'paused': [(100, 30), (-1, 20), (150, 45), (-1, 200), (104, 120)],
+        # a message box pops up and stays: "no partner found"
+        UNCLEAR: [(100, 30), (-1, 10), (180, 300)],
+        # nothing happens: the searching screen stays
+        FAILED: [(100, 400)],
+    }
+    for expected, steps in cases.items():
+        watcher = TradeWatcher()
+        grabber = _Replay(steps)
+        watcher.arm(grabber)
+        outcome = watcher.wait(grabber, stop, search_timeout=30.0 if expected != FAILED else 0.2,
+                               trade_timeout=30.0)
+        print(expected, outcome, watcher.found_time, watcher.done_time)
+        assert outcome == (COMPLETE if expected == 'paused' else expected)
+    print("PASS")
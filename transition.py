@@ -0,0 +1,170 @@
+"""
+Transition — one encounter-transition detector (blackout / whiteout) for
+every hunting script.
+
+Wild and static hunters each used to carry their own "screen went dark"
+loop, with different thresholds, sample regions and poll rates, so the
+same encounter was noticed at different times by different scripts.
+TransitionDetector replaces them:
+
+  * it runs on the 80×60 coarse level (see pyramid.py) with the
+    allocation-free kernels, so a check costs microseconds and copies no
+    full frame;
+  * it looks at every new frame (waiting on the capture instead of
+    sleeping) and reports the capture timestamp of the frame where the
+    transition started and ended;
+  * it has hysteresis: the transition starts once more than `enter` of the
+    region is dark (or white) and only ends once that falls below `exit`,
+    so a flickering fade cannot trigger twice.
+
+Example
+-------
+from scripts.transition import blackout
+
+detector = blackout()                           # 40 / 65 % over the play area
+if detector.wait_for_start(frame_grabber, stop_event, timeout=15.0):
+    log(f"Battle started at {detector.start_time:.3f}")
+
+whiteout() builds the white-flash variant. Regions are regions.Region, so
+the same detector works on coarse levels and full frames of any size.
+"""
+
+from typing import Optional
+
+from scripts.kernels import count_dark, count_white
+from scripts.pyramid import new_frames, read_coarse
+from scripts.regions import Region, px
+
+
+PLAY_AREA = px(50, 50, 540, 380)    # the blackout sample most scripts used
+
+
+class TransitionDetector:
+    """Hysteresis state machine over the dark (or white) share of a region."""
+
+    def __init__(self, kind: str = 'dark', threshold: int = 40, enter: float = 0.65,
+                 exit: Optional[float] = None, region: Region = PLAY_AREA):
+        """
+        Parameters
+        ----------
+        kind : 'dark' or 'white'
+            Count pixels with B, G and R all below (dark) or above (white)
+            `threshold`.
+        enter, exit : float
+            Share of the region that starts / ends the transition. `exit`
+            defaults to half of `enter`.
+        region : Region
+            Where to look, resolution-independent.
+        """
+        if kind not in ('dark', 'white'):
+            raise ValueError(f"kind must be 'dark' or 'white', got {kind!r}")
+        self.kind = kind
+        self.threshold = threshold
+        self.enter = enter
+        self.exit = enter * 0.5 if exit is None else exit
+        self.region = region
+        self.reset()
+
+    def reset(self):
+        """Forget the current state; the next matching frame starts a transition."""
+        self.active = False
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self._seq = -1
+
+    # ── Per-frame evaluation ─────────────────────────────────────────────────
+
+    def fraction(self, frame) -> float:
+        """Dark (or white) share of the region in a BGR frame of any size."""
+        sample = self.region.crop(frame)
+        count = count_dark if self.kind == 'dark' else count_white
+        return count(sample, self.threshold) / max(1, sample.shape[0] * sample.shape[1])
+
+    def matches(self, frame) -> bool:
+        """Stateless test: is this frame past the `enter` share?"""
+        return self.fraction(frame) > self.enter
+
+    def update(self, frame, timestamp: float) -> Optional[str]:
+        """
+        Feed one frame. Returns 'start' or 'end' on the frame where the
+        transition starts or ends, otherwise None.
+        """
+        share = self.fraction(frame)
+        if not self.active and share > self.enter:
+            self.active = True
+            self.start_time, self.end_time = timestamp, None
+            return 'start'
+        if self.active and share < self.exit:
+            self.active = False
+            self.end_time = timestamp
+            return 'end'
+        return None
+
+    # ── Grabber helpers ───────────────────────────────────────────────────────
+
+    def check(self, frame_grabber) -> bool:
+        """
+        Update from the grabber's newest frame; True while a transition is
+        on. This is the hysteresis level, not the start edge: a script that
+        polls check() for encounters calls reset() once it has handled one.
+        """
+        coarse, timestamp, seq = read_coarse(frame_grabber)
+        if coarse is not None and (seq == 0 or seq != self._seq):
+            self._seq = seq
+            self.update(coarse, timestamp)
+        return self.active
+
+    def wait_for_start(self, frame_grabber, stop_event, timeout: float,
+                       poll: float = 0.03) -> bool:
+        """
+        Wait up to `timeout` seconds for a transition to start. A screen that
+        is already dark (or white) counts. start_time is then set.
+        """
+        self.reset()
+        return self._wait(frame_grabber, stop_event, timeout, poll, 'start')
+
+    def wait_for_end(self, frame_grabber, stop_event, timeout: float,
+                     poll: float = 0.03) -> bool:
+        """Wait up to `timeout` seconds for the current transition to end."""
+        if not self.active:
+            return True
+        return self._wait(frame_grabber, stop_event, timeout, poll, 'end')
+
+    def _wait(self, frame_grabber, stop_event, timeout, poll, edge) -> bool:
+        for coarse, timestamp, seq in new_frames(frame_grabber, stop_event, timeout, poll,
+                                                 read=read_coarse, last_seq=self._seq):
+            self._seq = seq
+            if self.update(coarse, timestamp) == edge:
+                return True
+        return False
+
+
+def blackout(threshold: int = 40, fraction: float = 0.65,
+             region: Region = PLAY_AREA) -> TransitionDetector:
+    """The battle fade-to-black."""
+    return TransitionDetector('dark', threshold, fraction, region=region)
+
+
+def whiteout(threshold: int = 200, fraction: float = 0.125,
+             region: Region = PLAY_AREA) -> TransitionDetector:
+    """A white encounter flash."""
+    return TransitionDetector('white', threshold, fraction, region=region)
+
+
+if __name__ == '__main__':
+    import numpy as np
+
+    # A fade to black and back at 30 fps, with a half-bright flicker (frame
+    # 10) that must not end the transition. Each value is the dark share.
+    detector = blackout()
+    shares = [0.0] * 5 + [0.3, 0.7, 0.9, 1.0, 1.0, 0.5, 1.0, 1.0, 1.0, 0.2, 0.0, 0.0]
+    events = []
+    for i, share in enumerate(shares):
+        frame = np.full((60, 80, 3), 120, np.uint8)
+        frame[:int(round(share * 60))] = 5
+        edge = detector.update(frame, i / 30.0)
+        if edge:
+            events.append((edge, i))
+    print(events)
+    assert events == [('start', 6), ('end', 14)], events
+    print("PASS")